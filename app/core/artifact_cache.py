@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+
+
+class ArtifactCache:
+    """
+    In-process LRU cache of parsed (decrypted) artifacts, keyed by storage key.
+    Each storage key can hold several variants (e.g. different column
+    projections). Bounded by a byte budget and a TTL; entries only ever live
+    in this process's memory and are never written to disk.
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # (key, variant) -> (value, size, expires_at)
+        self._variants = {}            # key -> set of variants
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def _remove(self, entry_key):
+        _, size, _ = self._entries.pop(entry_key)
+        self._bytes -= size
+        key, variant = entry_key
+        variants = self._variants.get(key)
+        if variants is not None:
+            variants.discard(variant)
+            if not variants:
+                del self._variants[key]
+
+    def _lookup(self, entry_key):
+        # Caller holds the lock; counts expirations but not hits / misses
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            return None
+        value, _, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(entry_key)
+            self._stats["expirations"] += 1
+            return None
+        self._entries.move_to_end(entry_key)
+        return value
+
+    def get(self, key: str, variant=None):
+        return self.get_first(key, [variant])[1]
+
+    def get_first(self, key: str, variants: list):
+        """
+        The first of `variants` cached for `key`, as (variant, value), or
+        (None, None). Counts as one hit or one miss however many variants
+        are tried.
+        """
+        with self._lock:
+            for variant in variants:
+                value = self._lookup((key, variant))
+                if value is not None:
+                    self._stats["hits"] += 1
+                    return variant, value
+            self._stats["misses"] += 1
+            return None, None
+
+    def put(self, key: str, value, size: int, variant=None):
+        if size > self.max_bytes:
+            return
+        entry_key = (key, variant)
+        with self._lock:
+            if entry_key in self._entries:
+                self._remove(entry_key)
+            while self._entries and self._bytes + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+            self._entries[entry_key] = (value, size, time.monotonic() + self.ttl_seconds)
+            self._variants.setdefault(key, set()).add(variant)
+            self._bytes += size
+
+    def invalidate(self, key: str):
+        """
+        Drop every cached variant of `key`.
+        """
+        with self._lock:
+            for variant in list(self._variants.get(key, ())):
+                self._remove((key, variant))
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._variants.clear()
+            self._bytes = 0
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else None,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+result_cache = ArtifactCache(
+    max_bytes=settings.RESULT_CACHE_MAX_MB * 1024 * 1024,
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+)
@@ -1,6 +1,22 @@
-import boto3
+import os
+import threading
+
 from app.core.config import settings
 
+# boto3 / botocore are imported on first use: they add ~0.5 s to startup and
+# the local storage backend never needs them.
+
+MB = 1024 * 1024
+
+# One client per service per process. boto3 clients are thread-safe, so every
+# thread in a worker shares them (and their connection pool). After a fork the
+# cache is rebuilt so processes never share sockets.
+_clients = {}
+_clients_pid = None
+_lock = threading.Lock()
+_metrics = {}
+
+
 def _boto3_kwargs():
     kw = {"region_name": settings.AWS_REGION}
     if settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY:
@@ -10,22 +26,70 @@ def _boto3_kwargs():
         kw["aws_session_token"] = settings.AWS_SESSION_TOKEN
     return kw
 
-s3_client = boto3.client("s3", **_boto3_kwargs())
-kms_client = boto3.client("kms", **_boto3_kwargs())
-
-def upload_encrypted_file(file_path: str, key: str):
-    s3_client.upload_file(
-        file_path,
-        settings.S3_BUCKET,
-        key,
-        ExtraArgs={
-            "ServerSideEncryption": "aws:kms",
-            "SSEKMSKeyId": settings.KMS_KEY_ID,
-        },
+
+def _client_config():
+    from botocore.config import Config
+    return Config(
+        max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+        retries={"max_attempts": 5, "mode": "standard"},
     )
 
-def download_file(key: str, dest_path: str):
-    s3_client.download_file(settings.S3_BUCKET, key, dest_path)
 
-def delete_file(key: str):
-    s3_client.delete_object(Bucket=settings.S3_BUCKET, Key=key)
\ No newline at end of file
+def get_client(service: str):
+    """
+    Return the shared boto3 client for `service` in this process.
+    """
+    global _clients_pid
+
+    with _lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+
+        counters = _metrics.setdefault(service, {"created": 0, "reused": 0})
+        client = _clients.get(service)
+        if client is None:
+            # A private session: the boto3 default session is not thread-safe
+            import boto3
+            session = boto3.session.Session(**_boto3_kwargs())
+            client = session.client(service, config=_client_config())
+            _clients[service] = client
+            counters["created"] += 1
+        else:
+            counters["reused"] += 1
+        return client
+
+
+_transfer_config = None
+
+
+def transfer_config():
+    """
+    Multipart settings (boto3 TransferConfig) for upload_fileobj / download_fileobj.
+    """
+    global _transfer_config
+    if _transfer_config is None:
+        from boto3.s3.transfer import TransferConfig
+        _transfer_config = TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD_MB * MB,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNKSIZE_MB * MB,
+            max_concurrency=settings.S3_MAX_CONCURRENCY,
+            use_threads=settings.S3_MAX_CONCURRENCY > 1,
+        )
+    return _transfer_config
+
+
+def client_metrics() -> dict:
+    """
+    Client construction vs reuse counts for this process.
+    """
+    with _lock:
+        return {
+            "pid": os.getpid(),
+            "clients": {service: dict(counts) for service, counts in _metrics.items()},
+            "max_pool_connections": settings.S3_MAX_POOL_CONNECTIONS,
+            "multipart_threshold_mb": settings.S3_MULTIPART_THRESHOLD_MB,
+            "multipart_chunksize_mb": settings.S3_MULTIPART_CHUNKSIZE_MB,
+            "max_concurrency": settings.S3_MAX_CONCURRENCY,
+        }
+
@@ -0,0 +1,153 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from app.core.config import settings
+
+# Cores given to the job running on this thread (set inside job_limits)
+_local = threading.local()
+
+
+def total_cores() -> int:
+    """
+    Cores this host gives the app: COMPUTE_CORES, or every core the process
+    may run on.
+    """
+    if settings.COMPUTE_CORES > 0:
+        return settings.COMPUTE_CORES
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS / Windows
+        return os.cpu_count() or 1
+
+
+def cores_per_job() -> int:
+    """
+    JOB_CORES, or an even split of the host between the CPU workers (all of
+    it when CPU_WORKERS is 0 and jobs run one at a time in this process).
+    """
+    if settings.JOB_CORES > 0:
+        return min(settings.JOB_CORES, total_cores())
+    return max(1, total_cores() // max(settings.CPU_WORKERS, 1))
+
+
+_process_limits = None
+_process_limits_lock = threading.Lock()
+
+
+def apply_process_limits(cores: int):
+    """
+    Cap the native thread pools (BLAS, OpenMP) of this process at `cores`.
+    threadpoolctl limits are process-wide, not per thread or per job, so this
+    runs once per process, after the model's libraries are loaded (limits
+    only reach libraries loaded by then, and a threadpoolctl scan racing an
+    import on another thread can deadlock). In a CPU worker that is exactly
+    its job budget; with CPU_WORKERS=0, jobs on the I/O threads share the one
+    cap instead of getting one each.
+    """
+    global _process_limits
+    with _process_limits_lock:
+        if _process_limits is not None:
+            return
+        from threadpoolctl import threadpool_limits
+        _process_limits = threadpool_limits(limits=cores)
+
+
+@contextmanager
+def job_limits(cores: int | None):
+    """
+    Make `cores` the n_jobs for estimators the job runs (job_cores()), for the
+    duration of a job on this thread. Native thread pools are capped per
+    process instead (apply_process_limits).
+    """
+    if not cores:
+        yield
+        return
+    previous = getattr(_local, "cores", None)
+    _local.cores = cores
+    try:
+        yield
+    finally:
+        _local.cores = previous
+
+
+def job_cores() -> int:
+    """
+    n_jobs for estimators: the current job's budget (1 outside a job, so
+    nothing fans out across the whole host by accident).
+    """
+    return getattr(_local, "cores", None) or 1
+
+
+class ComputeAllocator:
+    """
+    Hands out core budgets to CPU jobs in the serving process. At most
+    total_cores() // cores_per_job() jobs hold a budget at once; later jobs
+    wait for a slot instead of oversubscribing the host.
+    """
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._active = {}
+        self._waiting = 0
+        self._semaphore = None
+        self._loop = None
+        self._completed = 0
+        # metrics() is read from other threads
+        self._lock = threading.Lock()
+
+    def _slots(self) -> int:
+        return max(1, total_cores() // cores_per_job())
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self._slots())
+            self._loop = loop
+        return self._semaphore
+
+    @asynccontextmanager
+    async def allocate(self, label: str):
+        semaphore = self._get_semaphore()
+        self._waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        job_id = next(self._ids)
+        cores = cores_per_job()
+        with self._lock:
+            self._active[job_id] = {"job": label, "cores": cores, "started": time.monotonic()}
+        try:
+            yield cores
+        finally:
+            with self._lock:
+                del self._active[job_id]
+                self._completed += 1
+            semaphore.release()
+
+    def metrics(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            active = list(self._active.values())
+            completed = self._completed
+        return {
+            "total_cores": total_cores(),
+            "cores_per_job": cores_per_job(),
+            "slots": self._slots(),
+            "cores_allocated": sum(job["cores"] for job in active),
+            "jobs_running": len(active),
+            "jobs_waiting": self._waiting,
+            "jobs_completed": completed,
+            "allocations": [
+                {"job": job["job"], "cores": job["cores"], "seconds": round(now - job["started"], 3)}
+                for job in active
+            ],
+        }
+
+
+compute_allocator = ComputeAllocator()
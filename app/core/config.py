@@ -11,6 +11,80 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: str | None = None
     AWS_SESSION_TOKEN: str | None = None  # optional, only if we are using temp creds in the future
 
+    # Object storage: "s3" (S3_BUCKET) or "local" (files under LOCAL_STORAGE_ROOT)
+    STORAGE_BACKEND: str = "s3"
+    LOCAL_STORAGE_ROOT: str = "storage/objects"
+
+    # Shared S3 client / transfer tuning
+    S3_MAX_POOL_CONNECTIONS: int = 32
+    S3_MULTIPART_THRESHOLD_MB: int = 8
+    S3_MULTIPART_CHUNKSIZE_MB: int = 8
+    S3_MAX_CONCURRENCY: int = 10
+
+    # Envelope encryption: data keys are wrapped by "kms" (KMS_KEY_ID) or "local" (LOCAL_KEK_PATH)
+    KEY_ENCRYPTION_BACKEND: str = "kms"
+    LOCAL_KEK_PATH: str = "storage/local.key"
+    # Unwrapped KMS data keys kept in memory (per process) so repeat reads skip KMS Decrypt; 0 disables
+    DATA_KEY_CACHE_SECONDS: int = 300
+    DATA_KEY_CACHE_SIZE: int = 1024
+    # One data key serves new writes for this long / this many objects before KMS is asked again; 0 disables
+    DATA_KEY_REUSE_SECONDS: int = 300
+    DATA_KEY_MAX_USES: int = 1000
+
+    # Compression before encryption: "auto" (zstd if installed, else gzip), "zstd", "gzip" or "none"
+    STORAGE_COMPRESSION: str = "auto"
+
+    # In-memory cache of parsed results (per process)
+    RESULT_CACHE_MAX_MB: int = 256
+    RESULT_CACHE_TTL_SECONDS: int = 300
+
+    # Execution pools: threads for blocking I/O, processes for CPU-heavy work
+    # (CPU_WORKERS=0 runs CPU work on the I/O threads instead)
+    IO_WORKERS: int = 16
+    CPU_WORKERS: int = 2
+    CPU_POOL_START_METHOD: str = "spawn"
+
+    # Core budget for CPU jobs (scoring, SHAP, rendering), applied as estimator
+    # n_jobs per job and as threadpoolctl limits per process, so concurrent
+    # jobs don't oversubscribe the host. 0 = all cores / an even split per CPU
+    # worker. With CPU_WORKERS=0 the threadpoolctl limit is process-wide:
+    # concurrent jobs share it rather than getting one each.
+    COMPUTE_CORES: int = 0
+    JOB_CORES: int = 0
+
+    # Fraud model (joblib). Saved uncompressed (see save_model), its numpy
+    # arrays are memory-mapped read-only (MODEL_MMAP_MODE="r"), so the page
+    # cache holds one copy for every worker; "" loads them into process memory.
+    MODEL_PATH: str = "models/fraud_model.pkl"
+    MODEL_MMAP_MODE: str = "r"
+    # Load the model at import, before workers fork (gunicorn --preload, or
+    # the CPU pool's fork server): children share it copy-on-write. Requires
+    # CPU_POOL_START_METHOD=forkserver; "fork" is switched to it, since the pool
+    # starts after the I/O and export threads and forking a threaded process
+    # can deadlock the child.
+    MODEL_PRELOAD: bool = False
+
+    # Level of the app's own loggers (app.*): startup phase timings, worker
+    # memory and compression ratios are logged at INFO
+    LOG_LEVEL: str = "INFO"
+
+    # Load the model, start the CPU workers and build cloud clients in the
+    # background after startup; /health/ready reports 503 until this is done
+    STARTUP_WARMUP: bool = True
+    # Warm-up is tried up to STARTUP_WARMUP_ATTEMPTS times, waiting
+    # STARTUP_WARMUP_RETRY_SECONDS after the first failure and doubling after each
+    STARTUP_WARMUP_ATTEMPTS: int = 5
+    STARTUP_WARMUP_RETRY_SECONDS: float = 2.0
+
+    # Bank schema registry: "file" (schema_mapping.json) or "db" (bank_schemas table, for multiple replicas)
+    SCHEMA_BACKEND: str = "file"
+    SCHEMA_FILE_PATH: str = "schema_mapping.json"
+    SCHEMA_REFRESH_SECONDS: float = 5.0
+
+    # PDF reports list at most this many flagged rows in detail (0 = no limit);
+    # a capped report says so and how many rows it left out
+    PDF_MAX_DETAIL_ROWS: int = 0
+
     SECRET_KEY: str = "secret-key"
     ALGORITHM: str = "HS256"
 
@@ -21,6 +95,17 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str | None = None
     EMAILS_FROM_EMAIL: str | None = "noreply@frauds.com"
 
+    # Export job queue
+    EXPORT_WORKERS: int = 2
+    EXPORT_MAX_ATTEMPTS: int = 4
+    EXPORT_RETRY_BASE_SECONDS: int = 5
+    EXPORT_JOB_LEASE_SECONDS: int = 600
+    EXPORT_POLL_SECONDS: float = 2.0
+    EXPORT_TOKEN_MINUTES: int = 30
+    # Unreferenced export artifacts are kept this long after last use before the sweep removes them
+    EXPORT_ARTIFACT_GRACE_SECONDS: int = 300
+    EXPORT_SWEEP_SECONDS: int = 60
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,404 @@
+import base64
+import io
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip (zlib) is always available
+    zstandard = None
+
+# Single-object encrypted envelope:
+#   MAGIC (4) | version (1) | header length (4, big-endian) | JSON header | payload
+# The header carries the wrapped data key and the name of the key-encryption
+# key (KEK) that wrapped it, so one GET is enough to decrypt.
+MAGIC = b"FRDE"
+VERSION = 1
+_PREFIX = struct.Struct(">4sBI")
+
+# "aesgcm-stream" payload: a sequence of frames, each
+#   ciphertext length (4, big-endian) | AES-256-GCM(chunk) incl. 16-byte tag
+# Nonce = 7-byte random prefix | 4-byte chunk counter | 1-byte final flag.
+# The envelope prefix + header are the AAD of every frame, so frames can't be
+# reordered, truncated or moved to another object undetected.
+STREAM_CHUNK_SIZE = 1024 * 1024
+_FRAME_LEN = struct.Struct(">I")
+_TAG_SIZE = 16
+
+
+class KeyEncryptor:
+    """
+    KMS-style key-encryption interface: wraps / unwraps data keys.
+    """
+    name = ""
+
+    def wrap(self, data_key: bytes) -> bytes:
+        raise NotImplementedError
+
+    def unwrap(self, wrapped_key: bytes) -> bytes:
+        raise NotImplementedError
+
+    def data_key(self) -> tuple[bytes, bytes]:
+        """
+        A 256-bit data key for a new object and its wrapped form.
+        """
+        data_key = AESGCM.generate_key(bit_length=256)
+        return data_key, self.wrap(data_key)
+
+
+class KmsKeyEncryptor(KeyEncryptor):
+    """
+    Data keys wrapped by AWS KMS. Unwrapped keys are cached in memory for
+    DATA_KEY_CACHE_SECONDS, keyed by the wrapped key, so reading an artifact
+    again (or right after writing it) costs one storage GET and no KMS call.
+    Writes reuse one data key for up to DATA_KEY_REUSE_SECONDS and
+    DATA_KEY_MAX_USES objects, so most writes make no KMS call either.
+    """
+    name = "kms"
+
+    def __init__(self, key_id: str, cache_seconds: float = 0, cache_size: int = 0,
+                 reuse_seconds: float = 0, max_uses: int = 0):
+        self.key_id = key_id
+        self.cache_seconds = cache_seconds
+        self.cache_size = cache_size
+        self.reuse_seconds = reuse_seconds
+        self.max_uses = max_uses
+        self._cache = OrderedDict()  # wrapped key -> (data key, expires at)
+        self._lock = threading.Lock()
+        self._write_key = None  # (data key, wrapped key, expires at, uses left)
+        self._write_lock = threading.Lock()
+
+    def _kms(self):
+        from app.core.aws_client import get_client
+        return get_client("kms")
+
+    def _remember(self, wrapped_key: bytes, data_key: bytes):
+        if self.cache_seconds <= 0 or self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[wrapped_key] = (data_key, time.monotonic() + self.cache_seconds)
+            self._cache.move_to_end(wrapped_key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cached(self, wrapped_key: bytes) -> bytes | None:
+        with self._lock:
+            entry = self._cache.get(wrapped_key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._cache[wrapped_key]
+                return None
+            self._cache.move_to_end(wrapped_key)
+            return entry[0]
+
+    def wrap(self, data_key: bytes) -> bytes:
+        wrapped_key = self._kms().encrypt(KeyId=self.key_id, Plaintext=data_key)["CiphertextBlob"]
+        self._remember(wrapped_key, data_key)
+        return wrapped_key
+
+    def data_key(self) -> tuple[bytes, bytes]:
+        if self.reuse_seconds <= 0 or self.max_uses <= 0:
+            return super().data_key()
+        # Held across the KMS call, so concurrent writers don't each fetch a key
+        with self._write_lock:
+            entry = self._write_key
+            if entry is None or entry[2] < time.monotonic() or entry[3] <= 0:
+                data_key, wrapped_key = super().data_key()
+                entry = (data_key, wrapped_key, time.monotonic() + self.reuse_seconds, self.max_uses)
+            self._write_key = entry[:3] + (entry[3] - 1,)
+            return entry[0], entry[1]
+
+    def unwrap(self, wrapped_key: bytes) -> bytes:
+        data_key = self._cached(wrapped_key)
+        if data_key is None:
+            data_key = self._kms().decrypt(CiphertextBlob=wrapped_key)["Plaintext"]
+            self._remember(wrapped_key, data_key)
+        return data_key
+
+
+class LocalKeyEncryptor(KeyEncryptor):
+    """
+    Local stand-in for KMS: wraps data keys with a Fernet key read from disk.
+    """
+    name = "local"
+
+    def __init__(self, key_path: str):
+        self.key_path = key_path
+        self._fernet = None
+
+    def _f(self):
+        if self._fernet is None:
+            with open(self.key_path, "rb") as fh:
+                self._fernet = Fernet(fh.read().strip())
+        return self._fernet
+
+    def wrap(self, data_key: bytes) -> bytes:
+        return self._f().encrypt(data_key)
+
+    def unwrap(self, wrapped_key: bytes) -> bytes:
+        return self._f().decrypt(wrapped_key)
+
+
+_encryptors = {}
+
+
+def get_key_encryptor(name: str | None = None) -> KeyEncryptor:
+    """
+    Key encryptor by name; defaults to Settings.KEY_ENCRYPTION_BACKEND.
+    """
+    name = name or settings.KEY_ENCRYPTION_BACKEND
+    if name not in _encryptors:
+        if name == "kms":
+            _encryptors[name] = KmsKeyEncryptor(
+                settings.KMS_KEY_ID,
+                cache_seconds=settings.DATA_KEY_CACHE_SECONDS,
+                cache_size=settings.DATA_KEY_CACHE_SIZE,
+                reuse_seconds=settings.DATA_KEY_REUSE_SECONDS,
+                max_uses=settings.DATA_KEY_MAX_USES,
+            )
+        elif name == "local":
+            _encryptors[name] = LocalKeyEncryptor(settings.LOCAL_KEK_PATH)
+        else:
+            raise ValueError(f"Unknown key encryption backend: {name}")
+    return _encryptors[name]
+
+
+def is_envelope(blob: bytes) -> bool:
+    return blob[:4] == MAGIC
+
+
+def pack(header: dict, payload: bytes) -> bytes:
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    return _PREFIX.pack(MAGIC, VERSION, len(header_bytes)) + header_bytes + payload
+
+
+def unpack(blob: bytes) -> tuple[dict, memoryview]:
+    magic, version, header_len = _PREFIX.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("Not an encrypted envelope")
+    if version > VERSION:
+        raise ValueError(f"Unsupported envelope version: {version}")
+    start = _PREFIX.size
+    header = json.loads(bytes(blob[start:start + header_len]))
+    return header, memoryview(blob)[start + header_len:]
+
+
+# Compression (applied before encryption, recorded in the header)
+# -----------------------------------
+def default_compression() -> str:
+    """
+    Settings.STORAGE_COMPRESSION, with "auto" resolved to zstd if installed, else gzip.
+    """
+    name = settings.STORAGE_COMPRESSION
+    if name == "auto":
+        return "zstd" if zstandard is not None else "gzip"
+    return name
+
+
+def compressor(name: str):
+    if name == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression requested but zstandard is not installed")
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    if name == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    raise ValueError(f"Unsupported compression: {name}")
+
+
+def _decompressor(name: str):
+    if name == "zstd":
+        if zstandard is None:
+            raise ValueError("Artifact is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompressobj()
+    if name == "gzip":
+        return zlib.decompressobj(31)
+    raise ValueError(f"Unsupported compression: {name}")
+
+
+def _compress(chunks, name: str, stats: dict):
+    stats.update({"compression": name, "raw_bytes": 0, "stored_bytes": 0, "seconds": 0.0})
+    if name == "none":
+        for chunk in chunks:
+            stats["raw_bytes"] += len(chunk)
+            stats["stored_bytes"] += len(chunk)
+            yield chunk
+        return
+
+    comp = compressor(name)
+    for chunk in chunks:
+        start = time.perf_counter()
+        out = comp.compress(chunk)
+        stats["seconds"] += time.perf_counter() - start
+        stats["raw_bytes"] += len(chunk)
+        if out:
+            stats["stored_bytes"] += len(out)
+            yield out
+    start = time.perf_counter()
+    out = comp.flush()
+    stats["seconds"] += time.perf_counter() - start
+    stats["stored_bytes"] += len(out)
+    if out:
+        yield out
+
+
+def _stream_nonce(prefix: bytes, counter: int, final: bool) -> bytes:
+    return prefix + counter.to_bytes(4, "big") + (b"\x01" if final else b"\x00")
+
+
+def _rechunk(chunks, size: int):
+    buf = bytearray()
+    for chunk in chunks:
+        buf += chunk
+        while len(buf) >= size:
+            yield bytes(buf[:size])
+            del buf[:size]
+    yield bytes(buf)
+
+
+def seal_stream(chunks, chunk_size: int = STREAM_CHUNK_SIZE, compression: str = "none", stats: dict | None = None):
+    """
+    Encrypt an iterable of plaintext byte chunks as a streaming envelope,
+    compressing first with `compression` ("zstd", "gzip" or "none").
+    Yields the envelope in pieces; memory use is bounded by `chunk_size`.
+    If given, `stats` is filled with raw/stored byte counts and compression time.
+    """
+    stats = {} if stats is None else stats
+    encryptor = get_key_encryptor()
+    # The data key may be shared with other objects (see KmsKeyEncryptor);
+    # the random nonce prefix keeps their nonces apart
+    data_key, wrapped_key = encryptor.data_key()
+    nonce_prefix = os.urandom(7)
+    header = {
+        "alg": "aesgcm-stream",
+        "kek": encryptor.name,
+        "wrapped_key": base64.b64encode(wrapped_key).decode(),
+        "chunk_size": chunk_size,
+        "nonce_prefix": base64.b64encode(nonce_prefix).decode(),
+        "compression": compression,
+    }
+    head = pack(header, b"")
+    yield head
+
+    aead = AESGCM(data_key)
+    counter = 0
+    pending = None
+    # Look one chunk ahead so the last frame can be marked final
+    for chunk in _rechunk(_compress(chunks, compression, stats), chunk_size):
+        if pending is not None:
+            frame = aead.encrypt(_stream_nonce(nonce_prefix, counter, False), pending, head)
+            yield _FRAME_LEN.pack(len(frame)) + frame
+            counter += 1
+        pending = chunk
+    frame = aead.encrypt(_stream_nonce(nonce_prefix, counter, True), pending or b"", head)
+    yield _FRAME_LEN.pack(len(frame)) + frame
+
+
+def _read_exact(reader, n: int) -> bytes:
+    data = b""
+    while len(data) < n:
+        part = reader.read(n - len(data))
+        if not part:
+            break
+        data += part
+    return data
+
+
+def open_stream(reader, consumed: bytes = b""):
+    """
+    Decrypt an envelope from a file-like `reader`, yielding plaintext chunks.
+    `consumed` holds bytes already read from the start of the stream
+    (e.g. the magic used to detect the format).
+    Fernet envelopes are not chunked and come out as a single piece.
+    """
+    prefix = consumed + _read_exact(reader, _PREFIX.size - len(consumed))
+    magic, version, header_len = _PREFIX.unpack(prefix)
+    header_bytes = _read_exact(reader, header_len)
+    if magic != MAGIC or len(header_bytes) != header_len:
+        raise ValueError("Not an encrypted envelope")
+    if version > VERSION:
+        raise ValueError(f"Unsupported envelope version: {version}")
+    header = json.loads(header_bytes)
+
+    if header.get("alg") == "fernet":
+        yield open_envelope(prefix + header_bytes + reader.read())
+        return
+    if header.get("alg") != "aesgcm-stream":
+        raise ValueError(f"Unsupported envelope algorithm: {header.get('alg')}")
+
+    head = prefix + header_bytes
+    data_key = get_key_encryptor(header["kek"]).unwrap(base64.b64decode(header["wrapped_key"]))
+    nonce_prefix = base64.b64decode(header["nonce_prefix"])
+    max_frame = header["chunk_size"] + _TAG_SIZE
+    aead = AESGCM(data_key)
+    compression = header.get("compression", "none")
+    decomp = _decompressor(compression) if compression != "none" else None
+
+    counter = 0
+    while True:
+        length_bytes = _read_exact(reader, _FRAME_LEN.size)
+        if len(length_bytes) != _FRAME_LEN.size:
+            raise ValueError("Encrypted stream truncated")
+        (length,) = _FRAME_LEN.unpack(length_bytes)
+        if length > max_frame:
+            raise ValueError("Encrypted stream frame too large")
+        frame = _read_exact(reader, length)
+        if len(frame) != length:
+            raise ValueError("Encrypted stream truncated")
+
+        try:
+            chunk = aead.decrypt(_stream_nonce(nonce_prefix, counter, False), frame, head)
+            final = False
+        except InvalidTag:
+            # Raises InvalidTag again if the frame is neither a valid middle nor final frame
+            chunk = aead.decrypt(_stream_nonce(nonce_prefix, counter, True), frame, head)
+            final = True
+
+        if decomp is not None and chunk:
+            chunk = decomp.decompress(chunk)
+        if chunk:
+            yield chunk
+        if final:
+            if reader.read(1):
+                raise ValueError("Data after final encrypted frame")
+            if decomp is not None and hasattr(decomp, "flush"):
+                tail = decomp.flush()
+                if tail:
+                    yield tail
+            return
+        counter += 1
+
+
+def seal(plaintext: bytes) -> bytes:
+    """
+    Encrypt with a fresh Fernet data key and wrap the key with the configured KEK.
+    """
+    data_key = Fernet.generate_key()
+    encryptor = get_key_encryptor()
+    header = {
+        "alg": "fernet",
+        "kek": encryptor.name,
+        "wrapped_key": base64.b64encode(encryptor.wrap(data_key)).decode(),
+    }
+    return pack(header, Fernet(data_key).encrypt(plaintext))
+
+
+def open_envelope(blob: bytes) -> bytes:
+    header, payload = unpack(blob)
+    if header.get("alg") == "aesgcm-stream":
+        return b"".join(open_stream(io.BytesIO(blob)))
+    if header.get("alg") != "fernet":
+        raise ValueError(f"Unsupported envelope algorithm: {header.get('alg')}")
+    data_key = get_key_encryptor(header["kek"]).unwrap(base64.b64decode(header["wrapped_key"]))
+    return Fernet(data_key).decrypt(bytes(payload))
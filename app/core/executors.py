@@ -0,0 +1,203 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+
+from app.core.compute import compute_allocator, job_limits
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_io_pool = None
+_cpu_pool = None
+_lock = threading.Lock()
+
+
+class _RemoteHTTPError(Exception):
+    """
+    Picklable stand-in for an HTTPException raised in a worker process
+    (HTTPException itself can't be unpickled).
+    """
+
+    def __init__(self, status_code: int, detail):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _run_job(fn, args, kwargs, cores=None):
+    with job_limits(cores):
+        return fn(*args, **kwargs)
+
+
+def _call(fn, args, kwargs, cores=None):
+    try:
+        return _run_job(fn, args, kwargs, cores)
+    except HTTPException as e:
+        raise _RemoteHTTPError(e.status_code, e.detail) from None
+
+
+def _init_cpu_worker():
+    # A spawned/forkserver worker starts with logging unconfigured
+    from app.core.startup import configure_logging
+    configure_logging()
+
+    # Jobs get their inputs from, and hand results back to, the API process,
+    # which owns the result cache; a worker's copy would only go stale
+    from app.core.artifact_cache import result_cache
+    result_cache.max_bytes = 0
+
+    # Load the model once per worker process rather than on its first job
+    from app.services.model_service import warm_up
+    warm_up()
+
+
+def _worker_memory():
+    from app.core.startup import resident_memory
+    return resident_memory()
+
+
+def io_executor() -> ThreadPoolExecutor:
+    """
+    Bounded thread pool for blocking I/O (storage, KMS, SES, database, file reads).
+    """
+    global _io_pool
+    with _lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(max_workers=settings.IO_WORKERS, thread_name_prefix="io")
+        return _io_pool
+
+
+def cpu_executor() -> ProcessPoolExecutor | None:
+    """
+    Bounded process pool for CPU-heavy work (parsing, scoring, rendering),
+    or None when CPU_WORKERS is 0 (CPU work then runs on the I/O pool).
+    """
+    global _cpu_pool
+    if settings.CPU_WORKERS <= 0:
+        return None
+    with _lock:
+        if _cpu_pool is None:
+            method = settings.CPU_POOL_START_METHOD
+            if method == "fork" and settings.MODEL_PRELOAD:
+                # This process already runs threads (I/O pool, export workers):
+                # forking it is unsafe, the fork server is started clean instead
+                logger.warning("CPU_POOL_START_METHOD=fork with MODEL_PRELOAD; using forkserver.")
+                method = "forkserver"
+            context = multiprocessing.get_context(method)
+            if method == "forkserver" and settings.MODEL_PRELOAD:
+                # The fork server loads the model once; workers fork from it and share it
+                context.set_forkserver_preload(["app.services.model_service"])
+            _cpu_pool = ProcessPoolExecutor(
+                max_workers=settings.CPU_WORKERS,
+                mp_context=context,
+                initializer=_init_cpu_worker,
+            )
+        return _cpu_pool
+
+
+async def run_io(fn, *args, **kwargs):
+    """
+    Run a blocking call on the I/O thread pool without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """
+    Run a CPU-bound call in the process pool. `fn` and its arguments must be
+    picklable (module-level functions, bytes, plain data). An HTTPException
+    raised by `fn` is re-raised here.
+    The call gets a core budget from the compute allocator (waiting for one if
+    the host is fully allocated), applied as thread-pool limits and n_jobs.
+    """
+    async with compute_allocator.allocate(getattr(fn, "__name__", "job")) as cores:
+        return await _submit_cpu(fn, args, kwargs, cores)
+
+
+async def _submit_cpu(fn, args, kwargs, cores=None):
+    pool = cpu_executor()
+    if pool is None:
+        return await run_io(_run_job, fn, args, kwargs, cores)
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(pool, _call, fn, args, kwargs, cores)
+    except _RemoteHTTPError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail) from None
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool for the next call
+        logger.error("CPU worker pool is broken; restarting it.")
+        _reset_cpu_pool(pool)
+        raise
+
+
+def call_cpu(fn, *args, **kwargs):
+    """
+    Blocking counterpart of run_cpu for threads outside the event loop (the
+    export workers): runs `fn` in the process pool and waits for the result,
+    or runs it in the calling thread when CPU_WORKERS is 0.
+    The call gets a one-core budget; the compute allocator's slots are left
+    to request handling.
+    """
+    pool = cpu_executor()
+    if pool is None:
+        return _run_job(fn, args, kwargs, 1)
+
+    try:
+        return pool.submit(_call, fn, args, kwargs, 1).result()
+    except _RemoteHTTPError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail) from None
+    except BrokenProcessPool:
+        logger.error("CPU worker pool is broken; restarting it.")
+        _reset_cpu_pool(pool)
+        raise
+
+
+async def start_cpu_workers() -> list[dict]:
+    """
+    Start every CPU worker now (each loads the model in its initializer)
+    instead of on the first jobs. Returns the resident memory of the workers
+    that answered. No-op when CPU_WORKERS is 0.
+    """
+    if cpu_executor() is None:
+        return []
+    reports = await asyncio.gather(*(_submit_cpu(_worker_memory, (), {}) for _ in range(settings.CPU_WORKERS)))
+    return list({report["pid"]: report for report in reports}.values())
+
+
+async def iterate_io(iterator):
+    """
+    Async iterator over a blocking iterator (e.g. decrypt + render chunks),
+    advancing it on the I/O pool; for StreamingResponse bodies.
+    """
+    done = object()
+    while True:
+        chunk = await run_io(next, iterator, done)
+        if chunk is done:
+            return
+        yield chunk
+
+
+def _reset_cpu_pool(pool):
+    global _cpu_pool
+    with _lock:
+        if _cpu_pool is pool:
+            _cpu_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_executors():
+    global _io_pool, _cpu_pool
+    with _lock:
+        pools = [_io_pool, _cpu_pool]
+        _io_pool = _cpu_pool = None
+    for pool in pools:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
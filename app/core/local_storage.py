@@ -1,22 +1,15 @@
 import os
 import io
-import boto3
+import itertools
+import logging
+import threading
 from cryptography.fernet import Fernet
-from app.core.config import settings
+from app.core import envelope
+from app.core.storage_backend import get_backend
+from app.core.artifact_cache import result_cache
+from app.core import result_catalog
 
-
-def _boto3_kwargs():
-    kw = {"region_name": settings.AWS_REGION}
-
-    # If creds exist in Settings, pass them to boto3 explicitly
-    if getattr(settings, "AWS_ACCESS_KEY_ID", None) and getattr(settings, "AWS_SECRET_ACCESS_KEY", None):
-        kw["aws_access_key_id"] = settings.AWS_ACCESS_KEY_ID
-        kw["aws_secret_access_key"] = settings.AWS_SECRET_ACCESS_KEY
-
-    return kw
-
-def _s3():
-    return boto3.client("s3", **_boto3_kwargs())
+logger = logging.getLogger(__name__)
 
 
 # Fernet
@@ -27,93 +20,134 @@ def get_fernet(key: bytes):
     return Fernet(key)
 
 
-# Upload (Fernet encrypted to S3 SSE-KMS)
-def store_encrypted(file_bytes_io, prefix="incoming"):
-    s3 = _s3()
+class _IterStream(io.RawIOBase):
+    """
+    Read-only file object over an iterator of byte chunks, so a generator can
+    be handed to upload_fileobj (which then uploads it as multipart parts).
+    """
 
-    key = generate_fernet_key()
-    f = get_fernet(key)
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buf = b""
 
-    encrypted_bytes = f.encrypt(file_bytes_io.getvalue())
+    def readable(self):
+        return True
 
-    s3_key = f"{prefix}/{os.urandom(16).hex()}.bin"
-    key_s3_key = f"{s3_key}.key"
+    def readinto(self, b):
+        while not self._buf:
+            try:
+                self._buf = next(self._chunks)
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
 
-    s3.upload_fileobj(
-        Fileobj=io.BytesIO(encrypted_bytes),
-        Bucket=settings.S3_BUCKET,
-        Key=s3_key,
-        ExtraArgs={
-            "ServerSideEncryption": "aws:kms",
-            "SSEKMSKeyId": settings.KMS_KEY_ID,
-        },
-    )
 
-    s3.upload_fileobj(
-        Fileobj=io.BytesIO(key),
-        Bucket=settings.S3_BUCKET,
-        Key=key_s3_key,
-        ExtraArgs={
-            "ServerSideEncryption": "aws:kms",
-            "SSEKMSKeyId": settings.KMS_KEY_ID,
-        },
-    )
+def _iter_file(fileobj, chunk_size: int = envelope.STREAM_CHUNK_SIZE):
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
 
-    return s3_key
 
+def _upload(s3_key: str, fileobj):
+    get_backend().put(s3_key, fileobj)
 
-def load_decrypted(s3_key: str) -> bytes:
-    s3 = _s3()
 
-    encrypted_buf = io.BytesIO()
-    s3.download_fileobj(Bucket=settings.S3_BUCKET, Key=s3_key, Fileobj=encrypted_buf)
-    encrypted_buf.seek(0)
-    encrypted_bytes = encrypted_buf.read()
+def _download(s3_key: str) -> bytes:
+    return get_backend().get(s3_key)
 
-    key_buf = io.BytesIO()
-    s3.download_fileobj(Bucket=settings.S3_BUCKET, Key=f"{s3_key}.key", Fileobj=key_buf)
-    key_buf.seek(0)
-    fernet_key = key_buf.read()
 
-    f = get_fernet(fernet_key)
-    return f.decrypt(encrypted_bytes)
+# Sidecar holding a result's precomputed summary (see summary_service)
+SUMMARY_SUFFIX = ".summary"
 
+# Payloads that are already compressed internally (Parquet results)
+_PRECOMPRESSED_MAGICS = (b"PAR1",)
 
-def write_encrypted_output(output_bytes: bytes, prefix="flagged") -> str:
-    s3 = _s3()
+_compression_totals = {"artifacts": 0, "raw_bytes": 0, "stored_bytes": 0, "seconds": 0.0}
+_compression_lock = threading.Lock()
 
-    key = generate_fernet_key()
-    f = get_fernet(key)
 
-    encrypted_bytes = f.encrypt(output_bytes)
+def compression_metrics() -> dict:
+    with _compression_lock:
+        totals = dict(_compression_totals)
+    totals["ratio"] = round(totals["raw_bytes"] / totals["stored_bytes"], 3) if totals["stored_bytes"] else None
+    return totals
 
-    s3_key = f"{prefix}/{os.urandom(16).hex()}.bin"
-    key_s3_key = f"{s3_key}.key"
 
-    s3.upload_fileobj(
-        Fileobj=io.BytesIO(encrypted_bytes),
-        Bucket=settings.S3_BUCKET,
-        Key=s3_key,
-        ExtraArgs={
-            "ServerSideEncryption": "aws:kms",
-            "SSEKMSKeyId": settings.KMS_KEY_ID,
-        },
-    )
+def _write_envelope(chunks, prefix: str, s3_key: str | None = None) -> str:
+    # One object holds the wrapped data key and the chunked ciphertext;
+    # compression + encryption feed the multipart upload directly
+    chunks = iter(chunks)
+    first = next(chunks, b"")
+    compression = "none" if first.startswith(_PRECOMPRESSED_MAGICS) else envelope.default_compression()
+
+    if s3_key is None:
+        s3_key = f"{prefix}/{os.urandom(16).hex()}.bin"
+    stats = {}
+    sealed = envelope.seal_stream(itertools.chain([first], chunks), compression=compression, stats=stats)
+    _upload(s3_key, io.BufferedReader(_IterStream(sealed)))
 
-    s3.upload_fileobj(
-        Fileobj=io.BytesIO(key),
-        Bucket=settings.S3_BUCKET,
-        Key=key_s3_key,
-        ExtraArgs={
-            "ServerSideEncryption": "aws:kms",
-            "SSEKMSKeyId": settings.KMS_KEY_ID,
-        },
+    ratio = stats["raw_bytes"] / stats["stored_bytes"] if stats["stored_bytes"] else 0.0
+    logger.info(
+        f"Stored {s3_key}: {stats['raw_bytes']} -> {stats['stored_bytes']} bytes "
+        f"({compression}, ratio {ratio:.2f}x, {stats['seconds'] * 1000:.1f} ms)"
     )
+    with _compression_lock:
+        _compression_totals["artifacts"] += 1
+        _compression_totals["raw_bytes"] += stats["raw_bytes"]
+        _compression_totals["stored_bytes"] += stats["stored_bytes"]
+        _compression_totals["seconds"] += stats["seconds"]
+    return s3_key
+
+
+# Upload (compressed, AES-GCM stream encrypted, stored via the configured backend)
+def store_encrypted(file_bytes_io, prefix="incoming"):
+    return _write_envelope(_iter_file(file_bytes_io), prefix)
+
+
+def iter_decrypted(s3_key: str):
+    """
+    Yield the decrypted content of `s3_key` chunk by chunk, without holding
+    the whole object in memory (streaming envelopes only; older formats are
+    decrypted in one piece).
+    """
+    body = get_backend().open(s3_key)
+    try:
+        magic = body.read(len(envelope.MAGIC))
+        if magic == envelope.MAGIC:
+            yield from envelope.open_stream(body, consumed=magic)
+            return
+
+        # Legacy two-object layout: Fernet key stored next to the data as <key>.key
+        blob = magic + body.read()
+    finally:
+        body.close()
+
+    fernet_key = _download(f"{s3_key}.key")
+    yield get_fernet(fernet_key).decrypt(blob)
+
+
+def load_decrypted(s3_key: str) -> bytes:
+    return b"".join(iter_decrypted(s3_key))
+
 
+def write_encrypted_output(output_bytes: bytes, prefix="flagged", catalog: dict | None = None, key: str | None = None) -> str:
+    # `key` stores under a fixed name (e.g. a sidecar) instead of a random one under `prefix`
+    s3_key = _write_envelope(_iter_file(io.BytesIO(output_bytes)), prefix, key)
+    # Index the result (owner, counts, model version) so lookups don't list the bucket
+    if catalog is not None:
+        result_catalog.record_result(s3_key, **catalog)
     return s3_key
 
 
 def delete_key(s3_key: str):
-    s3 = _s3()
-    s3.delete_object(Bucket=settings.S3_BUCKET, Key=s3_key)
-    s3.delete_object(Bucket=settings.S3_BUCKET, Key=f"{s3_key}.key")
\ No newline at end of file
+    # Single request; also removes the summary sidecar and the legacy <key>.key object if there are any
+    get_backend().delete([s3_key, f"{s3_key}.key", f"{s3_key}{SUMMARY_SUFFIX}"])
+    result_cache.invalidate(s3_key)
+    result_catalog.remove_result(s3_key)
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from app.db.session import SessionLocal
+from app.db.models import ResultCatalog
+
+
+def record_result(key: str, **fields):
+    """
+    Add (or replace) the catalog row for a stored result.
+    `fields` are ResultCatalog columns: user_id, bank_name, row_count, ...
+    """
+    db = SessionLocal()
+    try:
+        db.merge(ResultCatalog(key=key, created_at=datetime.utcnow(), **fields))
+        db.commit()
+    finally:
+        db.close()
+
+
+def remove_result(key: str):
+    db = SessionLocal()
+    try:
+        db.query(ResultCatalog).filter(ResultCatalog.key == key).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def latest_result_for_user(db, user_id: str) -> ResultCatalog | None:
+    return (
+        db.query(ResultCatalog)
+        .filter(ResultCatalog.user_id == user_id)
+        .order_by(ResultCatalog.created_at.desc())
+        .first()
+    )
+
+
+def list_results(db, user_id: str | None = None, limit: int = 50, offset: int = 0) -> list[ResultCatalog]:
+    """
+    Results newest first, optionally only those owned by `user_id`.
+    """
+    query = db.query(ResultCatalog)
+    if user_id is not None:
+        query = query.filter(ResultCatalog.user_id == user_id)
+    return query.order_by(ResultCatalog.created_at.desc()).offset(offset).limit(limit).all()
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def resident_memory() -> dict:
+    """
+    This process's resident memory in MB. "pss_mb" (Linux only) splits pages
+    shared with other processes (e.g. a model inherited copy-on-write) evenly
+    between them, so summing it over workers gives the real total.
+    """
+    memory = {"pid": os.getpid()}
+    try:
+        with open("/proc/self/smaps_rollup") as fh:
+            for line in fh:
+                name, _, value = line.partition(":")
+                if name in ("Rss", "Pss"):
+                    memory[f"{name.lower()}_mb"] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        import resource
+        # ru_maxrss: peak, in KB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        memory["rss_mb"] = round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    return memory
+
+
+def configure_logging():
+    """
+    Send the app's loggers (app.*) to stderr at LOG_LEVEL. uvicorn only sets
+    up its own loggers, so without this their INFO records are dropped.
+    Left to the root handlers when logging has already been configured
+    (e.g. basicConfig or a --log-config file). Safe to call more than once.
+    """
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(settings.LOG_LEVEL.upper())
+    if app_logger.handlers or logging.getLogger().handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s"))
+    app_logger.addHandler(handler)
+
+
+class StartupState:
+    """
+    Startup progress for the health endpoints. The app serves requests (and
+    liveness checks) as soon as the fast phases are done; it is ready once the
+    background warm-up has loaded everything the first real request needs.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started_at = time.monotonic()
+        self.phases = {}
+        self.ready = False
+        self.error = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = round(elapsed, 3)
+            logger.info(f"Startup phase {name} took {elapsed:.3f}s")
+
+    def mark_ready(self):
+        self.ready = True
+        logger.info(f"Ready {time.monotonic() - self.started_at:.3f}s after start, memory {resident_memory()}")
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "uptime_seconds": round(time.monotonic() - self.started_at, 3),
+            "phases": dict(self.phases),
+            "memory": resident_memory(),
+        }
+
+
+startup_state = StartupState()
+
+
+async def _warm_up_once():
+    from app.core.executors import cpu_executor, run_io, start_cpu_workers
+
+    with startup_state.phase("schemas"):
+        from app.services.schema_service import all_schemas
+        await run_io(all_schemas)
+
+    with startup_state.phase("model"):
+        if cpu_executor() is None:
+            from app.services.model_service import warm_up as warm_up_model
+            await run_io(warm_up_model)
+        else:
+            for memory in await start_cpu_workers():
+                logger.info(f"CPU worker ready, memory {memory}")
+
+    with startup_state.phase("aws_clients"):
+        from app.core.aws_client import get_client
+        services = []
+        if settings.STORAGE_BACKEND == "s3":
+            services.append("s3")
+        if settings.KEY_ENCRYPTION_BACKEND == "kms":
+            services.append("kms")
+        for service in services:
+            await run_io(get_client, service)
+
+
+async def warm_up():
+    """
+    Background warm-up: bank schemas, the model (in each CPU worker, or in this
+    process when CPU_WORKERS is 0) and the cloud clients the configured
+    backends use. Requests that arrive first load what they need on demand.
+    A failed warm-up is retried with exponential backoff (e.g. KMS or the
+    model volume not reachable yet); the process stays live but not ready.
+    """
+    attempts = max(settings.STARTUP_WARMUP_ATTEMPTS, 1)
+    for attempt in range(1, attempts + 1):
+        try:
+            await _warm_up_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # /health/ready is unauthenticated: only the exception type goes
+            # there, the details stay in the log
+            startup_state.error = f"warm-up failed ({type(e).__name__})"
+            if attempt == attempts:
+                logger.exception(f"Startup warm-up failed (attempt {attempt}/{attempts}); giving up")
+                return
+            delay = settings.STARTUP_WARMUP_RETRY_SECONDS * 2 ** (attempt - 1)
+            logger.exception(f"Startup warm-up failed (attempt {attempt}/{attempts}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        else:
+            startup_state.error = None
+            startup_state.mark_ready()
+            return
@@ -0,0 +1,176 @@
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+from app.core.config import settings
+
+
+class StorageBackend:
+    """
+    Object storage interface used by app.core.local_storage.
+    Keys are "/"-separated strings such as "flagged/<hex>.bin".
+    """
+
+    def put(self, key: str, fileobj):
+        """Store the contents of a readable file object under `key`."""
+        raise NotImplementedError
+
+    def open(self, key: str):
+        """
+        Return a readable file object (read(n) / close()) for `key`.
+        Raises FileNotFoundError if there is no such object.
+        """
+        raise NotImplementedError
+
+    def get(self, key: str) -> bytes:
+        with self.open(key) as fh:
+            return fh.read()
+
+    def delete(self, keys: list[str]):
+        """Delete `keys`; keys that don't exist are ignored."""
+        raise NotImplementedError
+
+    def list(self, prefix: str) -> list[dict]:
+        """List objects under `prefix` as {"Key", "LastModified", "Size"} dicts."""
+        raise NotImplementedError
+
+
+class S3Backend(StorageBackend):
+
+    def __init__(self, bucket: str):
+        self.bucket = bucket
+
+    def _s3(self):
+        from app.core.aws_client import get_client
+        return get_client("s3")
+
+    def put(self, key: str, fileobj):
+        from app.core.aws_client import transfer_config
+        self._s3().upload_fileobj(
+            Fileobj=fileobj,
+            Bucket=self.bucket,
+            Key=key,
+            ExtraArgs={
+                "ServerSideEncryption": "aws:kms",
+                "SSEKMSKeyId": settings.KMS_KEY_ID,
+            },
+            Config=transfer_config(),
+        )
+
+    def open(self, key: str):
+        from botocore.exceptions import ClientError
+        try:
+            return self._s3().get_object(Bucket=self.bucket, Key=key)["Body"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404", "NotFound"):
+                raise FileNotFoundError(f"No such object: {key}") from e
+            raise
+
+    def delete(self, keys: list[str]):
+        self._s3().delete_objects(
+            Bucket=self.bucket,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+        )
+
+    def list(self, prefix: str) -> list[dict]:
+        paginator = self._s3().get_paginator("list_objects_v2")
+        objects = []
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                objects.append({"Key": obj["Key"], "LastModified": obj["LastModified"], "Size": obj["Size"]})
+        return objects
+
+
+class LocalBackend(StorageBackend):
+    """
+    Filesystem storage for on-prem deployments, tests and benchmarks.
+    Objects live at <root>/<aa>/<bb>/<quoted key>, sharded by key hash so no
+    directory grows unbounded. Writes are atomic (temp file + rename) and
+    reads are served from a read-only mmap.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        name = quote(key, safe="")
+        if not key or name in (".", ".."):
+            raise ValueError(f"Invalid storage key: {key!r}")
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.root / digest[:2] / digest[2:4] / name
+
+    def put(self, key: str, fileobj):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = fileobj.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def open(self, key: str):
+        path = self._path(key)
+        if not path.exists():
+            raise FileNotFoundError(f"No such object: {key}")
+        with open(path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return io.BytesIO(b"")
+            # mmap supports read(n)/close() like a file and stays valid after fh closes
+            return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def delete(self, keys: list[str]):
+        for key in keys:
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def list(self, prefix: str) -> list[dict]:
+        objects = []
+        if not self.root.exists():
+            return objects
+        for path in self.root.glob("*/*/*"):
+            if path.name.startswith(".tmp-"):
+                continue
+            key = unquote(path.name)
+            if key.startswith(prefix):
+                stat = path.stat()
+                objects.append({
+                    "Key": key,
+                    "LastModified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+                    "Size": stat.st_size,
+                })
+        return objects
+
+
+_backend = None
+
+
+def get_backend() -> StorageBackend:
+    """
+    The storage backend selected by Settings.STORAGE_BACKEND ("s3" or "local").
+    """
+    global _backend
+    if _backend is None:
+        if settings.STORAGE_BACKEND == "s3":
+            _backend = S3Backend(settings.S3_BUCKET)
+        elif settings.STORAGE_BACKEND == "local":
+            _backend = LocalBackend(settings.LOCAL_STORAGE_ROOT)
+        else:
+            raise ValueError(f"Unknown storage backend: {settings.STORAGE_BACKEND}")
+    return _backend
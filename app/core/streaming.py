@@ -0,0 +1,106 @@
+import hashlib
+import os
+import re
+from pathlib import Path
+
+from starlette.responses import FileResponse
+
+from app.core import envelope
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Content-Encoding values we can produce, in order of preference
+_ENCODINGS = ("zstd", "gzip") if envelope.zstandard is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """
+    Pick a Content-Encoding from an Accept-Encoding header ("zstd", "gzip" or
+    None for identity). Honours q-values, including q=0 exclusions and "*".
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in _ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def encode_stream(chunks, encoding: str | None):
+    """
+    Compress an iterator of byte chunks on the fly for `encoding`
+    (None passes the chunks through unchanged).
+    """
+    if encoding is None:
+        yield from chunks
+        return
+    comp = envelope.compressor(encoding)
+    for chunk in chunks:
+        out = comp.compress(chunk)
+        if out:
+            yield out
+    tail = comp.flush()
+    if tail:
+        yield tail
+
+
+def iter_bytes(data: bytes, chunk_size: int = DOWNLOAD_CHUNK_SIZE):
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start:start + chunk_size])
+
+
+def file_etag(path: str) -> str:
+    """
+    ETag for a download. Content-addressed export artifacts get a strong tag
+    from their content id, so every server gives the same tag; the renderers
+    are deterministic, so a re-render of the same id produces the same bytes.
+    Other files fall back to a weak tag from size and mtime: that doesn't
+    prove two copies are byte-identical, so it must not be used to resume a range.
+    """
+    stem = Path(path).stem
+    if re.fullmatch(r"[0-9a-f]{64}", stem):
+        return f'"{stem}"'
+    stat = os.stat(path)
+    return 'W/"' + hashlib.md5(f"{stat.st_mtime}-{stat.st_size}".encode(), usedforsecurity=False).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    If-None-Match comparison (weak, as RFC 9110 requires for this header).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+class DownloadResponse(FileResponse):
+    """
+    FileResponse that honours If-Range only against a strong ETag (RFC 9110
+    requires the strong comparison there); with a weak tag a conditional
+    range request gets the whole file.
+    """
+
+    def _should_use_range(self, http_if_range: str) -> bool:
+        if http_if_range.strip().startswith("W/") or self.headers.get("etag", "").startswith("W/"):
+            return False
+        return super()._should_use_range(http_if_range)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, Integer
+from sqlalchemy import Column, String, DateTime, Boolean, Integer, Index, func
 import uuid
 from datetime import datetime
 from typing import Optional
@@ -22,11 +22,95 @@ class ExportToken(Base):
     __tablename__ = "export_tokens"
     token = Column(String, primary_key=True, index=True)
     user_id = Column(String, nullable=False) 
-    file_path = Column(String, nullable=True)
+    file_path = Column(String, nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     expires_at = Column(DateTime, nullable=False)
     is_used = Column(Boolean, default=False)
 
+# durable export jobs (processed by the export worker pool)
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, nullable=False)
+    user_email = Column(String, nullable=True)
+    format = Column(String, nullable=False)
+    source_key = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="queued")  # queued | running | done | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    file_path = Column(String, nullable=True)
+    token = Column(String, nullable=True)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    lease_expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # duplicate-request lookup
+        Index("ix_export_jobs_dedupe", "user_id", "source_key", "format", "status"),
+        # at most one queued/running job per (user, source result, format);
+        # coalesce() because NULLs never conflict in a unique index
+        Index(
+            "uq_export_jobs_active", "user_id", func.coalesce(source_key, ""), "format",
+            unique=True,
+            sqlite_where=status.in_(("queued", "running")),
+            postgresql_where=status.in_(("queued", "running")),
+        ),
+        # workers claiming the next runnable job
+        Index("ix_export_jobs_claim", "status", "next_attempt_at"),
+    )
+
+# rendered export files, shared by every token for the same (result, format, renderer)
+class ExportArtifact(Base):
+    __tablename__ = "export_artifacts"
+    id = Column(String, primary_key=True)  # sha256 of source_key|format|renderer_version
+    source_key = Column(String, nullable=True)
+    format = Column(String, nullable=False)
+    renderer_version = Column(String, nullable=False)
+    file_path = Column(String, nullable=False, unique=True)
+    size_bytes = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_export_artifacts_last_used", "last_used_at"),
+    )
+
+# bank column mappings (used when SCHEMA_BACKEND = "db")
+class BankSchemaRecord(Base):
+    __tablename__ = "bank_schemas"
+    bank_name = Column(String, primary_key=True)
+    mapping = Column(String, nullable=False)  # JSON: canonical column -> bank column
+    is_default = Column(Boolean, nullable=False, default=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+# single row (id=1): bumped in the same transaction as every bank_schemas
+# write, so replicas can tell their cached schemas are stale
+class SchemaRevision(Base):
+    __tablename__ = "schema_revision"
+    id = Column(Integer, primary_key=True)
+    revision = Column(Integer, nullable=False, default=0)
+
+# catalog of scored results (filled by write_encrypted_output)
+class ResultCatalog(Base):
+    __tablename__ = "result_catalog"
+    key = Column(String, primary_key=True)
+    user_id = Column(String, nullable=True)
+    bank_name = Column(String, nullable=True)
+    row_count = Column(Integer, nullable=False, default=0)
+    flagged_count = Column(Integer, nullable=False, default=0)
+    anomaly_count = Column(Integer, nullable=False, default=0)
+    model_version = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # "latest result for user" and per-user listing by date
+        Index("ix_result_catalog_user_created", "user_id", "created_at"),
+        # global listing by date
+        Index("ix_result_catalog_created", "created_at"),
+    )
+
 from sqlmodel import SQLModel
 
 class UserBase(SQLModel):
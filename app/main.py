@@ -1,58 +1,99 @@
+import asyncio
+
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from app.routes import auth, report, predict, upload, schema, user_router
+from app.routes import auth, report, predict, upload, schema, user_router, analyze, metrics, results, health
 from app.db.base_class import Base
 from app.db.session import engine, SessionLocal
+from app.core.config import settings
 from app.core.security import get_current_user, hash_password
+from app.core.startup import configure_logging, startup_state, warm_up
 from app.db.models import User
-
-# DB tables
-Base.metadata.create_all(bind=engine)
+from app.services.export_queue import export_workers
+from app.core.executors import shutdown_executors
 
 # Load environment variables from dotenv
 from dotenv import load_dotenv
 load_dotenv()
 
-# Lifespan event handler for startup tasks, in this case user instantiation
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # STARTUP: seed default demo users
+# Startup timings, worker memory and compression stats are logged at INFO
+configure_logging()
+
+# Demo users, created on startup if missing
+DEFAULT_USERS = [
+    {
+        "employee_number": 1001,
+        "name": "Test User",
+        "username": "testuser",
+        "email": "testuser@example.com",
+        "password": "test123",
+        "title": "Tester",
+        "is_admin": False,
+    },
+    {
+        "employee_number": 1002,
+        "name": "Admin User",
+        "username": "admin",
+        "email": "admin@example.com",
+        "password": "admin123",
+        "title": "Administrator",
+        "is_admin": True,
+    },
+]
+
+
+def seed_default_users():
     db = SessionLocal()
-
-    default_users = [
-        {
-            "employee_number": 1001,
-            "name": "Test User",
-            "username": "testuser",
-            "email": "testuser@example.com",
-            "password_hash": hash_password("test123"),
-            "title": "Tester",
-            "is_admin": False,
-        },
-        {
-            "employee_number": 1002,
-            "name": "Admin User",
-            "username": "admin",
-            "email": "admin@example.com",
-            "password_hash": hash_password("admin123"),
-            "title": "Administrator",
-            "is_admin": True,
-        },
-    ]
-
-    for user_data in default_users:
-        existing = db.query(User).filter(User.username == user_data["username"]).first()
-        if not existing:
+    try:
+        usernames = [user["username"] for user in DEFAULT_USERS]
+        existing = {name for (name,) in db.query(User.username).filter(User.username.in_(usernames))}
+        for user_data in DEFAULT_USERS:
+            if user_data["username"] in existing:
+                continue
+            # Argon2 is deliberately slow: only hash for users we actually create
+            user_data = dict(user_data)
+            user_data["password_hash"] = hash_password(user_data.pop("password"))
             db.add(User(**user_data))
+        db.commit()
+    finally:
+        db.close()
 
-    db.commit()
-    db.close()
+
+# Lifespan event handler for startup tasks, in this case user instantiation
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # STARTUP, fast phase: just what serving a request needs.
+    # Heavy modules (model, shap, sklearn, boto3) load lazily or in the warm-up below.
+    startup_state.reset()
+    with startup_state.phase("database"):
+        # DB tables
+        Base.metadata.create_all(bind=engine)
+
+    with startup_state.phase("seed_users"):
+        seed_default_users()
+
+    with startup_state.phase("export_workers"):
+        # Start export job workers (resumes jobs left over from a previous run)
+        export_workers.start()
+
+    # Background phase: /health/ready turns 200 when it completes
+    warm_up_task = None
+    if settings.STARTUP_WARMUP:
+        warm_up_task = asyncio.create_task(warm_up())
+    else:
+        startup_state.mark_ready()
 
     # Hand over control to the application
     yield
 
+    # SHUTDOWN
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    export_workers.stop()
+    shutdown_executors()
+
 
 # Create app with lifespan 
 app = FastAPI(
@@ -76,8 +117,12 @@ app.include_router(report.router)
 app.include_router(auth.router)
 app.include_router(predict.router)
 app.include_router(upload.router)
+app.include_router(analyze.router)
 app.include_router(schema.router)
 app.include_router(user_router.router)
+app.include_router(metrics.router)
+app.include_router(results.router)
+app.include_router(health.router)
 from app.routes import export
 app.include_router(export.router)
 
@@ -0,0 +1,42 @@
+# upload + predict in one call (no intermediate storage round-trip)
+
+from fastapi import APIRouter, UploadFile, File, Depends, Form, HTTPException
+from app.core.security import get_current_user
+from app.core.executors import run_cpu, run_io
+from app.services.model_service import analyze_upload, store_scored
+
+router = APIRouter(prefix="/analyze", tags=["analyze"])
+
+
+@router.post("")
+async def analyze(bank_name: str | None = Form(None), file: UploadFile = File(...), user=Depends(get_current_user)):
+    """
+    Validate, clean and score an upload in memory.
+    Only the encrypted result is persisted; the cleaned upload never touches storage.
+    Without bank_name, the bank is detected from the file header.
+    """
+    content = await file.read()
+
+    try:
+        # Cleaning + scoring run in the CPU worker pool, off the event loop;
+        # the result is stored (and its summary cached) from this process
+        analysis = await run_cpu(
+            analyze_upload, file.filename, content, bank_name, user_id=user.get("sub")
+        )
+        result_key = await run_io(store_scored, analysis["scored"])
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[ERROR] Analyze error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "filename": file.filename,
+        "filesize": f"{len(content) / (1024*1024):.2f} MB",
+        "message": "File analyzed successfully.",
+        "bank_name": analysis["bank_name"],
+        "bank_detection": analysis["bank_detection"],
+        "result_key": result_key,
+        "cleaned_rows": analysis["cleaned_rows"],
+        "log": analysis["log"],
+    }
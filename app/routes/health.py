@@ -0,0 +1,24 @@
+# liveness / readiness probes (no auth, for load balancers and orchestrators)
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core.startup import startup_state
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+def live():
+    """
+    The process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def ready():
+    """
+    Warm-up has finished: the model, workers and clients are loaded.
+    503 until then (or if warm-up failed).
+    """
+    status = startup_state.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
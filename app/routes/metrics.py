@@ -0,0 +1,26 @@
+# runtime metrics (admin only)
+from fastapi import APIRouter, Depends
+from app.core.security import require_admin
+from app.core.aws_client import client_metrics
+from app.core.local_storage import compression_metrics
+from app.core.artifact_cache import result_cache
+from app.core.compute import compute_allocator
+
+router = APIRouter(prefix="/metrics", tags=["metrics"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/storage")
+def storage_metrics():
+    metrics = client_metrics()
+    metrics["compression"] = compression_metrics()
+    return metrics
+
+
+@router.get("/cache")
+def cache_metrics():
+    return result_cache.metrics()
+
+
+@router.get("/compute")
+def compute_metrics():
+    return compute_allocator.metrics()
@@ -1,5 +1,8 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+import itertools
+
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from app.core.security import get_current_user
 from app.schemas.user import PredictRequest
 
@@ -9,8 +12,11 @@ from app.core.local_storage import (
     delete_key,
 )
 
-from app.services.model_service import process_local_and_predict
-from app.services.report_service import convert_csv_to_pdf, get_csv_data_for_key
+from app.services.model_service import score_handoff, store_scored
+from app.services.pdf_service import PDF_COLUMNS
+from app.services.report_service import convert_frame_to_pdf, iter_result_csv, load_result_frame
+from app.core.streaming import encode_stream, iter_bytes, negotiate_encoding
+from app.core.executors import iterate_io, run_cpu, run_io
 
 router = APIRouter(prefix="/predict", tags=["Prediction"])
 
@@ -25,8 +31,12 @@ async def predict(request: PredictRequest, user = Depends(get_current_user)):
     
 
     try:
-        # run model, get encrypted result file key
-        result_key = process_local_and_predict(input_key)
+        # Storage and the result cache are used from this process; only scoring
+        # runs in the CPU worker pool
+        data = await run_io(load_decrypted, input_key)
+        await run_io(delete_key, input_key)
+        scored = await run_cpu(score_handoff, data, user_id=user.get("sub"), bank_name=request.bank_name)
+        result_key = await run_io(store_scored, scored)
     except Exception as e:
         print(f"[ERROR] Prediction error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -34,40 +44,55 @@ async def predict(request: PredictRequest, user = Depends(get_current_user)):
     print(f"[DEBUG] Prediction successful, result key: {result_key}")
     return {"result_key": result_key}
 
+def _stream_download(chunks, media_type: str, filename: str, accept_encoding: str | None, key: str):
+    encoding = negotiate_encoding(accept_encoding)
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Vary": "Accept-Encoding",
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return StreamingResponse(
+        iterate_io(encode_stream(chunks, encoding)),
+        media_type=media_type,
+        headers=headers,
+        # delete encrypted file once it has been sent
+        background=BackgroundTask(run_io, delete_key, key),
+    )
+
 @router.get("/download/csv/{key:path}")
-async def download_result(key: str, user = Depends(get_current_user)):
-    # decrypt results in memory
+async def download_result(key: str, request: Request, user = Depends(get_current_user)):
+    # decrypt and render in chunks while streaming
+    chunks = iter_result_csv(key)
     try:
-        csv_data = get_csv_data_for_key(key)
+        # Pull the first chunk here so a missing/undecryptable result is still a 500
+        first = await run_io(next, chunks, b"")
     except Exception as e:
         print("❌ Decrypt error:", str(e))
         raise HTTPException(status_code=500, detail=f"Decrypt failed: {str(e)}")
 
-    # delete encrypted file after serving
-    delete_key(key)
-
-    return StreamingResponse(
-        iter([csv_data]),
-        media_type="text/csv",
-        headers={
-            "Content-Disposition": "attachment; filename=flagged_results.csv"
-        },
+    return _stream_download(
+        itertools.chain([first], chunks),
+        "text/csv",
+        "flagged_results.csv",
+        request.headers.get("accept-encoding"),
+        key,
     )
 
 @router.get("/download/pdf/{key:path}")
-async def download_pdf(key: str, user=Depends(get_current_user)):
+async def download_pdf(key: str, request: Request, user=Depends(get_current_user)):
     try:
-        csv_data = get_csv_data_for_key(key)
-        pdf_bytes = convert_csv_to_pdf(csv_data)
+        # Decrypt here (through the result cache), lay out in the CPU worker pool
+        df = await run_io(load_result_frame, key, columns=PDF_COLUMNS)
+        pdf_bytes = await run_cpu(convert_frame_to_pdf, df)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    delete_key(key)
-
-    return StreamingResponse(
-        iter([pdf_bytes]),
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": "attachment; filename=fraud_report.pdf"
-        },
-    )
\ No newline at end of file
+    return _stream_download(
+        iter_bytes(pdf_bytes),
+        "application/pdf",
+        "fraud_report.pdf",
+        request.headers.get("accept-encoding"),
+        key,
+    )
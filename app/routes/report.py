@@ -1,6 +1,10 @@
 # report generation + encryption
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
 from app.core.security import get_current_user
+from app.core.result_catalog import list_results
+from app.core.executors import run_io
+from app.db.session import get_db
 from app.services import report_service
 
 router = APIRouter(prefix="/report", tags=["report"])
@@ -14,6 +18,46 @@ def read_csv_report(report_id: int, user = Depends(get_current_user)):
 """
 @router.get("/fraud_breakdown/{key:path}")
 async def fraud_breakdown(key: str, user = Depends(get_current_user)):
-    return service.get_fraud_breakdown(key)
-    
+    return await run_io(service.get_fraud_breakdown, key)
 
+
+@router.get("/summary/{key:path}")
+def result_summary(
+    key: str,
+    sections: list[str] | None = Query(None, description="e.g. counts, by_merchant, review_queue"),
+    user = Depends(get_current_user),
+):
+    """
+    Precomputed summary of a result (counts, score histograms, breakdowns,
+    review queue), optionally only some sections. Served from a small sidecar,
+    independent of the result size.
+    """
+    try:
+        return service.get_result_summary(key, sections)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/results")
+def my_results(
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    user = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    The current user's results, newest first (from the result catalog).
+    """
+    rows = list_results(db, user_id=user.get("sub"), limit=limit, offset=offset)
+    return [
+        {
+            "result_key": row.key,
+            "bank_name": row.bank_name,
+            "row_count": row.row_count,
+            "flagged_count": row.flagged_count,
+            "anomaly_count": row.anomaly_count,
+            "model_version": row.model_version,
+            "created_at": row.created_at,
+        }
+        for row in rows
+    ]
@@ -0,0 +1,43 @@
+# paginated queries over stored results
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.core.security import get_current_user
+from app.services.result_query_service import MAX_PAGE_SIZE, query_result_rows
+
+router = APIRouter(prefix="/results", tags=["results"])
+
+
+@router.get("/{key:path}/rows")
+def result_rows(
+    key: str,
+    is_fraud: bool | None = None,
+    anomaly_flag: bool | None = None,
+    merchant: str | None = Query(None, description="case-insensitive substring"),
+    start: datetime | None = Query(None, description="timestamp >= start"),
+    end: datetime | None = Query(None, description="timestamp < end"),
+    sort: str = Query("-review_priority", description="review_priority or amount, '-' for descending"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    columns: list[str] | None = Query(None),
+    user = Depends(get_current_user),
+):
+    """
+    Filtered, sorted page of a result's rows. Pass `next_cursor` from the
+    previous response as `cursor` to get the next page.
+    """
+    try:
+        return query_result_rows(
+            key,
+            is_fraud=is_fraud,
+            anomaly_flag=anomaly_flag,
+            merchant=merchant,
+            start=start,
+            end=end,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            columns=columns,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -2,10 +2,7 @@
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form
 from app.services import upload_service
-from app.services import preprocess_service
-from app.core.local_storage import store_encrypted
-import pandas as pd
-import io
+from app.core.executors import run_cpu, run_io
 from app.core.security import get_current_user
 
 
@@ -13,54 +10,59 @@ from app.core.security import get_current_user
 router = APIRouter(prefix="/upload", tags=["upload"])
 
 validate = upload_service
-clean = preprocess_service
-
-@router.post("/file/")
-async def upload_file(bank_name: str = Form(...), file: UploadFile = File(...), user=Depends(get_current_user)):
 
+# Only this much of the file is read for a header/sample check
+PREVIEW_BYTES = 64 * 1024
 
-    # Validate file extension
+@router.post("/validate")
+async def validate_upload(bank_name: str | None = Form(None), file: UploadFile = File(...), user=Depends(get_current_user)):
+    """
+    Fast pre-check: reads the header and a small sample only, whatever the file size.
+    Run this before /upload/file/; the full upload only makes sense once it is valid.
+    Without bank_name, the bank is detected from the header.
+    """
     validate.validate_file_extension(file.filename)
+    validate.reject_legacy_excel(file.filename)
 
-    # Read file content
-    content = await file.read()
-
-    # Validate file size
-    validate.validate_file_size(len(content))
-
-     # Reject empty file
-    if len(content) == 0:
+    # Size check before anything is read (the multipart parser has already
+    # spooled the body to a temporary file)
+    size = validate.upload_size(file)
+    validate.validate_file_size(size)
+    if size == 0:
         raise HTTPException(status_code=400, detail="Uploaded file is empty.")
 
-    # Try reading as CSV
-    try:
-        df = pd.read_csv(io.BytesIO(content))
-    except Exception:
-        raise HTTPException(status_code=400, detail="Unable to parse CSV file.")
-    
-    # Validate columns against schema if exists
-    normalized_df = validate.validate_schema_columns(df, bank_name)
+    # .xlsx is a zip archive, so the sheet can't be read from a byte prefix;
+    # the spooled file is handed to the streaming reader, which only parses
+    # the first rows of the sheet
+    excel = file.filename.lower().endswith(".xlsx")
+    if excel:
+        report = await run_io(validate.preview_upload, file.file, bank_name, excel=True)
+    else:
+        head = await file.read(PREVIEW_BYTES)
+        report = await run_io(validate.preview_upload, head, bank_name, truncated=len(head) == PREVIEW_BYTES)
+    report["filename"] = file.filename
+    return report
 
-    #Preprocess / Clean Data
-    cleaned_df, log = clean.preprocess_dataframe(normalized_df)
+@router.post("/file/")
+async def upload_file(bank_name: str | None = Form(None), file: UploadFile = File(...), user=Depends(get_current_user)):
 
-    # Convert cleaned DataFrame to CSV bytes
-    csv_bytes = io.BytesIO()
-    cleaned_df.to_csv(csv_bytes, index=False)
-    csv_bytes.seek(0)
+    # Read file content
+    content = await file.read()
 
-    # Store cleaned file encrypted
-    result_key = store_encrypted(csv_bytes, prefix="incoming")
+    # Detect the bank if needed, validate, apply bank schema and clean in the CPU worker pool;
+    # the handoff is stored from this process
+    upload = await run_cpu(validate.ingest_upload, file.filename, content, bank_name)
+    result_key = await run_io(validate.store_handoff, upload["handoff"])
 
-    
-    
     return {
         "filename": file.filename,
         "filesize": f"{len(content) / (1024*1024):.2f} MB",
         "message": "File uploaded successfully.",
+        "bank_name": upload["bank_name"],
+        "bank_detection": upload["bank_detection"],
         "result_key": result_key,
-        "normalized_columns": list(normalized_df.columns),
-        "cleaned_rows": len(cleaned_df) ,
-        "Cleaned Data Sample": cleaned_df.head(5).to_dict(orient="records"),
-        "log": log
-        }
\ No newline at end of file
+        "normalized_columns": upload["normalized_columns"],
+        "cleaned_rows": upload["cleaned_rows"],
+        "Cleaned Data Sample": upload["sample"],
+        "log": upload["log"]
+        }
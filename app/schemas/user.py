@@ -7,6 +7,7 @@ from datetime import datetime
 class PredictRequest(BaseModel):
     # result_key: str
     input_key: str
+    bank_name: str | None = None
 
 class UserBase(SQLModel):
     name: str
@@ -1,5 +1,4 @@
-import boto3
-from botocore.exceptions import ClientError
+from app.core.aws_client import get_client
 from app.core.config import settings
 import logging
 
@@ -8,6 +7,7 @@ logger = logging.getLogger(__name__)
 def send_export_email(to_email: str, download_link: str, format: str):
     """
     Sends an email with the download link to the user using AWS SES.
+    Raises on failure so the export job can retry.
     """
     subject = f"Your Fraud Analysis {format.upper()} Export is Ready"
     
@@ -46,13 +46,10 @@ def send_export_email(to_email: str, download_link: str, format: str):
         logger.warning(f"AWS Credentials not configured. Mock sending email to {to_email} with link: {download_link}")
         return
 
+    from botocore.exceptions import ClientError
+
     try:
-        client = boto3.client(
-            "ses",
-            region_name=settings.AWS_REGION,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        )
+        client = get_client("ses")
 
         response = client.send_email(
             Destination={
@@ -81,5 +78,7 @@ def send_export_email(to_email: str, download_link: str, format: str):
 
     except ClientError as e:
         logger.error(f"Failed to send email via SES: {e.response['Error']['Message']}")
+        raise
     except Exception as e:
         logger.error(f"Unexpected error sending email: {e}")
+        raise
@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, and_, update
+
+from app.core.config import settings
+from app.db.models import ExportJob
+from app.db.session import SessionLocal
+from app.services.export_service import process_export_job, sweep_export_artifacts
+
+logger = logging.getLogger(__name__)
+
+
+class ExportWorkerPool:
+    """
+    Bounded pool of threads that run export jobs from the export_jobs table.
+    Jobs are claimed with a conditional UPDATE and a lease, so several API
+    processes can run pools against the same database. A job whose lease has
+    expired (its worker died or the server restarted) is picked up again.
+    Failed attempts are retried with exponential backoff up to
+    EXPORT_MAX_ATTEMPTS. Idle workers also sweep export artifacts that no
+    valid token references any more. The threads only coordinate: rendering
+    is handed to the CPU worker pool, so it doesn't compete with requests.
+    """
+
+    def __init__(self, workers: int, poll_seconds: float):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self._threads = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"export-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Export worker pool started with {self.workers} workers")
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        """
+        Wake idle workers (called after a job is queued).
+        """
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job_id = self._claim_next()
+            except Exception as e:
+                logger.error(f"Export worker failed to claim a job: {e}")
+                job_id = None
+
+            if job_id is None:
+                self._maybe_sweep()
+                self._wakeup.wait(self.poll_seconds)
+                self._wakeup.clear()
+                continue
+
+            self._execute(job_id)
+
+    def _maybe_sweep(self):
+        # One sweep per EXPORT_SWEEP_SECONDS per process; other idle workers skip it
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self._last_sweep < settings.EXPORT_SWEEP_SECONDS:
+                return
+            self._last_sweep = time.monotonic()
+            db = SessionLocal()
+            try:
+                sweep_export_artifacts(db)
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Export artifact sweep failed: {e}")
+        finally:
+            self._sweep_lock.release()
+
+    def _claim_next(self) -> str | None:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            runnable = or_(
+                and_(ExportJob.status == "queued", ExportJob.next_attempt_at <= now),
+                and_(ExportJob.status == "running", ExportJob.lease_expires_at < now),
+            )
+            candidates = (
+                db.query(ExportJob.id)
+                .filter(runnable)
+                .order_by(ExportJob.next_attempt_at)
+                .limit(self.workers)
+                .all()
+            )
+            for (job_id,) in candidates:
+                # Only one worker (in any process) wins the conditional update
+                claimed = db.execute(
+                    update(ExportJob)
+                    .where(ExportJob.id == job_id, runnable)
+                    .values(
+                        status="running",
+                        attempts=ExportJob.attempts + 1,
+                        lease_expires_at=now + timedelta(seconds=settings.EXPORT_JOB_LEASE_SECONDS),
+                        updated_at=now,
+                    )
+                )
+                db.commit()
+                if claimed.rowcount == 1:
+                    return job_id
+            return None
+        finally:
+            db.close()
+
+    def _execute(self, job_id: str):
+        db = SessionLocal()
+        try:
+            job = db.get(ExportJob, job_id)
+            try:
+                process_export_job(db, job)
+            except Exception as e:
+                db.rollback()
+                job = db.get(ExportJob, job_id)
+                job.last_error = str(e)[:500]
+                job.lease_expires_at = None
+                if job.attempts >= settings.EXPORT_MAX_ATTEMPTS:
+                    job.status = "failed"
+                    logger.error(f"Export job {job_id} failed after {job.attempts} attempts: {e}")
+                else:
+                    delay = settings.EXPORT_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+                    job.status = "queued"
+                    job.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+                    logger.warning(f"Export job {job_id} attempt {job.attempts} failed, retrying in {delay}s: {e}")
+                db.commit()
+                return
+
+            job.status = "done"
+            job.last_error = None
+            job.lease_expires_at = None
+            db.commit()
+            logger.info(f"Export job {job_id} done")
+        finally:
+            db.close()
+
+
+export_workers = ExportWorkerPool(
+    workers=settings.EXPORT_WORKERS,
+    poll_seconds=settings.EXPORT_POLL_SECONDS,
+)
@@ -1,19 +1,22 @@
 import csv
+import hashlib
+import os
 import secrets
 from datetime import datetime, timedelta
 from pathlib import Path
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.db.models import ExportToken, User
+from app.db.models import ExportToken, ExportJob, ExportArtifact, User
 from app.core.config import settings
+from app.core.executors import call_cpu
 from app.services.email_service import send_export_email
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 import logging
-import boto3
-import io
+from app.core.result_catalog import latest_result_for_user
 import pandas as pd
-from app.core.local_storage import load_decrypted
-from app.services.report_service import convert_csv_to_pdf
+from app.services.report_service import convert_frame_to_pdf, load_result_frame
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 
@@ -22,81 +25,208 @@ logger = logging.getLogger(__name__)
 EXPORT_DIR = Path("storage/exports")
 EXPORT_DIR.mkdir(parents=True, exist_ok=True)
 
-def generate_fraud_report(format: str, user_email: str) -> str:
+def find_latest_result_key(user_id: str) -> str | None:
     """
-    Fetches the latest fraud analysis report from S3 (flagged/ prefix),
-    decrypts it, and saves it locally for export.
-    Returns the absolute path to the generated file.
+    Key of the user's most recent result, from the result catalog.
     """
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"fraud_analysis_{timestamp}.{format}"
-    file_path = EXPORT_DIR / filename
-    
-    # 1. Connect to S3 to find latest file
+    db = SessionLocal()
     try:
-        s3 = boto3.client(
-            "s3",
-            region_name=settings.AWS_REGION,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        )
-        
-        # List objects in 'flagged/'
-        response = s3.list_objects_v2(Bucket=settings.S3_BUCKET, Prefix="flagged/")
-        contents = response.get("Contents", [])
-        
-        # Filter for .bin files (ignore .key) and sort by LastModified descending
-        bin_files = [obj for obj in contents if obj["Key"].endswith(".bin")]
-        bin_files.sort(key=lambda x: x["LastModified"], reverse=True)
-        
-        if not bin_files:
-            logger.warning("No flagged reports found in S3. Using empty data.")
-            df = pd.DataFrame(columns=["Message"])
-            df.loc[0] = ["No fraud analysis reports found in system."]
+        latest = latest_result_for_user(db, user_id)
+        return latest.key if latest else None
+    finally:
+        db.close()
+
+
+# Bump a renderer's version when its output changes, so cached artifacts aren't reused
+RENDERER_VERSIONS = {"csv": "1", "pdf": "4"}
+
+
+def write_export_file(df: pd.DataFrame, format: str, file_path: Path | None = None) -> str:
+    """
+    Render a result DataFrame as CSV or PDF under storage/exports.
+    The file is written to a temp name and renamed, so a reader never sees a
+    partial file. Returns the path to the generated file.
+    """
+    if file_path is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        file_path = EXPORT_DIR / f"fraud_analysis_{timestamp}_{secrets.token_hex(4)}.{format}"
+    tmp_path = file_path.with_name(f".tmp-{secrets.token_hex(4)}-{file_path.name}")
+
+    try:
+        if format.lower() == "csv":
+            df.to_csv(tmp_path, index=False)
+        elif format.lower() == "pdf":
+            pdf_bytes = convert_frame_to_pdf(df)
+            with open(tmp_path, "wb") as f:
+                f.write(pdf_bytes)
         else:
-            latest_key = bin_files[0]["Key"]
-            logger.info(f"Exporting latest report: {latest_key}")
-            
-            # 2. Decrypt the file content
-            csv_bytes = load_decrypted(latest_key)
-            
-            # Read into DataFrame for easy format conversion
-            df = pd.read_csv(io.BytesIO(csv_bytes))
-            
-    except Exception as e:
-        logger.error(f"Failed to fetch data from S3: {e}")
-        # Fallback to error report
-        df = pd.DataFrame(columns=["Error"])
-        df.loc[0] = [f"Could not retrieve report data: {str(e)}"]
-
-    # 3. Save to requested format
-    if format.lower() == "csv":
-        df.to_csv(file_path, index=False)
-    elif format.lower() == "pdf":
-        # Convert DF back to CSV bytes for the PDF converter (reusing existing service)
-        csv_buffer = io.BytesIO()
-        df.to_csv(csv_buffer, index=False)
-        csv_data = csv_buffer.getvalue()
-        
-        pdf_bytes = convert_csv_to_pdf(csv_data)
-        with open(file_path, "wb") as f:
-            f.write(pdf_bytes)
-    else:
-        raise ValueError("Unsupported format")
+            raise ValueError("Unsupported format")
+        os.replace(tmp_path, file_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
 
     return str(file_path)
 
 
-def create_export_token(db: Session, user_id: str) -> str:
+def render_export_file(source_key: str | None, format: str, file_path: Path) -> str:
+    """
+    Load a result and render it to `file_path` (run via call_cpu).
+    """
+    return write_export_file(load_export_frame(source_key), format, file_path)
+
+
+def artifact_id(source_key: str | None, format: str) -> str:
+    """
+    Content address of an export: sha256 of (source result key, format,
+    renderer version, and for PDFs the detail row cap).
+    Result keys are never rewritten, so the same id always means the same file.
+    """
+    key = f"{source_key or ''}|{format}|{RENDERER_VERSIONS[format]}"
+    if format == "pdf":
+        key += f"|rows={settings.PDF_MAX_DETAIL_ROWS}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _touch_artifact(db: Session, aid: str) -> bool:
+    """
+    Bump an artifact's last_used_at. The UPDATE holds the row's write lock
+    until the caller commits, and matches nothing if the sweep already
+    deleted the row.
+    """
+    touched = db.execute(
+        update(ExportArtifact).where(ExportArtifact.id == aid).values(last_used_at=datetime.utcnow())
+    )
+    return touched.rowcount == 1
+
+
+def get_export_artifact(db: Session, source_key: str | None, format: str, commit: bool = True) -> str:
+    """
+    Path to the rendered export of `source_key`, rendering it only if no
+    artifact exists yet. Repeat exports of the same result reuse the file.
+    With commit=False the artifact's last_used_at bump is left uncommitted,
+    so the caller can issue its token in the same transaction and the sweep
+    never sees the artifact unreferenced in between.
+    """
+    format = format.lower()
+    if format not in RENDERER_VERSIONS:
+        raise ValueError("Unsupported format")
+    aid = artifact_id(source_key, format)
+
+    artifact = db.get(ExportArtifact, aid)
+    if artifact is not None and _touch_artifact(db, aid):
+        if os.path.exists(artifact.file_path):
+            if commit:
+                db.commit()
+            logger.info(f"Reusing export artifact {aid[:12]} for {source_key}")
+            return artifact.file_path
+    # Don't hold the write lock while rendering
+    db.commit()
+
+    # Decrypting and rendering run in the CPU worker pool, not next to request handling
+    file_path = call_cpu(render_export_file, source_key, format, EXPORT_DIR / f"{aid}.{format}")
+    size_bytes = os.path.getsize(file_path)
+
+    artifact = db.get(ExportArtifact, aid)
+    if artifact is None:
+        db.add(ExportArtifact(
+            id=aid,
+            source_key=source_key,
+            format=format,
+            renderer_version=RENDERER_VERSIONS[format],
+            file_path=file_path,
+            size_bytes=size_bytes,
+            last_used_at=datetime.utcnow(),
+        ))
+        try:
+            db.flush()
+        except IntegrityError:
+            # Another worker rendered the same artifact concurrently; the file is identical
+            db.rollback()
+            _touch_artifact(db, aid)
+    else:
+        artifact.size_bytes = size_bytes
+        _touch_artifact(db, aid)
+
+    if commit:
+        db.commit()
+    return file_path
+
+
+def artifact_refcount(db: Session, file_path: str) -> int:
+    """
+    Number of unexpired tokens pointing at an export file.
+    """
+    return (
+        db.query(func.count(ExportToken.token))
+        .filter(ExportToken.file_path == file_path, ExportToken.expires_at > datetime.utcnow())
+        .scalar()
+    )
+
+
+def sweep_export_artifacts(db: Session) -> int:
+    """
+    Delete export artifacts that no valid token references and that haven't
+    been used within EXPORT_ARTIFACT_GRACE_SECONDS.
+    Each artifact is re-checked by its DELETE, and its file removed before
+    that commits: a concurrent reuse either bumped last_used_at first (and the
+    artifact stays) or finds the row gone and renders the file again.
+    Returns the number of artifacts removed.
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=settings.EXPORT_ARTIFACT_GRACE_SECONDS)
+    unused = and_(
+        ExportArtifact.last_used_at < cutoff,
+        ~select(ExportToken.token)
+        .where(ExportToken.file_path == ExportArtifact.file_path, ExportToken.expires_at > now)
+        .exists(),
+    )
+    stale = db.query(ExportArtifact.id, ExportArtifact.file_path).filter(unused).all()
+
+    removed = 0
+    for aid, file_path in stale:
+        deleted = db.execute(delete(ExportArtifact).where(ExportArtifact.id == aid, unused))
+        if deleted.rowcount == 1:
+            try:
+                os.unlink(file_path)
+            except FileNotFoundError:
+                pass
+            removed += 1
+        db.commit()
+
+    if removed:
+        logger.info(f"Removed {removed} unreferenced export artifacts")
+    return removed
+
+
+def generate_fraud_report(format: str, user_email: str, user_id: str | None = None) -> str:
+    """
+    Path to an export of the user's latest fraud analysis result (via the
+    result catalog), reusing an already rendered artifact when there is one.
+    """
+    db = SessionLocal()
+    try:
+        latest = latest_result_for_user(db, user_id) if user_id else None
+        if latest:
+            logger.info(f"Exporting latest report: {latest.key}")
+        else:
+            logger.warning("No flagged reports found for user. Using empty data.")
+        return get_export_artifact(db, latest.key if latest else None, format)
+    finally:
+        db.close()
+
+
+def create_export_token(db: Session, user_id: str, file_path: str | None = None) -> str:
     """
     Creates a secure export token and saves it to the database.
     """
     token = secrets.token_urlsafe(32)
-    expires_at = datetime.utcnow() + timedelta(minutes=30)
+    expires_at = datetime.utcnow() + timedelta(minutes=settings.EXPORT_TOKEN_MINUTES)
     
     db_token = ExportToken(
         token=token,
         user_id=user_id,
+        file_path=file_path,
         expires_at=expires_at,
         is_used=False
     )
@@ -106,40 +236,92 @@ def create_export_token(db: Session, user_id: str) -> str:
     
     return token
 
-def process_export_request(user_id: str, user_email: str, format: str):
+# Must match the uq_export_jobs_active index on ExportJob
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+
+def _active_export_job(db: Session, user_id: str, source_key: str | None, format: str) -> ExportJob | None:
+    return (
+        db.query(ExportJob)
+        .filter(
+            ExportJob.user_id == user_id,
+            ExportJob.source_key == source_key,
+            ExportJob.format == format,
+            ExportJob.status.in_(ACTIVE_JOB_STATUSES),
+        )
+        .order_by(ExportJob.created_at.desc())
+        .first()
+    )
+
+
+def enqueue_export(db: Session, user_id: str, user_email: str | None, format: str) -> tuple[ExportJob, bool]:
     """
-    Background task to generate report and send email.
-    Creates its own DB session to avoid threading/locking issues with SQLite.
+    Queue an export of the user's latest result.
+    A queued/running job for the same user, source result and format is
+    reused instead of creating a duplicate. The unique index on active jobs
+    settles concurrent requests: the loser gets the winner's job.
+    Returns (job, coalesced).
     """
-    db = SessionLocal()
+    latest = latest_result_for_user(db, user_id)
+    source_key = latest.key if latest else None
+
+    existing = _active_export_job(db, user_id, source_key, format)
+    if existing:
+        return existing, True
+
+    job = ExportJob(
+        user_id=user_id,
+        user_email=user_email,
+        format=format,
+        source_key=source_key,
+        status="queued",
+    )
+    db.add(job)
     try:
-        # Create token
-        token = create_export_token(db, user_id)
-        
-        # Generator File (Real Data)
-        file_path = generate_fraud_report(format, user_email)
-        
-        # Update token with file path
-        token_record = db.query(ExportToken).filter(ExportToken.token == token).first()
-        if token_record:
-            token_record.file_path = file_path
-            db.commit()
-            
-            # Send Email
-            
-            # User email might be None if not set (but we added it), check logic
-            valid_email = user_email or "tauheed@example.com" # Fallback for demo
-            
-            # Assuming backend URL is configurable or hardcoded for now
-            base_url = "http://localhost:8000" # Should come from config
-            download_link = f"{base_url}/export/download?token={token}"
-            
-            send_export_email(valid_email, download_link, format)
-            
-    except Exception as e:
-        logger.error(f"Error processing export request: {e}")
-    finally:
-        db.close()
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        existing = _active_export_job(db, user_id, source_key, format)
+        if existing is None:
+            # The other job finished in between; nothing to coalesce with any more
+            raise
+        return existing, True
+    db.refresh(job)
+    return job, False
+
+
+def load_export_frame(source_key: str | None) -> pd.DataFrame:
+    """
+    Result DataFrame for an export. Storage errors propagate so the job is retried.
+    """
+    if not source_key:
+        df = pd.DataFrame(columns=["Message"])
+        df.loc[0] = ["No fraud analysis reports found in system."]
+        return df
+    return load_result_frame(source_key)
+
+
+def process_export_job(db: Session, job: ExportJob):
+    """
+    Run one attempt of an export job: render (or reuse) the file and issue a
+    token, then email the link. The token is recorded on the job, so a retry
+    resumes after it (e.g. an email failure does not re-render the report).
+    """
+    if not job.token:
+        # Artifact reuse and the token commit together, so the sweep can't
+        # delete the file between them
+        job.file_path = get_export_artifact(db, job.source_key, job.format, commit=False)
+        job.token = create_export_token(db, job.user_id, job.file_path)
+        db.commit()
+
+    # User email might be None if not set (but we added it), check logic
+    valid_email = job.user_email or "tauheed@example.com" # Fallback for demo
+
+    # Assuming backend URL is configurable or hardcoded for now
+    base_url = "http://localhost:8000" # Should come from config
+    download_link = f"{base_url}/export/download?token={job.token}"
+
+    send_export_email(valid_email, download_link, job.format)
 
 def validate_and_consume_token(token: str, db: Session) -> str:
     """
@@ -0,0 +1,146 @@
+import io
+import json
+import logging
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.services.reader_service import read_canonical_csv
+
+logger = logging.getLogger(__name__)
+
+# Arrow IPC file magic; anything else in an incoming object is a legacy CSV
+ARROW_MAGIC = b"ARROW1"
+
+
+def encode_handoff(df: pd.DataFrame) -> bytes:
+    """
+    Serialize a cleaned DataFrame for the upload -> predict handoff.
+    Uses the uncompressed Arrow IPC file format so the schema (dtypes, datetimes)
+    is kept and the reader can map the buffers without a parse step.
+    """
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        # Mixed-type object columns can't be typed; keep the CSV handoff for those
+        logger.warning(f"Arrow handoff not possible ({e}); storing CSV instead.")
+        buf = io.BytesIO()
+        df.to_csv(buf, index=False)
+        return buf.getvalue()
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_handoff(data: bytes) -> pd.DataFrame:
+    """
+    Load a handoff written by encode_handoff (or a legacy CSV upload).
+    """
+    if not data.startswith(ARROW_MAGIC):
+        return read_canonical_csv(data)
+
+    # py_buffer wraps the bytes without copying; split_blocks avoids the
+    # consolidation copy pandas would otherwise make
+    reader = pa.ipc.open_file(pa.py_buffer(data))
+    return reader.read_all().to_pandas(split_blocks=True)
+
+
+# Results
+# -----------------------------------
+PARQUET_MAGIC = b"PAR1"
+RESULT_INDEX_KEY = b"frauds.index"
+RESULT_ROW_GROUP_SIZE = 1000
+RESULT_SORT_COLUMN = "review_priority"
+
+
+def encode_result(df: pd.DataFrame) -> bytes:
+    """
+    Serialize scored results as zstd-compressed Parquet.
+    Rows are sorted by review_priority (highest first) and split into fixed-size
+    row groups; a small JSON index in the footer records per-group row counts,
+    priority ranges and flag counts so readers can fetch only what they need.
+    """
+    if RESULT_SORT_COLUMN in df.columns:
+        df = df.sort_values(RESULT_SORT_COLUMN, ascending=False).reset_index(drop=True)
+
+    row_groups = []
+    for start in range(0, len(df), RESULT_ROW_GROUP_SIZE):
+        group = df.iloc[start:start + RESULT_ROW_GROUP_SIZE]
+        entry = {"offset": start, "rows": len(group)}
+        if RESULT_SORT_COLUMN in group.columns:
+            entry["max_priority"] = float(group[RESULT_SORT_COLUMN].max())
+            entry["min_priority"] = float(group[RESULT_SORT_COLUMN].min())
+        for col in ("is_fraud", "anomaly_flag"):
+            if col in group.columns:
+                entry[col] = int(group[col].sum())
+        row_groups.append(entry)
+
+    index = {
+        "version": 1,
+        "rows": len(df),
+        "columns": list(df.columns),
+        "sort": f"{RESULT_SORT_COLUMN} desc",
+        "row_groups": row_groups,
+    }
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[RESULT_INDEX_KEY] = json.dumps(index).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression="zstd", row_group_size=RESULT_ROW_GROUP_SIZE)
+    return sink.getvalue().to_pybytes()
+
+
+def _result_index(pf: pq.ParquetFile) -> dict | None:
+    """
+    Footer index written by encode_result, or None for files written without one.
+    """
+    raw = (pf.schema_arrow.metadata or {}).get(RESULT_INDEX_KEY)
+    return json.loads(raw) if raw else None
+
+
+def decode_result(data: bytes, columns: list[str] | None = None, top_n: int | None = None) -> pd.DataFrame:
+    """
+    Load scored results, optionally only some columns and/or the top-N rows by
+    review priority. Legacy CSV results are parsed as before.
+    """
+    if not data.startswith(PARQUET_MAGIC):
+        usecols = None if columns is None else (lambda col: col in columns)
+        return pd.read_csv(io.BytesIO(data), usecols=usecols, nrows=top_n)
+
+    pf = pq.ParquetFile(pa.BufferReader(data))
+    if columns is not None:
+        columns = [col for col in columns if col in pf.schema_arrow.names]
+
+    if top_n is None:
+        table = pf.read(columns=columns)
+    else:
+        # Rows are sorted by priority, so the top-N live in the leading row groups
+        index = _result_index(pf)
+        if index is not None:
+            group_rows = [group["rows"] for group in index["row_groups"]]
+        else:
+            group_rows = [pf.metadata.row_group(i).num_rows for i in range(pf.num_row_groups)]
+        groups, rows = [], 0
+        for i, num_rows in enumerate(group_rows):
+            if rows >= top_n:
+                break
+            groups.append(i)
+            rows += num_rows
+        table = pf.read_row_groups(groups, columns=columns).slice(0, top_n)
+
+    return table.to_pandas()
+
+
+def result_to_csv(df: pd.DataFrame) -> bytes:
+    """
+    Render results as CSV bytes (only needed for user downloads).
+    """
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    return buf.getvalue().encode()
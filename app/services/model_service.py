@@ -1,34 +1,162 @@
 import pandas as pd
 import numpy as np
-import io
-import joblib
-import shap
+import gc
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
 
-from sklearn.ensemble import IsolationForest
 from fastapi import HTTPException
 
-from app.core.local_storage import (
-    load_decrypted,
-    write_encrypted_output,
-    delete_key,
-)
+from app.core.compute import apply_process_limits, cores_per_job, job_cores
+from app.core.config import settings
+
+from app.core.local_storage import write_encrypted_output
+from app.services.reader_service import parse_timestamps
+from app.services.frame_service import decode_handoff, encode_result
+from app.services.summary_service import build_summary, store_summary
+from app.services.upload_service import parse_and_clean_upload, resolve_upload_bank
+
+logger = logging.getLogger(__name__)
 
 # Load model + pipeline
 # -----------------------------------
-pipeline = joblib.load("models/fraud_model.pkl")
-pre = pipeline.named_steps["preprocess"]
-model = pipeline.named_steps["model"]
+MODEL_PATH = settings.MODEL_PATH
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def load_model():
+    """
+    The fraud pipeline, loaded on first use rather than at import: unpickling
+    it pulls in sklearn, which (with shap) is most of the app's import time.
+    The startup warm-up and the CPU workers call this ahead of the first request.
+    Returns (pipeline, preprocess step, model step, model version).
+    """
+    global _model
+    if _model is not None:
+        return _model
+    with _model_lock:
+        if _model is None:
+            import joblib
+            from app.core.startup import resident_memory
+
+            start = time.perf_counter()
+            # Memory-maps the arrays joblib stored raw (needs an uncompressed file).
+            # sklearn copies tree nodes into its own buffers, so those are only
+            # shared between workers through MODEL_PRELOAD + forkserver.
+            pipeline = joblib.load(MODEL_PATH, mmap_mode=settings.MODEL_MMAP_MODE or None)
+            # The pickled forest asks for n_jobs=-1 (every core). None defers to
+            # joblib.parallel_config, which each job sets on its own thread;
+            # the shared estimator is never changed per job.
+            pipeline.named_steps["model"].set_params(n_jobs=None)
+            # Short content hash of the model file, recorded with every result
+            with open(MODEL_PATH, "rb") as fh:
+                model_version = hashlib.sha256(fh.read()).hexdigest()[:12]
+            _model = (
+                pipeline,
+                pipeline.named_steps["preprocess"],
+                pipeline.named_steps["model"],
+                model_version,
+            )
+            logger.info(
+                f"Loaded model {MODEL_PATH} ({model_version}, mmap_mode={settings.MODEL_MMAP_MODE or None}) "
+                f"in {time.perf_counter() - start:.2f}s, memory {resident_memory()}"
+            )
+        return _model
 
 
-def process_local_and_predict(input_key: str):
-    # Load + decrypt CSV
-    data = load_decrypted(input_key)
-    delete_key(input_key)
+def save_model(pipeline, path: str = MODEL_PATH):
+    """
+    Write a trained pipeline in the layout load_model can memory-map:
+    uncompressed joblib (numpy arrays stored raw, page aligned), replaced
+    atomically so running workers never load a half-written file.
+    """
+    import joblib
 
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".model.")
+    os.close(fd)
+    try:
+        joblib.dump(pipeline, tmp_path, compress=0)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def warm_up():
+    """
+    Load the model and the scoring-only imports ahead of the first request,
+    then cap this process's native thread pools (once everything they
+    apply to is loaded).
+    """
+    import shap  # noqa: F401
+    load_model()
+    apply_process_limits(cores_per_job())
+
+
+def score_handoff(data: bytes, user_id: str | None = None, bank_name: str | None = None) -> dict:
+    """
+    Score a cleaned upload handoff (Arrow, or CSV for older uploads) that the
+    API process has loaded and decrypted. See score_dataframe.
+    """
     try:
-        df = pd.read_csv(io.BytesIO(data))
+        df = decode_handoff(data)
     except Exception:
-        raise HTTPException(status_code=400, detail="Could not read CSV.")
+        raise HTTPException(status_code=400, detail="Could not read uploaded data.")
+
+    return score_dataframe(df, user_id=user_id, bank_name=bank_name)
+
+
+def analyze_upload(filename: str, content: bytes, bank_name: str | None = None, user_id: str | None = None) -> dict:
+    """
+    Clean and score an upload in one go (the /analyze pipeline).
+    Without bank_name, the bank is detected from the header first.
+    Runs in the CPU worker pool, so it returns plain data rather than the
+    DataFrame; "scored" is stored by store_scored in the API process.
+    """
+    bank_name, detection = resolve_upload_bank(filename, content, bank_name)
+    _, cleaned_df, log = parse_and_clean_upload(filename, content, bank_name)
+    return {
+        "bank_name": bank_name,
+        "bank_detection": detection,
+        "scored": score_dataframe(cleaned_df, user_id=user_id, bank_name=bank_name),
+        "cleaned_rows": len(cleaned_df),
+        "log": log,
+    }
+
+
+def store_scored(scored: dict) -> str:
+    """
+    Store a score_dataframe result encrypted, with its summary sidecar.
+    Runs in the API process, so the summary lands in the cache that serves
+    the dashboard. Returns the result key.
+    """
+    result_key = write_encrypted_output(scored["result"], prefix="flagged", catalog=scored["catalog"])
+    store_summary(result_key, scored["summary"])
+    return result_key
+
+
+def score_dataframe(df: pd.DataFrame, user_id: str | None = None, bank_name: str | None = None) -> dict:
+    """
+    Score a cleaned DataFrame. CPU only, so it can run in a worker process:
+    returns the encoded result, its dashboard summary and catalog entry for
+    store_scored.
+    """
+    from joblib import parallel_config
+    from sklearn.ensemble import IsolationForest
+    import shap
+
+    pipeline, pre, model, model_version = load_model()
+    # No-op once warm_up has run
+    apply_process_limits(cores_per_job())
+    # This job's core budget, passed to the estimators through parallel_config
+    n_jobs = job_cores()
 
     # Basic validation
     needed = {"timestamp", "merchant", "mcc", "amount", "channel", "city", "country"}
@@ -36,7 +164,8 @@ def process_local_and_predict(input_key: str):
     if missing:
         raise HTTPException(status_code=400, detail=f"Missing columns: {sorted(missing)}")
 
-    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    # assign() keeps the caller's frame untouched
+    df = df.assign(timestamp=parse_timestamps(df["timestamp"], cache_key="canonical"))
     df = df.dropna(subset=["timestamp"]).sort_values("timestamp").reset_index(drop=True)
 
     # Feature Engineering (per uploaded account)
@@ -125,7 +254,8 @@ def process_local_and_predict(input_key: str):
 
     # Fraud prediction
     # =========================
-    probs = pipeline.predict_proba(X_raw)[:, 1]
+    with parallel_config(n_jobs=n_jobs):
+        probs = pipeline.predict_proba(X_raw)[:, 1]
     THRESHOLD = 0.65
     preds = (probs >= THRESHOLD).astype(int)
 
@@ -137,11 +267,11 @@ def process_local_and_predict(input_key: str):
     iso = IsolationForest(
         n_estimators=300,
         contamination=0.02,
-        random_state=42
+        random_state=42,
     )
-    iso.fit(X_transformed)
-
-    normality = iso.score_samples(X_transformed)        # higher = more normal
+    with parallel_config(n_jobs=n_jobs):
+        iso.fit(X_transformed)
+        normality = iso.score_samples(X_transformed)    # higher = more normal
     df["anomaly_score"] = (-normality).astype(float)    # higher = more anomalous
 
     pct = 0.98
@@ -286,8 +416,26 @@ def process_local_and_predict(input_key: str):
     # Sort output for review (highest priority first)
     df = df.sort_values("review_priority", ascending=False).reset_index(drop=True)
 
-    # Encrypt + return
-    buf = io.StringIO()
-    df.to_csv(buf, index=False)
+    # Columnar, sorted by review_priority, with footer index
+    catalog = {
+        "user_id": user_id,
+        "bank_name": bank_name,
+        "row_count": len(df),
+        "flagged_count": int(df["is_fraud"].sum()),
+        "anomaly_count": int(df["anomaly_flag"].sum()),
+        "model_version": model_version,
+    }
+    return {
+        "result": encode_result(df),
+        # Small sidecar so dashboard endpoints don't load the full result
+        "summary": build_summary(df),
+        "catalog": catalog,
+    }
+
 
-    return write_encrypted_output(buf.getvalue().encode(), prefix="flagged")
\ No newline at end of file
+if settings.MODEL_PRELOAD:
+    # Load before the server / CPU pool forks, then move everything allocated
+    # so far out of the garbage collector's reach: collections would otherwise
+    # write to every object header and un-share the pages in each child.
+    warm_up()
+    gc.freeze()
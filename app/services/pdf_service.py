@@ -0,0 +1,230 @@
+import io
+import re
+from collections import Counter
+from xml.sax.saxutils import escape
+
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Frame, Paragraph, Spacer, Table, TableStyle
+from reportlab.platypus.doctemplate import LayoutError
+
+PDF_COLUMNS = ["timestamp", "amount", "reasoning"]
+
+# Rows per Table flowable: roughly a page, so only one chunk is laid out at a time
+TABLE_CHUNK_ROWS = 40
+
+COL_WIDTHS = [100, 60, 340]
+FONT = "Helvetica"
+FONT_SIZE = 9
+CELL_PADDING = 6
+MARGIN = 72
+
+TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+    ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ("FONTSIZE", (0, 0), (-1, -1), FONT_SIZE),
+    ("LEADING", (0, 0), (-1, -1), 11),
+    ("LEFTPADDING", (0, 0), (-1, -1), CELL_PADDING),
+    ("RIGHTPADDING", (0, 0), (-1, -1), CELL_PADDING),
+    ("TOPPADDING", (0, 0), (-1, -1), CELL_PADDING),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), CELL_PADDING),
+])
+
+# Key/value tables on the summary page (no header row)
+SUMMARY_STYLE = TableStyle([
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+    ("FONTSIZE", (0, 0), (-1, -1), FONT_SIZE),
+    ("LEFTPADDING", (0, 0), (-1, -1), CELL_PADDING),
+    ("RIGHTPADDING", (0, 0), (-1, -1), CELL_PADDING),
+])
+
+_styles = getSampleStyleSheet()
+# Only used for text with unbreakable runs wider than the column
+_wrap_style = ParagraphStyle(
+    "ReasoningStyle",
+    parent=_styles["Normal"],
+    fontSize=FONT_SIZE,
+    leading=11,
+    wordWrap="CJK",
+)
+
+# "reason; reason (confidence=0.93)" -> ["reason", "reason"]
+_SCORE_SUFFIX = re.compile(r"\s*\([a-z_]+=[\d.]+\)\s*$")
+
+
+def _cell(value) -> str:
+    return "" if value is None or (not isinstance(value, str) and pd.isna(value)) else str(value)
+
+
+def _wrap(text: str, width: float):
+    """
+    Table cell for `text`: the plain string when it fits, the string broken into
+    lines when it fits once wrapped at spaces, and a Paragraph only as a last resort.
+    """
+    if stringWidth(text, FONT, FONT_SIZE) <= width:
+        return text
+    lines = simpleSplit(text, FONT, FONT_SIZE, width)
+    if all(stringWidth(line, FONT, FONT_SIZE) <= width for line in lines):
+        return "\n".join(lines)
+    return Paragraph(escape(text), _wrap_style)
+
+
+def _iter_rows(data):
+    """
+    (timestamp, amount, reasoning) tuples from a DataFrame or a mapping of
+    column name -> iterable (e.g. columns read one at a time from Parquet).
+    """
+    if isinstance(data, pd.DataFrame):
+        if not set(PDF_COLUMNS).issubset(data.columns):
+            raise ValueError("Required columns missing from CSV")
+        return zip(*(data[col].tolist() for col in PDF_COLUMNS))
+    missing = [col for col in PDF_COLUMNS if col not in data]
+    if missing:
+        raise ValueError("Required columns missing from CSV")
+    return zip(*(iter(data[col]) for col in PDF_COLUMNS))
+
+
+class _PageWriter:
+    """
+    Draws flowables onto consecutive pages as they arrive, so the document is
+    never held as one flowable list.
+    """
+
+    def __init__(self, buffer):
+        # invariant: no creation date or random document id, so the same data
+        # always renders to the same bytes (export artifacts get strong ETags)
+        self.canvas = canvas.Canvas(buffer, pagesize=letter, invariant=1)
+        self.width, self.height = letter
+        self.page = 0
+        self._new_frame()
+
+    def _new_frame(self):
+        if self.page:
+            self._footer()
+            self.canvas.showPage()
+        self.page += 1
+        self.frame = Frame(MARGIN, MARGIN, self.width - 2 * MARGIN, self.height - 2 * MARGIN,
+                           leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
+
+    def _footer(self):
+        self.canvas.setFont(FONT, 8)
+        self.canvas.drawRightString(self.width - MARGIN, MARGIN / 2, f"Page {self.page}")
+
+    def add(self, flowable):
+        pending = [flowable]
+        while pending:
+            flowable = pending.pop(0)
+            if self.frame.add(flowable, self.canvas):
+                continue
+            # Draw what fits on this page (tables split between rows), the rest goes on the next
+            parts = self.frame.split(flowable, self.canvas)
+            if len(parts) > 1 and self.frame.add(parts[0], self.canvas):
+                pending[0:0] = parts[1:]
+            elif self.frame._atTop:
+                raise LayoutError(f"{flowable.__class__.__name__} does not fit on a page")
+            else:
+                pending.insert(0, flowable)
+            self._new_frame()
+
+    def page_break(self):
+        self._new_frame()
+
+    def finish(self):
+        self._footer()
+        self.canvas.save()
+
+
+def render_flagged_pdf(data, max_rows: int | None = None, summary: bool = True) -> bytes:
+    """
+    Render flagged rows (non-empty reasoning) as a PDF report.
+
+    `data` is a DataFrame or a mapping of column name -> iterable with the
+    PDF_COLUMNS. Rows are laid out in page-sized table chunks and drawn as they
+    are produced, so memory stays bounded by a page rather than the result.
+    With `max_rows`, only the first `max_rows` flagged rows are listed in
+    detail (results are stored highest review priority first). With `summary`,
+    closing pages list totals and the most common reasons.
+    """
+    buffer = io.BytesIO()
+    writer = _PageWriter(buffer)
+    writer.add(Paragraph("<b>Fraud Analysis Summary</b>", _styles["Title"]))
+    if max_rows is not None:
+        writer.add(Paragraph(
+            f"Detail is limited to the {max_rows:,} highest-priority flagged rows.",
+            _styles["Italic"],
+        ))
+        writer.add(Spacer(1, 6))
+
+    header = list(PDF_COLUMNS)
+    text_width = COL_WIDTHS[2] - 2 * CELL_PADDING
+
+    total_rows = flagged = 0
+    flagged_amount = 0.0
+    reasons = Counter()
+    chunk = [header]
+
+    for timestamp, amount, reasoning in _iter_rows(data):
+        total_rows += 1
+        reasoning = _cell(reasoning).strip()
+        if not reasoning:
+            continue
+        flagged += 1
+
+        if summary:
+            try:
+                flagged_amount += float(amount)
+            except (TypeError, ValueError):
+                pass
+            for reason in _SCORE_SUFFIX.sub("", reasoning).split(";"):
+                if reason.strip():
+                    reasons[reason.strip()] += 1
+
+        if max_rows is not None and flagged > max_rows:
+            continue
+        chunk.append([_cell(timestamp), _cell(amount), _wrap(reasoning, text_width)])
+        if len(chunk) > TABLE_CHUNK_ROWS:
+            writer.add(Table(chunk, colWidths=COL_WIDTHS, repeatRows=1, style=TABLE_STYLE))
+            chunk = [header]
+
+    if flagged == 0:
+        chunk.append(["—", "No flagged results found"])
+    if len(chunk) > 1:
+        writer.add(Table(chunk, colWidths=COL_WIDTHS, repeatRows=1, style=TABLE_STYLE))
+
+    shown = flagged if max_rows is None else min(flagged, max_rows)
+    if shown < flagged:
+        writer.add(Spacer(1, 12))
+        writer.add(Paragraph(
+            f"<b>Truncated:</b> showing the {shown:,} highest-priority flagged rows of {flagged:,}; "
+            f"{flagged - shown:,} more are not listed. Download the CSV export for the full list.",
+            _styles["Normal"],
+        ))
+
+    if summary and flagged:
+        writer.page_break()
+        writer.add(Paragraph("<b>Summary</b>", _styles["Heading2"]))
+        writer.add(Table(
+            [
+                ["Rows analysed", f"{total_rows:,}"],
+                ["Flagged rows", f"{flagged:,}"],
+                ["Rows listed in detail", f"{shown:,}" + (" (truncated)" if shown < flagged else "")],
+                ["Flagged amount", f"{flagged_amount:,.2f}"],
+            ],
+            colWidths=[200, 300],
+            style=SUMMARY_STYLE,
+        ))
+        writer.add(Spacer(1, 12))
+        writer.add(Paragraph("<b>Most common reasons</b>", _styles["Heading3"]))
+        rows = [["reason", "rows"]] + [[_wrap(reason, 400 - 2 * CELL_PADDING), f"{count:,}"]
+                                       for reason, count in reasons.most_common(25)]
+        writer.add(Table(rows, colWidths=[400, 100], repeatRows=1, style=TABLE_STYLE))
+
+    writer.finish()
+    return buffer.getvalue()
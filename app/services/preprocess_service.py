@@ -2,8 +2,10 @@ import pandas as pd
 import numpy as np
 import re    
 
+from app.services.reader_service import parse_timestamps
+
 # Helper functions for cleaning specific column types
-def preprocess_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+def preprocess_dataframe(df: pd.DataFrame, timestamp_key: str = "default") -> pd.DataFrame:
    
    # Make a copy to avoid modifying original DataFrame
     df = df.copy()
@@ -53,7 +55,7 @@ def preprocess_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     # Convert timestamps
     if "timestamp" in df.columns:
         invalid_before = df["timestamp"].isna().sum()
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+        df["timestamp"] = parse_timestamps(df["timestamp"], cache_key=timestamp_key)
         invalid_after = df["timestamp"].isna().sum()
         log.append(
             f"Processed 'timestamp' column: {invalid_after - invalid_before} invalid timestamps converted to NaT."
@@ -0,0 +1,198 @@
+import io
+import importlib.util
+import logging
+
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+logger = logging.getLogger(__name__)
+
+# Multithreaded pyarrow CSV engine when installed, otherwise pandas' C engine
+CSV_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+
+# Declared dtypes for the canonical columns. These match what pandas would infer
+# for a well-formed file once preprocess_dataframe has run (ints become floats),
+# so the typed read does not change downstream behaviour.
+# "timestamp" is parsed afterwards with parse_timestamps(); the pyarrow engine
+# may already hand back Timestamp objects for it, which parse the same way.
+CANONICAL_DTYPES = {
+    "timestamp": object,
+    "merchant": object,
+    "amount": "float64",
+    "mcc": "float64",
+    "city": object,
+    "country": object,
+    "channel": object,
+}
+
+# Cached timestamp formats, keyed by bank (or any caller supplied key)
+_timestamp_formats: dict[str, str] = {}
+
+
+def _as_source(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def read_csv_header(source) -> list[str]:
+    """
+    Read only the header row of a CSV file.
+    """
+    header = pd.read_csv(_as_source(source), nrows=0)
+    return list(header.columns)
+
+
+def read_csv_sample(head: bytes, nrows: int = 20, truncated: bool = True) -> pd.DataFrame:
+    """
+    Parse the first `nrows` rows from the leading bytes of a CSV file.
+    If `head` was cut off by a byte limit, the trailing partial line is dropped.
+    """
+    if truncated and b"\n" in head:
+        head = head[: head.rfind(b"\n") + 1]
+    return pd.read_csv(io.BytesIO(head), nrows=nrows)
+
+
+def read_typed_csv(source, usecols: list[str], dtypes: dict) -> pd.DataFrame:
+    """
+    Read only `usecols` with declared dtypes using the fastest available engine.
+    Falls back to dtype inference when a column does not fit its declared type
+    (e.g. amounts with currency symbols), which preprocess_dataframe cleans up.
+    """
+    try:
+        return pd.read_csv(_as_source(source), usecols=usecols, dtype=dtypes, engine=CSV_ENGINE)
+    except (ValueError, TypeError) as e:
+        logger.info(f"Typed CSV read failed ({e}); falling back to dtype inference.")
+        return pd.read_csv(_as_source(source), usecols=usecols, engine=CSV_ENGINE)
+
+
+def read_bank_csv(source, mapping: dict) -> pd.DataFrame:
+    """
+    Read a bank CSV using its schema mapping (canonical column -> bank column).
+    Only the mapped columns are parsed and the result uses canonical column names.
+    """
+    dtypes = {
+        bank_col: CANONICAL_DTYPES[canonical]
+        for canonical, bank_col in mapping.items()
+        if canonical in CANONICAL_DTYPES
+    }
+    df = read_typed_csv(source, list(mapping.values()), dtypes)
+    return df.rename(columns={bank_col: canonical for canonical, bank_col in mapping.items()})
+
+
+def read_canonical_csv(source) -> pd.DataFrame:
+    """
+    Read a cleaned CSV that already uses the canonical column names.
+    """
+    columns = read_csv_header(source)
+    dtypes = {col: CANONICAL_DTYPES[col] for col in columns if col in CANONICAL_DTYPES}
+    return read_typed_csv(source, columns, dtypes)
+
+
+def _fill_unparsed(series: pd.Series, parsed: pd.Series) -> pd.Series:
+    """
+    Values the format didn't match (mixed formats in one file) are inferred
+    one by one, so they aren't silently lost as NaT.
+    """
+    failed = parsed.isna() & series.notna()
+    if failed.any():
+        parsed = parsed.copy()
+        parsed[failed] = pd.to_datetime(series[failed], format="mixed", errors="coerce")
+    return parsed
+
+
+def parse_timestamps(series: pd.Series, cache_key: str | None = "default") -> pd.Series:
+    """
+    Parse a timestamp column with a format guessed once and cached per `cache_key`
+    (cache_key=None: guess without reading or updating the cache).
+    The cached format is kept while it matches most values; values it doesn't
+    match are inferred individually, and once it matches fewer than half the
+    values it is guessed again. Invalid values become NaT, same as
+    pd.to_datetime(errors="coerce").
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        # The pyarrow engine infers second resolution; keep the C engine's ns
+        return series.dt.as_unit("ns")
+
+    present = int(series.notna().sum())
+    if present == 0:
+        return pd.to_datetime(series, errors="coerce")
+
+    fmt = _timestamp_formats.get(cache_key) if cache_key is not None else None
+    if fmt is not None:
+        parsed = pd.to_datetime(series, format=fmt, errors="coerce")
+        if 2 * int(parsed.notna().sum()) >= present:
+            return _fill_unparsed(series, parsed)
+        logger.info(f"Cached timestamp format {fmt!r} for {cache_key} no longer matches; guessing again.")
+
+    sample = series.dropna()
+    fmt = guess_datetime_format(str(sample.iloc[0]))
+    if fmt is None:
+        return pd.to_datetime(series, format="mixed", errors="coerce")
+
+    parsed = pd.to_datetime(series, format=fmt, errors="coerce")
+    # Only cache a format that fits most of the column
+    if cache_key is not None and 2 * int(parsed.notna().sum()) >= present:
+        _timestamp_formats[cache_key] = fmt
+    return _fill_unparsed(series, parsed)
+
+
+# Excel
+# -----------------------------------
+EXCEL_CHUNK_ROWS = 5000
+
+
+def _open_sheet(source):
+    from openpyxl import load_workbook
+
+    # read_only streams rows from the sheet XML instead of building every cell
+    wb = load_workbook(_as_source(source), read_only=True, data_only=True)
+    return wb, wb.active
+
+
+def read_excel_sample(source, nrows: int = 20) -> pd.DataFrame:
+    """
+    Read the header and first `nrows` rows of the first sheet of an .xlsx workbook.
+    """
+    wb, ws = _open_sheet(source)
+    try:
+        rows = ws.iter_rows(max_row=nrows + 1, values_only=True)
+        header = [str(col).strip() if col is not None else "" for col in next(rows, ())]
+        return pd.DataFrame([list(row[:len(header)]) for row in rows], columns=header)
+    finally:
+        wb.close()
+
+
+def iter_bank_excel(source, resolve_mapping, chunk_rows: int = EXCEL_CHUNK_ROWS):
+    """
+    Stream an .xlsx workbook as DataFrames of at most `chunk_rows` rows.
+    `resolve_mapping(header)` is called with the header row before any data is
+    read and returns the schema mapping (or raises if the header is wrong).
+    Only the mapped columns are kept and they are renamed to canonical names;
+    the reader holds one chunk at a time, whatever the workbook size.
+    """
+    wb, ws = _open_sheet(source)
+    try:
+        rows = ws.iter_rows(values_only=True)
+        header = [str(col).strip() if col is not None else "" for col in next(rows, ())]
+        mapping = resolve_mapping(header)
+
+        positions = [header.index(bank_col) for bank_col in mapping.values()]
+        canonical = list(mapping.keys())
+
+        chunk = []
+        for row in rows:
+            if row is None or all(value is None for value in row):
+                continue
+            chunk.append([row[i] if i < len(row) else None for i in positions])
+            if len(chunk) >= chunk_rows:
+                yield pd.DataFrame(chunk, columns=canonical)
+                chunk = []
+
+        if chunk:
+            yield pd.DataFrame(chunk, columns=canonical)
+    finally:
+        wb.close()
+
@@ -1,105 +1,85 @@
 import io
-import csv
 import pandas as pd
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 
-from app.core.local_storage import load_decrypted
+from app.core.config import settings
+from app.core.local_storage import iter_decrypted, load_decrypted
+from app.core.artifact_cache import result_cache
+from app.services.frame_service import PARQUET_MAGIC, decode_result, result_to_csv
+from app.services.pdf_service import PDF_COLUMNS, render_flagged_pdf
+from app.services.summary_service import SUMMARY_SECTIONS, load_summary
+
+CSV_CHUNK_ROWS = 5000
+
+def load_result_frame(key: str, columns: list[str] | None = None, top_n: int | None = None) -> pd.DataFrame:
+    """
+    Decrypt a stored result and load only the requested columns / top-N rows.
+    Parsed frames are cached in memory per key; treat the result as read-only.
+    """
+    variant = (tuple(columns) if columns is not None else None, top_n)
+    # A cached full frame can serve any projection
+    cached_variant, df = result_cache.get_first(key, [variant, (None, None)])
+    if df is not None and cached_variant != variant:
+        df = df if columns is None else df[[col for col in columns if col in df.columns]]
+        return df if top_n is None else df.head(top_n)
+    if df is None:
+        df = decode_result(load_decrypted(key), columns=columns, top_n=top_n)
+        result_cache.put(key, df, int(df.memory_usage(deep=True).sum()), variant)
+    return df
 
 def get_fraud_breakdown(key:str):
-    csv_bytes = load_decrypted(key)
-    df = pd.read_csv(io.BytesIO(csv_bytes))  
-    fraud_counts = df["is_fraud"].value_counts()
+    # From the precomputed summary, not the full result
+    counts = load_summary(key)["counts"]
     data_for_js = [
-    {"label": "Not Fraud", "value": int(fraud_counts.get(0, 0))},
-    {"label": "Fraud", "value": int(fraud_counts.get(1, 0))}
+    {"label": "Not Fraud", "value": counts["rows"] - counts["fraud"]},
+    {"label": "Fraud", "value": counts["fraud"]}
     ]
     return data_for_js
 
+def get_result_summary(key: str, sections: list[str] | None = None) -> dict:
+    summary = load_summary(key)
+    if not sections:
+        return summary
+    unknown = [section for section in sections if section not in SUMMARY_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown summary sections: {', '.join(unknown)}")
+    return {section: summary[section] for section in sections}
+
 def get_csv_data_for_key(key: str) -> bytes:
     print("🔍 Downloading key:", key)
-    data = load_decrypted(key)
-    return data
+    # CSV is only rendered here, when the user asks for a download
+    return result_to_csv(load_result_frame(key))
+
+def iter_result_csv(key: str, chunk_rows: int = CSV_CHUNK_ROWS):
+    """
+    Yield a result as CSV in chunks of `chunk_rows` rows, so a download can
+    start before the whole file is rendered. Legacy CSV results are passed
+    through from the decryptor as they are decrypted.
+    """
+    df = result_cache.get(key, (None, None))
+    if df is None:
+        chunks = iter_decrypted(key)
+        first = next(chunks, b"")
+        if not first.startswith(PARQUET_MAGIC):
+            yield first
+            yield from chunks
+            return
+        # Parquet needs its footer, so the (compact) result is decrypted first
+        df = decode_result(first + b"".join(chunks))
+
+    yield df.head(0).to_csv(index=False).encode()
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=False).encode()
+
+def get_pdf_for_key(key: str) -> bytes:
+    return convert_frame_to_pdf(load_result_frame(key, columns=PDF_COLUMNS))
+
+def convert_frame_to_pdf(df: pd.DataFrame) -> bytes:
+    max_rows = settings.PDF_MAX_DETAIL_ROWS or None
+    return render_flagged_pdf(df, max_rows=max_rows)
 
 def convert_csv_to_pdf(csv_bytes: bytes) -> bytes:
-    csv_text = csv_bytes.decode("utf-8")
-    reader = csv.reader(csv_text.splitlines())
-    rows = list(reader)
-
-    styles = getSampleStyleSheet()
-
-    reasoning_style = ParagraphStyle(
-        "ReasoningStyle",
-        parent=styles["Normal"],
-        fontSize=9,
-        leading=11,        # line spacing
-        wordWrap="CJK",    # forces wrapping even for long strings
-    )
-
-    if not rows:
+    if not csv_bytes.strip():
         raise ValueError("CSV is empty")
-
-    header = rows[0]
-
-    # Find column indexes safely
-    try:
-        timeDate_idx = header.index("timestamp")
-        amount_idx = header.index("amount")
-        reasoning_idx = header.index("reasoning")
-    except ValueError as e:
-        raise ValueError("Required columns missing from CSV") from e
-
-    # Build filtered table data
-    table_data = [["timestamp","amount","reasoning"]]
-
-    for row in rows[1:]:
-        reasoning_value = row[reasoning_idx].strip() if len(row) > reasoning_idx else ""
-
-        if reasoning_value:  # non-null / non-empty
-            table_data.append([
-                row[timeDate_idx],
-                row[amount_idx],
-                Paragraph(reasoning_value, reasoning_style),
-            ])
-
-    # Handle case: nothing to show
-    if len(table_data) == 1:
-        table_data.append(["—", "No flagged results found"])
-
-    # PDF generation
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-
-    elements = []
-
-    # Optional title
-    elements.append(Paragraph("<b>Fraud Analysis Summary</b>", styles["Title"]))
-
-    table = Table(
-        table_data,
-        colWidths=[100, 60, 340],  
-        repeatRows=1,
-    )
-
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        ("FONTSIZE", (0, 0), (-1, -1), 9),
-        ("LEFTPADDING", (0, 0), (-1, -1), 6),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-        ("TOPPADDING", (0, 0), (-1, -1), 6),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-    ]))
-
-    elements.append(table)
-
-    doc.build(elements)
-
-    buffer.seek(0)
-    return buffer.read()
-
+    # Only the report columns are parsed, as text
+    df = pd.read_csv(io.BytesIO(csv_bytes), usecols=lambda col: col in PDF_COLUMNS, dtype=str, keep_default_na=False)
+    return convert_frame_to_pdf(df)
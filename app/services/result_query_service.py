@@ -0,0 +1,186 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.core.artifact_cache import result_cache
+from app.services.report_service import load_result_frame
+
+SORT_OPTIONS = ("-review_priority", "review_priority", "-amount", "amount")
+MAX_PAGE_SIZE = 1000
+
+_CACHE_VARIANT = "row_index"
+
+
+class ResultIndex:
+    """
+    Query index over one stored result, built once and cached: the frame plus
+    filter columns as numpy arrays (timestamps as int64, merchants as codes
+    into a lower-cased dictionary) and a precomputed row order per sort key.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.rows = len(df)
+
+        self.is_fraud = self._flag(df, "is_fraud")
+        self.anomaly_flag = self._flag(df, "anomaly_flag")
+
+        if "timestamp" in df.columns:
+            timestamps = pd.to_datetime(df["timestamp"], errors="coerce")
+            self.timestamps = timestamps.to_numpy(dtype="datetime64[ns]").view("int64")
+        else:
+            self.timestamps = None
+
+        if "merchant" in df.columns:
+            codes, uniques = pd.factorize(df["merchant"].astype("string").str.lower())
+            self.merchant_codes = codes
+            self.merchant_names = np.asarray(uniques, dtype=object)
+        else:
+            self.merchant_codes = None
+
+        self.orders = {}
+        for column in ("review_priority", "amount"):
+            if column not in df.columns:
+                continue
+            values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+            # Stable sorts; missing values last in both directions
+            ascending = np.argsort(np.where(np.isnan(values), np.inf, values), kind="stable")
+            descending = np.argsort(np.where(np.isnan(values), np.inf, -values), kind="stable")
+            self.orders[column] = ascending
+            self.orders[f"-{column}"] = descending
+
+    @staticmethod
+    def _flag(df: pd.DataFrame, column: str):
+        if column not in df.columns:
+            return None
+        return pd.to_numeric(df[column], errors="coerce").fillna(0).to_numpy() == 1
+
+    def nbytes(self) -> int:
+        # Only the index arrays: the frame itself is the full-result entry
+        # load_result_frame already put in result_cache, and is counted there
+        arrays = [self.is_fraud, self.anomaly_flag, self.timestamps, self.merchant_codes, *self.orders.values()]
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    def mask(self, is_fraud=None, anomaly_flag=None, merchant=None, start=None, end=None) -> np.ndarray:
+        mask = np.ones(self.rows, dtype=bool)
+        for flags, wanted, name in ((self.is_fraud, is_fraud, "is_fraud"), (self.anomaly_flag, anomaly_flag, "anomaly_flag")):
+            if wanted is None:
+                continue
+            if flags is None:
+                raise ValueError(f"Result has no {name} column")
+            mask &= flags == wanted
+
+        if merchant:
+            if self.merchant_codes is None:
+                raise ValueError("Result has no merchant column")
+            # Match against the distinct merchants, then select rows by code
+            needle = merchant.lower()
+            matched = [i for i, name in enumerate(self.merchant_names) if needle in name]
+            mask &= np.isin(self.merchant_codes, matched)
+
+        if start is not None or end is not None:
+            if self.timestamps is None:
+                raise ValueError("Result has no timestamp column")
+            valid = self.timestamps != np.iinfo("int64").min  # NaT
+            mask &= valid
+            if start is not None:
+                mask &= self.timestamps >= pd.Timestamp(start).value
+            if end is not None:
+                mask &= self.timestamps < pd.Timestamp(end).value
+
+        return mask
+
+    def positions(self, mask: np.ndarray, sort: str) -> np.ndarray:
+        order = self.orders.get(sort)
+        if order is None:
+            # Stored results are already in review priority order
+            if sort != "-review_priority":
+                raise ValueError(f"Result can't be sorted by {sort.lstrip('-')}")
+            return np.flatnonzero(mask)
+        return order[mask[order]]
+
+
+def get_result_index(key: str) -> ResultIndex:
+    index = result_cache.get(key, _CACHE_VARIANT)
+    if index is None:
+        index = ResultIndex(load_result_frame(key))
+        result_cache.put(key, index, index.nbytes(), _CACHE_VARIANT)
+    return index
+
+
+def _query_fingerprint(filters: dict, sort: str) -> str:
+    raw = json.dumps([filters, sort], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def _encode_cursor(offset: int, fingerprint: str) -> str:
+    raw = json.dumps({"o": offset, "q": fingerprint}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, fingerprint: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        offset = int(data["o"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if data.get("q") != fingerprint or offset < 0:
+        raise ValueError("Cursor does not match this query")
+    return offset
+
+
+def query_result_rows(
+    key: str,
+    is_fraud: bool | None = None,
+    anomaly_flag: bool | None = None,
+    merchant: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    sort: str = "-review_priority",
+    limit: int = 100,
+    cursor: str | None = None,
+    columns: list[str] | None = None,
+) -> dict:
+    """
+    One page of a stored result, filtered and sorted server side.
+    Results are immutable, so a cursor is the position in the filtered,
+    sorted row sequence (tied to the query it was issued for).
+    Raises ValueError for invalid filters, sort keys, columns or cursors.
+    """
+    if sort not in SORT_OPTIONS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_OPTIONS)}")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    filters = {
+        "is_fraud": is_fraud,
+        "anomaly_flag": anomaly_flag,
+        "merchant": merchant,
+        "start": start,
+        "end": end,
+    }
+    fingerprint = _query_fingerprint(filters, sort)
+    offset = _decode_cursor(cursor, fingerprint) if cursor else 0
+
+    index = get_result_index(key)
+    positions = index.positions(index.mask(**filters), sort)
+    page = positions[offset:offset + limit]
+
+    if columns:
+        unknown = [col for col in columns if col not in index.df.columns]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        frame = index.df[columns]
+    else:
+        frame = index.df
+
+    next_offset = offset + len(page)
+    return {
+        "total": int(len(positions)),
+        "rows": json.loads(frame.iloc[page].to_json(orient="records", date_format="iso")),
+        "next_cursor": _encode_cursor(next_offset, fingerprint) if next_offset < len(positions) else None,
+    }
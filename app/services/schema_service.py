@@ -1,57 +1,374 @@
 import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows: thread lock only
+    fcntl = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
 # Define the path to the schema mapping file
-SCHEMA_FILE = Path("schema_mapping.json")
+SCHEMA_FILE = Path(settings.SCHEMA_FILE_PATH)
 
-# Function to save schema mapping
-def save_schema(bank_name: str,mapping: dict):
+
+class BankSchema:
+    """
+    A bank's column mapping, compiled once per registry load.
+    mapping:  canonical column -> bank column (as stored)
+    rename:   bank column -> canonical column (for DataFrame.rename)
+    required: bank columns a file must contain
+    """
+
+    def __init__(self, bank_name: str, mapping: dict, is_default: bool = True):
+        self.bank_name = bank_name
+        self.mapping = dict(mapping)
+        self.is_default = is_default
+        self.rename = {bank_col: canonical for canonical, bank_col in self.mapping.items()}
+        self.required = list(self.mapping.values())
+        self.required_set = frozenset(self.required)
+
+    def missing_columns(self, columns) -> list[str]:
+        present = set(columns)
+        return [col for col in self.required if col not in present]
 
 
+def _validate(bank_name: str, mapping: dict):
     if not bank_name or not mapping:
         raise ValueError("bank_name and mapping are required")
-    
+
     # Check for empty mapping values
     for val in mapping.values():
         if not val or not str(val).strip():
             raise ValueError("Schema mapping columns cannot be empty")
 
-    # Load existing data if file exists
-    if SCHEMA_FILE.exists():
-        data = json.loads(SCHEMA_FILE.read_text())
-    else:
-        data = {}
 
-    # Save the schema for the specific bank
-    data[bank_name] = {
-        "is_default": True,
-        "mapping": mapping,
+def _compile(data: dict) -> dict[str, BankSchema]:
+    return {
+        bank_name: BankSchema(bank_name, entry["mapping"], entry.get("is_default", True))
+        for bank_name, entry in data.items()
     }
-    print("Saving schema:", mapping)        # Debug
 
-    # Write back to the file
-    SCHEMA_FILE.write_text(json.dumps(data, indent=4))
-    print("Schema saved to:", SCHEMA_FILE)  # Debug
 
+class FileSchemaRegistry:
+    """
+    Schemas from schema_mapping.json, parsed once and reloaded only when the
+    file's mtime/size changes (e.g. another worker saved a schema).
+    Saves take a process lock plus an flock on <file>.lock, re-read the latest
+    file, and replace it atomically (temp file + fsync + rename), so readers
+    never see a half-written file and concurrent saves don't drop each other.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._schemas = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _stat_version(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read(self) -> dict:
+        if not self.path.exists():
+            return {}
+        return json.loads(self.path.read_text())
+
+    def schemas(self) -> dict[str, BankSchema]:
+        version = self._stat_version()
+        if version == self._version:
+            return self._schemas
+        with self._lock:
+            version = self._stat_version()
+            if version != self._version:
+                self._schemas = _compile(self._read()) if version is not None else {}
+                self._version = version
+                logger.info(f"Loaded {len(self._schemas)} bank schemas from {self.path}")
+            return self._schemas
+
+    @contextmanager
+    def _write_lock(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{self.path}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def save(self, bank_name: str, mapping: dict):
+        with self._write_lock():
+            data = self._read()
+            data[bank_name] = {
+                "is_default": True,
+                "mapping": mapping,
+            }
+
+            directory = self.path.parent
+            directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{self.path.name}.")
+            try:
+                with os.fdopen(fd, "w") as out:
+                    out.write(json.dumps(data, indent=4))
+                    out.flush()
+                    os.fsync(out.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+            # Our own write: refresh the cache now rather than on the next stat
+            self._schemas = _compile(data)
+            self._version = self._stat_version()
+        logger.info(f"Schema saved for {bank_name} to {self.path}")
+
+
+class DbSchemaRegistry:
+    """
+    Schemas in the bank_schemas table, for deployments with several replicas
+    (no shared filesystem). Every write also bumps the single schema_revision
+    row in the same transaction; the cache is refreshed when the revision (or
+    the row count) changes, checked at most every SCHEMA_REFRESH_SECONDS.
+    An empty table is seeded from schema_mapping.json.
+    """
+
+    def __init__(self, seed_path: Path, refresh_seconds: float):
+        self.seed_path = Path(seed_path)
+        self.refresh_seconds = refresh_seconds
+        self._schemas = {}
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _db_version(self, db):
+        from sqlalchemy import func
+        from app.db.models import BankSchemaRecord, SchemaRevision
+        revision = db.query(SchemaRevision.revision).filter(SchemaRevision.id == 1).scalar()
+        return (revision or 0, db.query(func.count(BankSchemaRecord.bank_name)).scalar())
+
+    def _bump_revision(self, db):
+        # Atomic increment, so two concurrent saves always yield two revisions
+        from sqlalchemy.exc import IntegrityError
+        from app.db.models import SchemaRevision
+        while True:
+            bumped = (
+                db.query(SchemaRevision)
+                .filter(SchemaRevision.id == 1)
+                .update({SchemaRevision.revision: SchemaRevision.revision + 1}, synchronize_session=False)
+            )
+            if bumped:
+                return
+            try:
+                with db.begin_nested():
+                    db.add(SchemaRevision(id=1, revision=1))
+                return
+            except IntegrityError:
+                # Another replica created the row first; increment it instead
+                continue
+
+    def _seed(self, db):
+        from app.db.models import BankSchemaRecord
+        if not self.seed_path.exists():
+            return
+        for bank_name, entry in json.loads(self.seed_path.read_text()).items():
+            db.merge(BankSchemaRecord(
+                bank_name=bank_name,
+                mapping=json.dumps(entry["mapping"]),
+                is_default=entry.get("is_default", True),
+                version=1,
+                updated_at=datetime.utcnow(),
+            ))
+        self._bump_revision(db)
+        db.commit()
+        logger.info(f"Seeded bank_schemas from {self.seed_path}")
+
+    def schemas(self) -> dict[str, BankSchema]:
+        if time.monotonic() - self._checked_at < self.refresh_seconds:
+            return self._schemas
+
+        from app.db.models import BankSchemaRecord
+        from app.db.session import SessionLocal
+        with self._lock:
+            db = SessionLocal()
+            try:
+                version = self._db_version(db)
+                if version[1] == 0 and self._version is None:
+                    self._seed(db)
+                    version = self._db_version(db)
+                if version != self._version:
+                    rows = db.query(BankSchemaRecord).all()
+                    self._schemas = {
+                        row.bank_name: BankSchema(row.bank_name, json.loads(row.mapping), row.is_default)
+                        for row in rows
+                    }
+                    self._version = version
+                    logger.info(f"Loaded {len(self._schemas)} bank schemas from the database")
+            finally:
+                db.close()
+            self._checked_at = time.monotonic()
+            return self._schemas
+
+    def save(self, bank_name: str, mapping: dict):
+        from app.db.models import BankSchemaRecord
+        from app.db.session import SessionLocal
+        db = SessionLocal()
+        try:
+            row = db.get(BankSchemaRecord, bank_name)
+            if row is None:
+                row = BankSchemaRecord(bank_name=bank_name, version=0)
+                db.add(row)
+            row.mapping = json.dumps(mapping)
+            row.is_default = True
+            row.version = (row.version or 0) + 1
+            row.updated_at = datetime.utcnow()
+            self._bump_revision(db)
+            db.commit()
+        finally:
+            db.close()
+        # Force a reload on the next lookup in this process
+        self._checked_at = 0.0
+        logger.info(f"Schema saved for {bank_name} to the database")
+
+
+_registry = None
+
+
+def get_registry():
+    """
+    The schema registry selected by Settings.SCHEMA_BACKEND ("file" or "db").
+    """
+    global _registry
+    if _registry is None:
+        if settings.SCHEMA_BACKEND == "file":
+            _registry = FileSchemaRegistry(SCHEMA_FILE)
+        elif settings.SCHEMA_BACKEND == "db":
+            _registry = DbSchemaRegistry(SCHEMA_FILE, settings.SCHEMA_REFRESH_SECONDS)
+        else:
+            raise ValueError(f"Unknown schema backend: {settings.SCHEMA_BACKEND}")
+    return _registry
+
+
+# Function to save schema mapping
+def save_schema(bank_name: str, mapping: dict):
+    _validate(bank_name, mapping)
+    get_registry().save(bank_name, mapping)
     return True
 
-# Function to load schema mapping
-def load_schema(bank_name: str):
-    
-    # Load existing data
-    if not SCHEMA_FILE.exists():
-        print("Schema file does not exist")  # Debug
-        return None
 
-    # Load the schema data
-    data = json.loads(SCHEMA_FILE.read_text())
-    print("Loaded schema data:", data)  # Debug
+def get_bank_schema(bank_name: str) -> BankSchema | None:
+    return get_registry().schemas().get(bank_name)
+
+
+def all_schemas() -> dict[str, BankSchema]:
+    return get_registry().schemas()
+
+
+def normalize_column(name) -> str:
+    """
+    Header fingerprint form of a column name: trimmed, lower-cased, with runs
+    of spaces / underscores / hyphens collapsed ("Txn Date" == "txn_date").
+    """
+    return re.sub(r"[\s_\-]+", "_", str(name).strip().lower())
+
 
-    # Return the schema for the specific bank if it exists
-    if bank_name in data:
-        print("Returning schema for bank:", bank_name)  # Debug
-        return data[bank_name]["mapping"]
+# (schemas dict the index was built from, normalized required-column set -> banks)
+_fingerprint_index = (None, {})
+_fingerprint_lock = threading.Lock()
 
 
-    print(f"No schema found for bank: {bank_name}")  # Debug
-    return None
\ No newline at end of file
+def _fingerprints(schemas: dict[str, BankSchema]) -> dict[frozenset, list[str]]:
+    global _fingerprint_index
+    built_from, index = _fingerprint_index
+    if built_from is schemas:
+        return index
+    with _fingerprint_lock:
+        index = {}
+        for bank_name, schema in schemas.items():
+            key = frozenset(normalize_column(col) for col in schema.required)
+            index.setdefault(key, []).append(bank_name)
+        # Registries return a new dict on reload, so identity tells us when to rebuild
+        _fingerprint_index = (schemas, index)
+        return index
+
+
+def detect_bank(columns: list[str], limit: int = 3) -> dict:
+    """
+    Guess the bank of a file from its header.
+    A header that is exactly a bank's column set is found with one dict lookup.
+    Otherwise banks are ranked by the share of their required columns present
+    (normalized names), with fewer unexplained header columns breaking ties.
+    A bank is only selected when all its required columns are present under
+    their exact names and no other bank fits equally well.
+    Returns {"bank_name", "confidence", "exact", "candidates"}; bank_name is
+    None when the header can't be resolved.
+    """
+    schemas = all_schemas()
+    header = [str(col).strip() for col in columns]
+    normalized = frozenset(normalize_column(col) for col in header)
+
+    exact = _fingerprints(schemas).get(normalized, [])
+    if len(exact) == 1 and not schemas[exact[0]].missing_columns(header):
+        return {
+            "bank_name": exact[0],
+            "confidence": 1.0,
+            "exact": True,
+            "candidates": [{"bank_name": exact[0], "confidence": 1.0, "complete": True}],
+        }
+
+    ranked = []
+    for bank_name, schema in schemas.items():
+        required = frozenset(normalize_column(col) for col in schema.required)
+        if not required:
+            continue
+        coverage = len(required & normalized) / len(required)
+        # Share of the header the schema accounts for
+        explained = len(required & normalized) / max(len(normalized), 1)
+        complete = not schema.missing_columns(header)
+        ranked.append((complete, coverage, explained, bank_name))
+    ranked.sort(reverse=True)
+
+    candidates = [
+        {"bank_name": bank_name, "confidence": round(coverage * explained, 3), "complete": complete}
+        for complete, coverage, explained, bank_name in ranked[:limit]
+    ]
+
+    selected = None
+    if ranked and ranked[0][0]:
+        best = ranked[0]
+        tied = len(ranked) > 1 and ranked[1][:3] == best[:3]
+        if not tied:
+            selected = best[3]
+
+    return {
+        "bank_name": selected,
+        "confidence": candidates[0]["confidence"] if selected else 0.0,
+        "exact": False,
+        "candidates": candidates,
+    }
+
+
+# Function to load schema mapping
+def load_schema(bank_name: str):
+    schema = get_bank_schema(bank_name)
+    if schema is None:
+        logger.info(f"No schema found for bank: {bank_name}")
+        return None
+    # Copy: callers may modify it, the registry's cached schema must not change
+    return dict(schema.mapping)
@@ -0,0 +1,142 @@
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.core.artifact_cache import result_cache
+from app.core.local_storage import SUMMARY_SUFFIX, load_decrypted, write_encrypted_output
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_VERSION = 1
+HISTOGRAM_BINS = 20
+TOP_GROUPS = 20
+REVIEW_QUEUE_SIZE = 50
+
+REVIEW_QUEUE_COLUMNS = [
+    "timestamp", "merchant", "amount", "mcc", "city", "country", "channel",
+    "review_priority", "fraud_confidence", "anomaly_score",
+    "is_fraud", "anomaly_flag", "reasoning", "anomaly_reasoning",
+]
+
+SUMMARY_SECTIONS = (
+    "counts",
+    "fraud_confidence",
+    "anomaly_score",
+    "by_merchant",
+    "by_mcc",
+    "by_city",
+    "by_hour",
+    "review_queue",
+)
+
+_CACHE_VARIANT = "summary"
+
+
+def _histogram(values: pd.Series, bins=HISTOGRAM_BINS, value_range=None) -> dict:
+    values = values.dropna().to_numpy(dtype=float)
+    if not len(values):
+        return {"edges": [], "counts": []}
+    counts, edges = np.histogram(values, bins=bins, range=value_range)
+    return {"edges": [round(float(e), 6) for e in edges], "counts": counts.tolist()}
+
+
+def _breakdown(df: pd.DataFrame, by, name: str, limit: int | None = TOP_GROUPS) -> list[dict]:
+    grouped = df.groupby(by, dropna=False).agg(
+        rows=("is_fraud", "size"),
+        fraud=("is_fraud", "sum"),
+        anomaly=("anomaly_flag", "sum"),
+        amount=("amount", "sum"),
+    )
+    grouped = grouped.sort_values(["fraud", "anomaly", "rows"], ascending=False)
+    if limit is not None:
+        grouped = grouped.head(limit)
+    return [
+        {
+            name: None if pd.isna(value) else (value.item() if hasattr(value, "item") else value),
+            "rows": int(row.rows),
+            "fraud": int(row.fraud),
+            "anomaly": int(row.anomaly),
+            "amount": round(float(row.amount), 2),
+        }
+        for value, row in grouped.iterrows()
+    ]
+
+
+def build_summary(df: pd.DataFrame) -> dict:
+    """
+    Compact dashboard summary of a scored result: counts, score histograms,
+    breakdowns by merchant / MCC / city / hour and the top of the review queue.
+    `df` is the scored frame, sorted by review_priority (highest first).
+    """
+    df = df.assign(
+        is_fraud=df["is_fraud"].fillna(0).astype(int),
+        anomaly_flag=df["anomaly_flag"].fillna(0).astype(int),
+        amount=pd.to_numeric(df["amount"], errors="coerce").fillna(0.0),
+    )
+    hours = pd.to_datetime(df["timestamp"], errors="coerce").dt.hour
+
+    by_hour = {entry["hour"]: entry for entry in _breakdown(df.assign(hour=hours), "hour", "hour", limit=None)}
+    queue = df[[col for col in REVIEW_QUEUE_COLUMNS if col in df.columns]].head(REVIEW_QUEUE_SIZE)
+
+    return {
+        "version": SUMMARY_VERSION,
+        "counts": {
+            "rows": len(df),
+            "fraud": int(df["is_fraud"].sum()),
+            "anomaly": int(df["anomaly_flag"].sum()),
+            "fraud_and_anomaly": int(((df["is_fraud"] == 1) & (df["anomaly_flag"] == 1)).sum()),
+            "flagged_amount": round(float(df.loc[(df["is_fraud"] == 1) | (df["anomaly_flag"] == 1), "amount"].sum()), 2),
+        },
+        "fraud_confidence": _histogram(df["fraud_confidence"], value_range=(0.0, 1.0)),
+        "anomaly_score": _histogram(df["anomaly_score"]),
+        "by_merchant": _breakdown(df, "merchant", "merchant"),
+        "by_mcc": _breakdown(df, "mcc", "mcc"),
+        "by_city": _breakdown(df, "city", "city"),
+        "by_hour": [
+            by_hour.get(hour, {"hour": hour, "rows": 0, "fraud": 0, "anomaly": 0, "amount": 0.0})
+            for hour in range(24)
+        ],
+        # to_json handles timestamps / NaN; parsed back so the summary stays a plain dict
+        "review_queue": json.loads(queue.to_json(orient="records", date_format="iso")),
+    }
+
+
+def summary_key(result_key: str) -> str:
+    return f"{result_key}{SUMMARY_SUFFIX}"
+
+
+def store_summary(result_key: str, summary: dict):
+    """
+    Store the summary as an encrypted sidecar object next to the result.
+    """
+    data = json.dumps(summary, separators=(",", ":")).encode()
+    write_encrypted_output(data, key=summary_key(result_key))
+    result_cache.put(result_key, summary, len(data), _CACHE_VARIANT)
+
+
+def load_summary(result_key: str) -> dict:
+    """
+    Summary for a result: from the cache, else the sidecar. Results scored
+    before summaries existed get one computed from the full result (once).
+    """
+    summary = result_cache.get(result_key, _CACHE_VARIANT)
+    if summary is not None:
+        return summary
+
+    try:
+        data = load_decrypted(summary_key(result_key))
+    except FileNotFoundError:
+        # Only a missing sidecar falls back; KMS / decrypt / storage errors propagate
+        logger.info(f"No summary sidecar for {result_key}; computing from the result.")
+    else:
+        summary = json.loads(data)
+        result_cache.put(result_key, summary, len(data), _CACHE_VARIANT)
+        return summary
+
+    # Imported here: report_service depends on this module for the breakdown
+    from app.services.report_service import load_result_frame
+    summary = build_summary(load_result_frame(result_key))
+    store_summary(result_key, summary)
+    return summary
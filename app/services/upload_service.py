@@ -1,7 +1,13 @@
+import io
+import json
 import os
 import pandas as pd
 from fastapi import HTTPException
-from app.services.schema_service import load_schema
+from app.services.schema_service import detect_bank, get_bank_schema, load_schema
+from app.services import reader_service as reader
+from app.services.preprocess_service import preprocess_dataframe
+from app.services.frame_service import encode_handoff
+from app.core.local_storage import store_encrypted
 
 
 def validate_file_extension(filename: str):
@@ -46,28 +52,274 @@ def validate_file_size(file_size: int, max_size_mb: int = 20):
     return "File size is valid."
 
 
-def validate_schema_columns(df: pd.DataFrame, bank_name: str):
-    schema = load_schema(bank_name)
+def upload_size(upload) -> int:
+    """
+    Size in bytes of a FastAPI UploadFile, without reading it.
+    """
+    if upload.size is not None:
+        return upload.size
+    upload.file.seek(0, os.SEEK_END)
+    size = upload.file.tell()
+    upload.file.seek(0)
+    return size
+
+
+def validate_schema_header(columns: list, bank_name: str) -> dict:
+    """
+    Check a file's header against the bank schema.
+    Returns a copy of the schema mapping (canonical column -> bank column).
+    """
+    schema = get_bank_schema(bank_name)
     if not schema:
         raise HTTPException(
             status_code=400,
             detail=f"No schema found for bank: {bank_name}. Please configure schema first."
         )
-    
-    required_bank_columns = list(schema.values())
 
-    missing = [col for col in required_bank_columns if col not in df.columns]
+    missing = schema.missing_columns(columns)
     if missing:
         raise HTTPException(
             status_code=400,
             detail=f"Missing required columns for {bank_name}: {missing}"
         )
-    
-    normalized_df = df.rename(columns={schema[key]: key for key in schema})
+
+    # Copy: the registry's cached schema is shared between requests
+    return dict(schema.mapping)
+
+
+def validate_schema_columns(df: pd.DataFrame, bank_name: str):
+    validate_schema_header(list(df.columns), bank_name)
+
+    normalized_df = df.rename(columns=get_bank_schema(bank_name).rename)
 
     return normalized_df
 
 
+def resolve_bank(columns: list, bank_name: str | None = None) -> tuple[str, dict | None]:
+    """
+    The bank to use for a file with header `columns`: `bank_name` when given,
+    otherwise the bank detected from the header fingerprint.
+    Returns (bank_name, detection); detection is None when bank_name was given.
+    """
+    if bank_name:
+        return bank_name, None
+
+    detection = detect_bank(columns)
+    if not detection["bank_name"]:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": "Could not detect the bank from the file header. Please select the bank.",
+                "candidates": detection["candidates"],
+            },
+        )
+    return detection["bank_name"], detection
+
+
+def reject_legacy_excel(filename: str):
+    if os.path.splitext(filename)[1].lower() == ".xls":
+        raise HTTPException(
+            status_code=400,
+            detail="Legacy .xls workbooks are not supported. Please save the file as .xlsx or .csv."
+        )
+
+
+def read_upload_header(filename: str, content: bytes) -> list:
+    """
+    Header row of an uploaded CSV / .xlsx file (nothing else is parsed).
+    """
+    if len(content) == 0:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+    reject_legacy_excel(filename)
+
+    if filename.lower().endswith(".xlsx"):
+        try:
+            return list(reader.read_excel_sample(content, nrows=0).columns)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Unable to parse Excel file.")
+    try:
+        return reader.read_csv_header(content)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Unable to parse CSV file.")
+
+
+def resolve_upload_bank(filename: str, content: bytes, bank_name: str | None = None) -> tuple[str, dict | None]:
+    """
+    resolve_bank for an uploaded file; only reads the header when bank_name is missing.
+    """
+    if bank_name:
+        return bank_name, None
+    validate_file_extension(filename)
+    return resolve_bank(read_upload_header(filename, content))
+
+
+def preview_upload(head, bank_name: str | None, sample_rows: int = 20, truncated: bool = True, excel: bool = False) -> dict:
+    """
+    Check a file against the bank schema using only its first bytes
+    (for .xlsx, `head` is the whole file, as bytes or a file object, and only
+    the header and first rows of the sheet are streamed from it).
+    Reports missing / extra columns and a per-column type preview from a small
+    sample, so a wrong bank is caught without parsing the whole file.
+    Without bank_name, the bank is detected from the header.
+    """
+    if excel:
+        try:
+            sample = reader.read_excel_sample(head, nrows=sample_rows)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Unable to parse Excel file.")
+    else:
+        if len(head) == 0:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+        try:
+            sample = reader.read_csv_sample(head, nrows=sample_rows, truncated=truncated)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Unable to parse CSV file.")
+
+    columns = list(sample.columns)
+    bank_name, detection = resolve_bank(columns, bank_name)
+
+    schema = load_schema(bank_name)
+    if not schema:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No schema found for bank: {bank_name}. Please configure schema first."
+        )
+
+    mapped = set(schema.values())
+    missing = [col for col in schema.values() if col not in columns]
+    extra = [col for col in columns if col not in mapped]
+
+    preview = {}
+    for canonical, bank_col in schema.items():
+        if bank_col not in columns:
+            continue
+        values = sample[bank_col]
+        expected = reader.CANONICAL_DTYPES.get(canonical, object)
+        entry = {
+            "source_column": bank_col,
+            "inferred_dtype": str(values.dtype),
+            "expected_dtype": "string" if expected is object else str(expected),
+            "sample": values.dropna().astype(str).head(3).tolist(),
+        }
+        if expected is not object:
+            # Values that won't fit the declared numeric type (cleaned later)
+            entry["non_numeric"] = int(pd.to_numeric(values, errors="coerce").isna().sum() - values.isna().sum())
+        if canonical == "timestamp":
+            entry["expected_dtype"] = "datetime"
+            # cache_key=None: a 20-row sample must not pick the format real ingests of this bank use
+            entry["unparseable"] = int(reader.parse_timestamps(values, cache_key=None).isna().sum() - values.isna().sum())
+        preview[canonical] = entry
 
+    return {
+        "bank": bank_name,
+        "bank_detection": detection,
+        "valid": not missing,
+        "missing_columns": missing,
+        "extra_columns": extra,
+        "sample_rows": len(sample),
+        "columns": preview,
+    }
+
+
+def read_bank_file(content: bytes, bank_name: str) -> pd.DataFrame:
+    """
+    Parse an uploaded CSV using the bank schema.
+    The header is checked first so a wrong bank fails before the full parse;
+    then only the mapped columns are read, typed, and renamed to canonical names.
+    """
+    try:
+        columns = reader.read_csv_header(content)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Unable to parse CSV file.")
+
+    schema = validate_schema_header(columns, bank_name)
+
+    try:
+        return reader.read_bank_csv(content, schema)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Unable to parse CSV file.")
+
+
+def clean_excel_upload(content: bytes, bank_name: str):
+    """
+    Stream an .xlsx upload through the bank schema, keeping only the mapped
+    columns (the workbook itself is never loaded whole), then clean the
+    combined frame with preprocess_dataframe in one go, so imputation medians
+    and duplicate removal cover the whole file exactly as for a CSV.
+    Peak memory is therefore that of the mapped rows as a DataFrame, like a
+    CSV upload, not bounded by the chunk size.
+    Returns (cleaned_df, log).
+    """
+    try:
+        # The header is checked against the schema before any rows are read
+        chunks = list(reader.iter_bank_excel(content, lambda header: validate_schema_header(header, bank_name)))
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=400, detail="Unable to parse Excel file.")
+
+    if not chunks:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+
+    # infer_objects: column dtypes as if the sheet had been read in one frame
+    # (e.g. a chunk whose column is all empty doesn't turn the column into text)
+    normalized_df = pd.concat(chunks, ignore_index=True).infer_objects()
+    del chunks
+
+    cleaned_df, log = preprocess_dataframe(normalized_df, timestamp_key=bank_name)
+    log.append(f"Read {len(normalized_df)} rows from workbook.")
+    return cleaned_df, log
+
+
+def parse_and_clean_upload(filename: str, content: bytes, bank_name: str):
+    """
+    Validate an uploaded file and run it through the bank schema and cleaning.
+    Returns (normalized_columns, cleaned_df, log).
+    """
+    # Validate file extension
+    validate_file_extension(filename)
+
+    # Validate file size
+    validate_file_size(len(content))
+
+    # Reject empty file
+    if len(content) == 0:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+
+    reject_legacy_excel(filename)
+    if filename.lower().endswith(".xlsx"):
+        cleaned_df, log = clean_excel_upload(content, bank_name)
+        return list(cleaned_df.columns), cleaned_df, log
+
+    # Validate header against schema, then read only the mapped columns (typed)
+    normalized_df = read_bank_file(content, bank_name)
+
+    # Preprocess / Clean Data
+    cleaned_df, log = preprocess_dataframe(normalized_df, timestamp_key=bank_name)
+
+    return list(normalized_df.columns), cleaned_df, log
+
+
+def ingest_upload(filename: str, content: bytes, bank_name: str | None = None) -> dict:
+    """
+    Parse and clean an upload into the Arrow handoff for /predict.
+    Without bank_name, the bank is detected from the header first.
+    Runs in the CPU worker pool, so it returns plain data rather than the
+    DataFrame; the handoff bytes are stored by store_handoff in the API process.
+    """
+    bank_name, detection = resolve_upload_bank(filename, content, bank_name)
+    normalized_columns, cleaned_df, log = parse_and_clean_upload(filename, content, bank_name)
+    return {
+        "bank_name": bank_name,
+        "bank_detection": detection,
+        "handoff": encode_handoff(cleaned_df),
+        "normalized_columns": normalized_columns,
+        "cleaned_rows": len(cleaned_df),
+        "sample": json.loads(cleaned_df.head(5).to_json(orient="records", date_format="iso")),
+        "log": log,
+    }
 
 
+def store_handoff(handoff: bytes) -> str:
+    """Store an ingest_upload handoff encrypted; returns its key for /predict."""
+    return store_encrypted(io.BytesIO(handoff), prefix="incoming")
@@ -0,0 +1,123 @@
+"""
+Benchmark: event-loop responsiveness while heavy jobs run.
+
+Pings GET / at a fixed interval and reports p50/p99/max latency, first with
+no other load and then while several /analyze requests (parse, clean, score,
+encrypt, store) run concurrently. With blocking work offloaded to the
+executor pools (app.core.executors) the two sets of numbers should stay close.
+
+Runs in a temporary working directory (copy of the database, local storage
+backend, throwaway key), so the repository's database.db is not touched.
+
+Run from the repository root:
+    python -m benchmarks.bench_event_loop_latency --rows 20000 --jobs 4
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from cryptography.fernet import Fernet
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def prepare_workdir() -> Path:
+    work = Path(tempfile.mkdtemp(prefix="bench-latency-"))
+    for name in ("database.db", "schema_mapping.json"):
+        shutil.copy(REPO / name, work / name)
+    (work / "models").symlink_to(REPO / "models")
+    (work / "local.key").write_bytes(Fernet.generate_key())
+
+    os.environ["STORAGE_BACKEND"] = "local"
+    os.environ["LOCAL_STORAGE_ROOT"] = str(work / "objects")
+    os.environ["KEY_ENCRYPTION_BACKEND"] = "local"
+    os.environ["LOCAL_KEK_PATH"] = str(work / "local.key")
+    os.chdir(work)
+    return work
+
+
+def percentiles(samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return (
+        f"n={len(ordered):5d}  p50={statistics.median(ordered):7.1f} ms  "
+        f"p99={p99:7.1f} ms  max={ordered[-1]:7.1f} ms"
+    )
+
+
+async def ping(client, stop: asyncio.Event, interval: float) -> list[float]:
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/")
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def run(args):
+    # Imported after prepare_workdir: Settings are read from the environment at import
+    import httpx
+    from benchmarks.bench_excel_ingest import BANK, make_csv
+    from app.main import app
+    from app.core.executors import shutdown_executors
+    from app.core.security import get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "bench", "username": "bench", "is_admin": False}
+    payload = make_csv(args.rows)
+
+    transport = httpx.ASGITransport(app=app)
+    # ASGITransport doesn't run the lifespan (tables, export workers, warm-up)
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Warm up the worker pools (model load) before measuring
+        while (await client.get("/health/ready")).status_code != 200:
+            await asyncio.sleep(0.1)
+        await client.post("/analyze", data={"bank_name": BANK}, files={"file": ("warm.csv", make_csv(200), "text/csv")})
+
+        stop = asyncio.Event()
+        pinger = asyncio.create_task(ping(client, stop, args.interval))
+        await asyncio.sleep(args.idle_seconds)
+        stop.set()
+        idle = await pinger
+
+        stop = asyncio.Event()
+        pinger = asyncio.create_task(ping(client, stop, args.interval))
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/analyze", data={"bank_name": BANK}, files={"file": (f"job{i}.csv", payload, "text/csv")})
+            for i in range(args.jobs)
+        ))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        loaded = await pinger
+
+    shutdown_executors()
+    statuses = sorted({r.status_code for r in responses})
+    print(f"idle    {percentiles(idle)}")
+    print(f"loaded  {percentiles(loaded)}  ({args.jobs} x {args.rows} rows in {elapsed:.1f} s, status {statuses})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between pings")
+    parser.add_argument("--idle-seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    work = prepare_workdir()
+    try:
+        asyncio.run(run(args))
+    finally:
+        os.chdir(REPO)
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
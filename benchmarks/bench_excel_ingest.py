@@ -0,0 +1,92 @@
+"""
+Benchmark: Excel (.xlsx, streamed read-only) vs CSV upload ingestion.
+
+Builds the same synthetic transactions as CSV and .xlsx, then runs both
+through upload_service.parse_and_clean_upload and reports wall time and
+peak Python memory (tracemalloc, measured in a second run).
+
+Run from the repository root:
+    python -m benchmarks.bench_excel_ingest --rows 50000
+"""
+import argparse
+import io
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+from app.services.upload_service import parse_and_clean_upload
+
+# Uses canonical column names so the identity "Scotiabank" schema applies
+BANK = "Scotiabank"
+COLUMNS = ["timestamp", "merchant", "amount", "mcc", "city", "country", "channel"]
+
+
+def make_rows(n: int):
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    merchants = [f"Merchant {i}" for i in range(200)]
+    cities = ["Toronto", "Mississauga", "Ottawa", "Montreal", "Vancouver", "Calgary"]
+    for i in range(n):
+        yield [
+            start + timedelta(minutes=7 * i),
+            rng.choice(merchants),
+            round(rng.uniform(1, 900), 2),
+            rng.choice([4121, 5411, 5541, 5651, 5732, 5814]),
+            rng.choice(cities),
+            rng.choice(["CA", "US"]),
+            rng.choice(["ONLINE", "POS"]),
+        ]
+
+
+def make_csv(n: int) -> bytes:
+    lines = [",".join(COLUMNS)]
+    for row in make_rows(n):
+        row[0] = row[0].strftime("%Y-%m-%d %H:%M:%S")
+        lines.append(",".join(str(v) for v in row))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def make_xlsx(n: int) -> bytes:
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(COLUMNS)
+    for row in make_rows(n):
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def measure(label: str, filename: str, content: bytes):
+    start = time.perf_counter()
+    _, cleaned_df, _ = parse_and_clean_upload(filename, content, BANK)
+    elapsed = time.perf_counter() - start
+
+    # Separate run for memory: tracemalloc slows pure-Python parsing a lot
+    tracemalloc.start()
+    parse_and_clean_upload(filename, content, BANK)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:5s} size={len(content) / 1e6:7.2f} MB  rows={len(cleaned_df):8d}  "
+        f"time={elapsed:7.2f} s  rows/s={len(cleaned_df) / elapsed:10.0f}  peak={peak / 1e6:8.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+
+    csv_bytes = make_csv(args.rows)
+    xlsx_bytes = make_xlsx(args.rows)
+
+    measure("csv", "bench.csv", csv_bytes)
+    measure("xlsx", "bench.xlsx", xlsx_bytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: PDF report rendering throughput for large flagged sets.
+
+Builds a synthetic result frame where every row is flagged, renders it with
+pdf_service.render_flagged_pdf (with and without the detail-row cap) and
+reports wall time, rows per second, output size and peak Python memory
+(tracemalloc, measured in a second run).
+
+Run from the repository root:
+    python -m benchmarks.bench_pdf_render --rows 50000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from app.services.pdf_service import render_flagged_pdf
+
+REASONS = [
+    "Large amount for merchant",
+    "Unusual hour",
+    "Foreign country",
+    "Online purchase",
+    "High-risk MCC",
+    "Rapid repeat transactions",
+]
+
+
+def make_frame(n: int) -> pd.DataFrame:
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    return pd.DataFrame({
+        "timestamp": [(start + timedelta(minutes=7 * i)).strftime("%Y-%m-%d %H:%M:%S") for i in range(n)],
+        "amount": [round(rng.uniform(1, 900), 2) for _ in range(n)],
+        "reasoning": [
+            f"{'; '.join(rng.sample(REASONS, 3))} (confidence={rng.uniform(0.5, 1):.2f})"
+            for _ in range(n)
+        ],
+    })
+
+
+def measure(label: str, df: pd.DataFrame, max_rows: int | None):
+    start = time.perf_counter()
+    pdf = render_flagged_pdf(df, max_rows=max_rows)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    render_flagged_pdf(df, max_rows=max_rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:8s} rows={len(df):8d}  time={elapsed:7.2f} s  rows/s={len(df) / elapsed:10.0f}  "
+        f"pdf={len(pdf) / 1e6:7.2f} MB  peak={peak / 1e6:8.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--cap", type=int, default=5000, help="detail-row cap for the capped run")
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    measure("capped", df, args.cap)
+    measure("full", df, None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: memory used by the model across CPU worker processes.
+
+Starts the CPU worker pool in a fresh interpreter for each configuration
+(spawn: every worker loads its own copy; forkserver with MODEL_PRELOAD:
+workers inherit one copy copy-on-write), reads the model's tree arrays in
+every worker, and reports per-worker RSS and PSS. PSS counts
+shared pages proportionally, so the PSS total is the memory really used
+(the forkserver process itself is not included).
+
+Linux only (PSS comes from /proc/self/smaps_rollup).
+
+Run from the repository root:
+    python -m benchmarks.bench_worker_memory --workers 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+CONFIGS = [
+    ("spawn", {"CPU_POOL_START_METHOD": "spawn", "MODEL_PRELOAD": "false"}),
+    ("forkserver+preload", {"CPU_POOL_START_METHOD": "forkserver", "MODEL_PRELOAD": "true"}),
+]
+
+
+def score_and_report(hold: float) -> dict:
+    # Runs in a worker: use the model, then hold the worker so each task gets its own
+    from app.core.startup import resident_memory
+    from app.services.model_service import load_model
+
+    pipeline, _, _, _ = load_model()
+    pipeline.named_steps["model"].estimators_[0].tree_.value.sum()
+    time.sleep(hold)
+    return resident_memory()
+
+
+def child(workers: int):
+    from app.core.executors import cpu_executor, shutdown_executors
+    from app.core.startup import resident_memory
+    # As app.main does; with MODEL_PRELOAD this also loads the model in this process
+    import app.services.model_service  # noqa: F401
+
+    pool = cpu_executor()
+    reports = [f.result() for f in [pool.submit(score_and_report, 1.0) for _ in range(workers)]]
+    reports.append(dict(resident_memory(), parent=True))
+    shutdown_executors()
+    print(json.dumps(reports))
+
+
+def run(name: str, env: dict, workers: int):
+    env = dict(os.environ, CPU_WORKERS=str(workers), **env)
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_worker_memory", "--child", "--workers", str(workers)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    elapsed = time.perf_counter() - start
+    reports = json.loads(out.stdout.strip().splitlines()[-1])
+    worker_reports = [r for r in reports if not r.get("parent")]
+    parent = next(r for r in reports if r.get("parent"))
+    pids = {r["pid"] for r in worker_reports}
+    pss = [r.get("pss_mb", 0.0) for r in worker_reports]
+    print(
+        f"{name:20s} workers={len(pids)}  rss/worker={max(r['rss_mb'] for r in worker_reports):6.1f} MB  "
+        f"pss/worker={max(pss):6.1f} MB  parent pss={parent.get('pss_mb', 0.0):6.1f} MB  "
+        f"total pss={sum(pss) + parent.get('pss_mb', 0.0):7.1f} MB  ({elapsed:.1f} s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.workers)
+        return
+    for name, env in CONFIGS:
+        run(name, env, args.workers)
+
+
+if __name__ == "__main__":
+    main()
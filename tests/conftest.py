@@ -0,0 +1,79 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from cryptography.fernet import Fernet
+
+REPO = Path(__file__).resolve().parent.parent
+
+# Settings are read when app modules are first imported, so the test
+# environment has to be in place before any test module imports them:
+# local storage + local KEK, and a throwaway working directory for
+# database.db (its path is relative) and the schema file.
+_workdir = Path(tempfile.mkdtemp(prefix="frauds-tests-"))
+atexit.register(shutil.rmtree, _workdir, ignore_errors=True)
+
+shutil.copy(REPO / "schema_mapping.json", _workdir / "schema_mapping.json")
+(_workdir / "local.key").write_bytes(Fernet.generate_key())
+
+os.environ.update({
+    "STORAGE_BACKEND": "local",
+    "LOCAL_STORAGE_ROOT": str(_workdir / "objects"),
+    "KEY_ENCRYPTION_BACKEND": "local",
+    "LOCAL_KEK_PATH": str(_workdir / "local.key"),
+    "SCHEMA_FILE_PATH": str(_workdir / "schema_mapping.json"),
+    "MODEL_PATH": str(REPO / "models" / "fraud_model.pkl"),
+    "CPU_WORKERS": "0",
+    "STARTUP_WARMUP": "false",
+})
+os.chdir(_workdir)
+sys.path.insert(0, str(REPO))
+
+from app.db.base_class import Base  # noqa: E402
+from app.db.session import engine  # noqa: E402
+import app.db.models  # noqa: E402,F401
+
+Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def scored_frame():
+    """A small scored result frame, as score_dataframe encodes it."""
+    rng = np.random.default_rng(7)
+    rows = 2500
+    is_fraud = rng.random(rows) < 0.1
+    anomaly = rng.random(rows) < 0.05
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=rows, freq="17min").astype(str),
+        "merchant": rng.choice(["Amazon", "Walmart", "Tim Hortons", "Shell", "AMAZON MKTP"], rows),
+        "amount": rng.gamma(2.0, 40.0, rows).round(2),
+        "mcc": rng.choice([5411, 5812, 5541, 5999], rows),
+        "city": rng.choice(["Toronto", "Montreal", "Vancouver"], rows),
+        "country": "CA",
+        "channel": rng.choice(["online", "pos"], rows),
+        "is_fraud": is_fraud.astype(int),
+        "anomaly_flag": anomaly.astype(int),
+        "fraud_confidence": rng.random(rows).round(4),
+        "anomaly_score": rng.normal(0, 0.1, rows).round(4),
+        # Ties on purpose: pagination must not skip or repeat tied rows
+        "review_priority": rng.integers(0, 200, rows) / 100,
+        "reasoning": np.where(is_fraud, "High amount (0.91)", ""),
+        "anomaly_reasoning": np.where(anomaly, "Unusual hour", ""),
+    })
+
+
+@pytest.fixture
+def stored_result(scored_frame):
+    """Key of `scored_frame` stored as an encrypted result."""
+    from app.core.local_storage import delete_key, write_encrypted_output
+    from app.services.frame_service import encode_result
+
+    key = write_encrypted_output(encode_result(scored_frame))
+    yield key
+    delete_key(key)
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.local_storage import delete_key
+from app.core.security import get_current_user
+from app.main import app
+from app.services import model_service
+from app.services.report_service import load_result_frame
+
+
+def _csv(rows: int) -> bytes:
+    times = pd.date_range("2024-01-01", periods=rows, freq="37min")
+    df = pd.DataFrame({
+        "time": times.strftime("%Y-%m-%d %H:%M:%S"),
+        "vendor": [["Amazon", "Shell", "Tim Hortons", "Walmart"][i % 4] for i in range(rows)],
+        "money": [round(5 + (i * 7.3) % 400, 2) for i in range(rows)],
+        "mc": [[5411, 5541, 5812][i % 3] for i in range(rows)],
+        "province": [["Toronto", "Ottawa", "Vancouver"][i % 3] for i in range(rows)],
+        "countries": ["CA"] * rows,
+        "source": [["POS", "ONLINE"][i % 2] for i in range(rows)],
+    })
+    return df.to_csv(index=False).encode()
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "analyst", "username": "analyst"}
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_analyze_scores_without_storing_the_upload(client, monkeypatch):
+    # Only the result is written; the cleaned upload stays in memory
+    stored = []
+    write = model_service.write_encrypted_output
+    monkeypatch.setattr(model_service, "write_encrypted_output",
+                        lambda data, **kw: stored.append(kw.get("prefix")) or write(data, **kw))
+
+    response = client.post("/analyze", files={"file": ("rbc.csv", _csv(300), "text/csv")})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["bank_name"] == "RBC"
+    assert body["cleaned_rows"] == 300
+    assert stored == ["flagged"]
+
+    try:
+        result = load_result_frame(body["result_key"])
+        assert len(result) == 300
+        assert {"is_fraud", "fraud_confidence", "review_priority"} <= set(result.columns)
+    finally:
+        delete_key(body["result_key"])
@@ -0,0 +1,68 @@
+import pytest
+
+from app.core import artifact_cache
+from app.core.artifact_cache import ArtifactCache, result_cache
+from app.services.result_query_service import get_result_index
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ArtifactCache(max_bytes=100, ttl_seconds=60)
+    cache.put("a", "A", 40)
+    cache.put("b", "B", 40)
+    assert cache.get("a") == "A"  # "b" is now the least recently used
+
+    cache.put("c", "C", 40)
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    metrics = cache.metrics()
+    assert metrics["bytes"] == 80 and metrics["entries"] == 2 and metrics["evictions"] == 1
+
+
+def test_replacing_an_entry_does_not_count_it_twice():
+    cache = ArtifactCache(max_bytes=100, ttl_seconds=60)
+    cache.put("a", "A1", 60)
+    cache.put("a", "A2", 70)
+    assert cache.get("a") == "A2"
+    assert cache.metrics()["bytes"] == 70 and cache.metrics()["evictions"] == 0
+
+
+def test_oversized_values_are_not_cached():
+    cache = ArtifactCache(max_bytes=100, ttl_seconds=60)
+    cache.put("a", "A", 40)
+    cache.put("big", "B", 101)
+    assert cache.get("big") is None and cache.get("a") == "A"
+
+
+def test_invalidate_drops_every_variant():
+    cache = ArtifactCache(max_bytes=100, ttl_seconds=60)
+    cache.put("a", "full", 30)
+    cache.put("a", "top", 10, variant=("amount", 5))
+    cache.put("b", "B", 10)
+    cache.invalidate("a")
+    assert cache.get_first("a", [None, ("amount", 5)]) == (None, None)
+    assert cache.metrics()["bytes"] == 10 and cache.metrics()["invalidations"] == 2
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(artifact_cache.time, "monotonic", lambda: now[0])
+    cache = ArtifactCache(max_bytes=100, ttl_seconds=10)
+    cache.put("a", "A", 40)
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.metrics()["bytes"] == 0 and cache.metrics()["expirations"] == 1
+
+
+@pytest.fixture
+def empty_result_cache():
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+
+def test_query_index_does_not_count_the_cached_frame_again(stored_result, empty_result_cache):
+    index = get_result_index(stored_result)
+    frame_bytes = int(index.df.memory_usage(deep=True).sum())
+    assert index.nbytes() < frame_bytes
+    # The full frame once, plus the index arrays
+    assert result_cache.metrics()["bytes"] == frame_bytes + index.nbytes()
@@ -0,0 +1,61 @@
+import pytest
+
+from app.services import schema_service
+from app.services.schema_service import BankSchema, detect_bank
+
+RBC = ["time", "vendor", "money", "mc", "province", "countries", "source"]
+SCOTIA = ["timestamp", "merchant", "amount", "mcc", "city", "country", "channel"]
+CANONICAL = ["timestamp", "merchant", "amount", "mcc", "city", "country", "channel"]
+
+
+@pytest.fixture
+def banks(monkeypatch):
+    schemas = {}
+
+    def register(**banks):
+        schemas.clear()
+        for name, columns in banks.items():
+            schemas[name] = BankSchema(name, dict(zip(CANONICAL, columns)))
+
+    monkeypatch.setattr(schema_service, "all_schemas", lambda: schemas)
+    register(RBC=RBC, Scotiabank=SCOTIA)
+    return register
+
+
+def test_exact_header_is_selected(banks):
+    result = detect_bank(list(reversed(RBC)))
+    assert result == {
+        "bank_name": "RBC",
+        "confidence": 1.0,
+        "exact": True,
+        "candidates": [{"bank_name": "RBC", "confidence": 1.0, "complete": True}],
+    }
+
+
+def test_extra_columns_still_select_the_bank(banks):
+    result = detect_bank(SCOTIA + ["memo", "balance"])
+    assert result["bank_name"] == "Scotiabank" and not result["exact"]
+    assert result["candidates"][0]["complete"]
+    assert result["confidence"] == pytest.approx(7 / 9, abs=1e-3)
+
+
+def test_header_differing_only_in_case_is_not_selected(banks):
+    # Same fingerprint, but the file can't be read under the mapped names
+    result = detect_bank([col.upper() for col in RBC])
+    assert result["bank_name"] is None and result["confidence"] == 0.0
+    top = result["candidates"][0]
+    assert top == {"bank_name": "RBC", "confidence": 1.0, "complete": False}
+
+
+def test_two_banks_with_the_same_columns_tie(banks):
+    banks(RBC=RBC, RBCCopy=RBC, Scotiabank=SCOTIA)
+    result = detect_bank(RBC)
+    assert result["bank_name"] is None
+    assert {c["bank_name"] for c in result["candidates"][:2]} == {"RBC", "RBCCopy"}
+    assert all(c["complete"] and c["confidence"] == 1.0 for c in result["candidates"][:2])
+
+
+def test_unknown_header(banks):
+    result = detect_bank(["date", "description", "debit"])
+    assert result["bank_name"] is None
+    assert all(c["confidence"] == 0.0 for c in result["candidates"])
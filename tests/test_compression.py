@@ -0,0 +1,56 @@
+import io
+
+import pytest
+
+from app.core import envelope, local_storage
+from app.core.local_storage import compression_metrics, load_decrypted, store_encrypted, write_encrypted_output
+from app.core.storage_backend import get_backend
+from app.services.frame_service import encode_result
+
+DATA = b"timestamp,merchant,amount\n" + b"2024-01-01 00:00:00,Amazon,12.50\n" * 20_000
+
+
+def _header(key: str) -> dict:
+    with get_backend().open(key) as fh:
+        return envelope.unpack(fh.read())[0]
+
+
+@pytest.mark.parametrize("name", ["gzip", "zstd", "none"])
+def test_round_trip_records_the_algorithm(monkeypatch, name):
+    monkeypatch.setattr(envelope.settings, "STORAGE_COMPRESSION", name)
+    key = store_encrypted(io.BytesIO(DATA), prefix="tests")
+    assert _header(key)["compression"] == name
+    assert load_decrypted(key) == DATA
+
+    stored = len(get_backend().get(key))
+    assert stored < len(DATA) / 5 if name != "none" else stored > len(DATA)
+
+
+def test_auto_prefers_zstd(monkeypatch):
+    monkeypatch.setattr(envelope.settings, "STORAGE_COMPRESSION", "auto")
+    assert envelope.default_compression() == "zstd"
+    monkeypatch.setattr(envelope, "zstandard", None)
+    assert envelope.default_compression() == "gzip"
+
+
+def test_objects_keep_their_algorithm_when_the_setting_changes(monkeypatch):
+    monkeypatch.setattr(envelope.settings, "STORAGE_COMPRESSION", "zstd")
+    key = store_encrypted(io.BytesIO(DATA), prefix="tests")
+    monkeypatch.setattr(envelope.settings, "STORAGE_COMPRESSION", "gzip")
+    assert load_decrypted(key) == DATA
+
+
+def test_parquet_results_are_not_compressed_again(scored_frame):
+    key = write_encrypted_output(encode_result(scored_frame), prefix="tests")
+    assert _header(key)["compression"] == "none"
+
+
+def test_totals_are_accumulated(monkeypatch):
+    monkeypatch.setattr(local_storage, "_compression_totals",
+                        {"artifacts": 0, "raw_bytes": 0, "stored_bytes": 0, "seconds": 0.0})
+    monkeypatch.setattr(envelope.settings, "STORAGE_COMPRESSION", "gzip")
+    for _ in range(2):
+        store_encrypted(io.BytesIO(DATA), prefix="tests")
+    totals = compression_metrics()
+    assert totals["artifacts"] == 2 and totals["raw_bytes"] == 2 * len(DATA)
+    assert totals["ratio"] > 5
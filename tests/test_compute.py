@@ -0,0 +1,43 @@
+import threading
+
+import threadpoolctl
+from joblib import parallel_config
+from joblib.parallel import get_active_backend
+
+from app.core import compute
+from app.core.compute import apply_process_limits, job_cores, job_limits
+from app.services.model_service import load_model
+
+
+def test_job_budget_is_per_thread():
+    seen = {}
+    barrier = threading.Barrier(2)
+
+    def job(cores):
+        with job_limits(cores), parallel_config(n_jobs=job_cores()):
+            barrier.wait()
+            seen[cores] = (job_cores(), get_active_backend()[1])
+
+    threads = [threading.Thread(target=job, args=(cores,)) for cores in (1, 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert seen == {1: (1, 1), 3: (3, 3)}
+    assert job_cores() == 1
+
+
+def test_shared_model_defers_n_jobs_to_the_job():
+    _, _, model, _ = load_model()
+    # None: each job's parallel_config applies instead of the pickled -1
+    assert model.n_jobs is None
+
+
+def test_process_limits_are_applied_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(compute, "_process_limits", None)
+    monkeypatch.setattr(threadpoolctl, "threadpool_limits", lambda limits: calls.append(limits) or object())
+    apply_process_limits(2)
+    apply_process_limits(4)
+    assert calls == [2]
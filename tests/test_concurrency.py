@@ -0,0 +1,93 @@
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.core.executors import call_cpu, run_cpu, shutdown_executors
+from app.main import app
+from app.services.export_service import render_export_file
+
+
+def spin(seconds: float) -> int:
+    # Pure-Python CPU work: holds the GIL of whichever process runs it
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+    return n
+
+
+def cache_budget() -> int:
+    from app.core.artifact_cache import result_cache
+    return result_cache.max_bytes
+
+
+@pytest.fixture
+def cpu_workers(monkeypatch):
+    monkeypatch.setattr(settings, "CPU_WORKERS", 1)
+    monkeypatch.setattr(settings, "CPU_POOL_START_METHOD", "spawn")
+    yield
+    shutdown_executors()
+
+
+def p99(samples: list[float]) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+async def _probe_while(job, samples: int = 200, interval: float = 0.005) -> list[float]:
+    """Latencies of GET / requests made while `job` is running."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/")  # not timed: first-request setup
+        latencies = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            response = await client.get("/")
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200
+            await asyncio.sleep(interval)
+        assert not job.done(), "job finished before the probes; make it slower"
+        return latencies
+
+
+def test_cpu_job_in_worker_does_not_block_the_event_loop(cpu_workers):
+    async def scenario():
+        # Start the worker (model load included) before timing anything
+        await run_cpu(spin, 0)
+        job = asyncio.create_task(run_cpu(spin, 4.0))
+        await asyncio.sleep(0.1)
+        latencies = await _probe_while(job)
+        assert await job > 0
+        return latencies
+
+    latencies = asyncio.run(scenario())
+    assert len(latencies) == 200
+    assert p99(latencies) < 0.05
+
+
+def test_slow_job_without_workers_does_not_block_the_event_loop():
+    # CPU_WORKERS=0: the job runs on an I/O thread, the event loop stays free
+    async def scenario():
+        job = asyncio.create_task(run_cpu(time.sleep, 4.0))
+        await asyncio.sleep(0.1)
+        latencies = await _probe_while(job)
+        await job
+        return latencies
+
+    assert p99(asyncio.run(scenario())) < 0.05
+
+
+def test_workers_keep_no_result_cache(cpu_workers):
+    assert asyncio.run(run_cpu(cache_budget)) == 0
+    assert cache_budget() > 0
+
+
+def test_blocking_calls_run_in_a_worker(cpu_workers, stored_result, tmp_path):
+    # As the export threads do: render in the worker process, not in the API process
+    assert call_cpu(os.getpid) != os.getpid()
+    path = call_cpu(render_export_file, stored_result, "pdf", tmp_path / "report.pdf")
+    assert open(path, "rb").read(4) == b"%PDF"
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import reader_service
+from app.services.frame_service import decode_handoff, encode_handoff
+from app.services.reader_service import parse_timestamps, read_bank_csv, read_canonical_csv
+
+RBC = {"timestamp": "time", "merchant": "vendor", "amount": "money", "mcc": "mc",
+       "city": "province", "country": "countries", "channel": "source"}
+
+CSV = (
+    "time,vendor,money,mc,province,countries,source,extra\n"
+    "2024-01-01 10:00:00,Amazon,12.50,5411,Toronto,CA,ONLINE,x\n"
+    "2024-01-02 11:30:00,\"Tim Hortons, King St\",3.25,5812,Ottawa,CA,POS,y\n"
+    "2024-01-03 09:15:00,Shell,,5541,,CA,POS,z\n"
+    "2024-01-04 22:00:00,Walmart,101,5411,Vancouver,US,ONLINE,\n"
+).encode()
+
+
+def _parsed(df):
+    # pyarrow reads missing text as None and the C engine as NaN; both are NA downstream
+    df = df.astype(object).where(df.notna(), np.nan).astype(df.dtypes.to_dict())
+    return df.assign(timestamp=parse_timestamps(df["timestamp"], cache_key=None))
+
+
+def _read(engine, monkeypatch, data=CSV):
+    monkeypatch.setattr(reader_service, "CSV_ENGINE", engine)
+    return _parsed(read_bank_csv(data, RBC))
+
+
+def test_pyarrow_engine_matches_the_c_engine(monkeypatch):
+    assert reader_service.CSV_ENGINE == "pyarrow"
+    fast = _read("pyarrow", monkeypatch)
+    reference = _read("c", monkeypatch)
+    pd.testing.assert_frame_equal(fast, reference)
+    assert list(fast.columns) == list(RBC)
+    assert fast["amount"].dtype == "float64" and fast["mcc"].dtype == "float64"
+    assert fast.loc[1, "merchant"] == "Tim Hortons, King St"
+
+
+def test_untyped_values_fall_back_to_inference_on_both_engines(monkeypatch):
+    dirty = CSV.replace(b",12.50,", b",$12.50,")
+    fast = _read("pyarrow", monkeypatch, dirty)
+    reference = _read("c", monkeypatch, dirty)
+    pd.testing.assert_frame_equal(fast, reference)
+    assert fast.loc[0, "amount"] == "$12.50"
+
+
+def test_handoff_keeps_the_schema():
+    df = _parsed(read_bank_csv(CSV, RBC))
+    data = encode_handoff(df)
+    assert data.startswith(b"ARROW1")
+    pd.testing.assert_frame_equal(_parsed(decode_handoff(data)), df)
+
+
+@pytest.mark.parametrize("decode", [decode_handoff, read_canonical_csv])
+def test_legacy_csv_handoff_is_still_read(decode):
+    df = _parsed(read_bank_csv(CSV, RBC))
+    legacy = df.to_csv(index=False).encode()
+    pd.testing.assert_frame_equal(_parsed(decode(legacy)), df)
@@ -0,0 +1,91 @@
+import os
+import secrets
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.models import ExportToken
+from app.db.session import SessionLocal
+from app.main import app
+from app.services.export_service import get_export_artifact
+
+CONTENT = b"timestamp,amount,reasoning\n" + b"2024-01-01 00:00:00,12.50,High amount\n" * 2000
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _token(path) -> str:
+    token = secrets.token_urlsafe(16)
+    with SessionLocal() as db:
+        db.add(ExportToken(token=token, user_id="u", file_path=str(path),
+                           expires_at=datetime.utcnow() + timedelta(minutes=5)))
+        db.commit()
+    return token
+
+
+@pytest.fixture
+def artifact_path(stored_result):
+    # Rendered and named the way export jobs do it
+    with SessionLocal() as db:
+        return get_export_artifact(db, stored_result, "pdf")
+
+
+@pytest.fixture
+def artifact(artifact_path):
+    return _token(artifact_path)
+
+
+@pytest.fixture
+def legacy_file(tmp_path):
+    path = tmp_path / "fraud_analysis_20240101_000000_abcd.csv"
+    path.write_bytes(CONTENT)
+    return _token(path)
+
+
+def test_artifact_has_strong_etag_and_resumes(client, artifact, artifact_path):
+    content = open(artifact_path, "rb").read()
+    full = client.get("/export/download", params={"token": artifact})
+    etag = full.headers["etag"]
+    assert full.content == content and not etag.startswith("W/")
+
+    part = client.get("/export/download", params={"token": artifact},
+                      headers={"Range": "bytes=100-", "If-Range": etag})
+    assert part.status_code == 206
+    assert part.content == content[100:]
+
+    cached = client.get("/export/download", params={"token": artifact}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+
+def test_fallback_etag_is_weak_and_never_resumes(client, legacy_file):
+    full = client.get("/export/download", params={"token": legacy_file})
+    etag = full.headers["etag"]
+    assert etag.startswith('W/"')
+
+    # Weak validators may still answer If-None-Match
+    cached = client.get("/export/download", params={"token": legacy_file}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    # ...but not If-Range: the whole file is sent instead of a range
+    part = client.get("/export/download", params={"token": legacy_file},
+                      headers={"Range": "bytes=100-", "If-Range": etag})
+    assert part.status_code == 200
+    assert part.content == CONTENT
+
+
+def test_rerendered_artifact_keeps_its_etag_and_bytes(client, artifact, artifact_path, stored_result):
+    full = client.get("/export/download", params={"token": artifact})
+
+    # e.g. another host without the file renders it again
+    os.unlink(artifact_path)
+    with SessionLocal() as db:
+        assert get_export_artifact(db, stored_result, "pdf") == artifact_path
+
+    part = client.get("/export/download", params={"token": artifact},
+                      headers={"Range": "bytes=100-", "If-Range": full.headers["etag"]})
+    assert part.status_code == 206
+    assert part.content == full.content[100:]
@@ -0,0 +1,95 @@
+import io
+import os
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+from app.core import envelope
+from app.core.local_storage import load_decrypted, store_encrypted
+
+CHUNK = 1024
+
+
+def _seal(data: bytes, compression: str = "none") -> bytes:
+    return b"".join(envelope.seal_stream([data], chunk_size=CHUNK, compression=compression))
+
+
+def _open(blob: bytes) -> bytes:
+    return b"".join(envelope.open_stream(io.BytesIO(blob)))
+
+
+def _frames(blob: bytes) -> tuple[bytes, list[bytes]]:
+    """Split a stream envelope into its head (prefix + header) and frames."""
+    _, _, header_len = envelope._PREFIX.unpack_from(blob)
+    pos = envelope._PREFIX.size + header_len
+    head, frames = blob[:pos], []
+    while pos < len(blob):
+        (length,) = envelope._FRAME_LEN.unpack_from(blob, pos)
+        end = pos + envelope._FRAME_LEN.size + length
+        frames.append(blob[pos:end])
+        pos = end
+    return head, frames
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"] + (["zstd"] if envelope.zstandard else []))
+@pytest.mark.parametrize("size", [0, 1, CHUNK, 5 * CHUNK + 17])
+def test_round_trip(compression, size):
+    data = os.urandom(size // 2) + b"a,b,c\n" * (size // 12)
+    assert _open(_seal(data, compression)) == data
+
+
+def test_store_and_load_round_trip():
+    data = b"timestamp,amount\n" + b"2024-01-01 00:00:00,12.5\n" * 100_000
+    key = store_encrypted(io.BytesIO(data), prefix="tests")
+    assert load_decrypted(key) == data
+
+
+def test_flipped_ciphertext_byte_is_rejected():
+    head, frames = _frames(_seal(os.urandom(3 * CHUNK)))
+    frame = bytearray(frames[1])
+    frame[envelope._FRAME_LEN.size + 10] ^= 0x01
+    frames[1] = bytes(frame)
+    with pytest.raises(InvalidTag):
+        _open(head + b"".join(frames))
+
+
+def test_modified_header_is_rejected():
+    # The header is authenticated as AAD of every frame
+    blob = _seal(os.urandom(3 * CHUNK))
+    head, frames = _frames(blob)
+    tampered = head.replace(b'"compression":"none"', b'"compression":"none" ')
+    tampered = envelope._PREFIX.pack(envelope.MAGIC, envelope.VERSION, len(tampered) - envelope._PREFIX.size) \
+        + tampered[envelope._PREFIX.size:]
+    with pytest.raises(InvalidTag):
+        _open(tampered + b"".join(frames))
+
+
+def test_reordered_frames_are_rejected():
+    head, frames = _frames(_seal(os.urandom(3 * CHUNK)))
+    frames[0], frames[1] = frames[1], frames[0]
+    with pytest.raises(InvalidTag):
+        _open(head + b"".join(frames))
+
+
+def test_dropped_final_frame_is_rejected():
+    head, frames = _frames(_seal(os.urandom(3 * CHUNK)))
+    with pytest.raises(ValueError, match="truncated"):
+        _open(head + b"".join(frames[:-1]))
+
+
+def test_cut_off_frame_is_rejected():
+    blob = _seal(os.urandom(3 * CHUNK))
+    with pytest.raises(ValueError, match="truncated"):
+        _open(blob[:-5])
+
+
+def test_data_after_final_frame_is_rejected():
+    with pytest.raises(ValueError, match="after final"):
+        _open(_seal(os.urandom(CHUNK)) + b"x")
+
+
+def test_frame_from_another_envelope_is_rejected():
+    head_a, frames_a = _frames(_seal(os.urandom(2 * CHUNK)))
+    _, frames_b = _frames(_seal(os.urandom(2 * CHUNK)))
+    with pytest.raises(InvalidTag):
+        _open(head_a + frames_b[0] + frames_a[1])
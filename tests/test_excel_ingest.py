@@ -0,0 +1,47 @@
+import functools
+import io
+
+import pandas as pd
+from openpyxl import Workbook
+
+from app.services import reader_service, upload_service
+from app.services.upload_service import parse_and_clean_upload
+
+HEADER = ["time", "vendor", "money", "mc", "province", "countries", "source", "memo"]
+
+
+def _rows(count: int) -> list[list]:
+    rows = []
+    for i in range(count):
+        amount = None if i % 11 == 0 else round(5 + (i * 7.3) % 400, 2)
+        rows.append([f"2024-01-{1 + i % 28:02d} {i % 24:02d}:15:00", ["Amazon", "Shell"][i % 2],
+                     amount, 5411, ["Toronto", "Ottawa"][i % 2], "CA", "POS", "note"])
+    # A duplicate row, removed once across chunks
+    rows.append(rows[3])
+    return rows
+
+
+def _xlsx(rows) -> bytes:
+    wb = Workbook()
+    ws = wb.active
+    ws.append(HEADER)
+    for row in rows:
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_excel_in_chunks_cleans_like_the_same_csv(monkeypatch):
+    monkeypatch.setattr(reader_service, "_timestamp_formats", {})
+    rows = _rows(250)
+    csv = pd.DataFrame(rows, columns=HEADER).to_csv(index=False).encode()
+
+    chunked = functools.partial(reader_service.iter_bank_excel, chunk_rows=40)
+    monkeypatch.setattr(upload_service.reader, "iter_bank_excel", chunked)
+
+    _, from_excel, _ = parse_and_clean_upload("bank.xlsx", _xlsx(rows), "RBC")
+    _, from_csv, _ = parse_and_clean_upload("bank.csv", csv, "RBC")
+
+    assert len(from_excel) == 250
+    pd.testing.assert_frame_equal(from_excel, from_csv)
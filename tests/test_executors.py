@@ -0,0 +1,26 @@
+import pytest
+
+from app.core.config import settings
+from app.core.executors import cpu_executor, shutdown_executors
+
+
+@pytest.fixture
+def cpu_pool_settings(monkeypatch):
+    monkeypatch.setattr(settings, "CPU_WORKERS", 1)
+
+    def configure(method: str, preload: bool):
+        monkeypatch.setattr(settings, "CPU_POOL_START_METHOD", method)
+        monkeypatch.setattr(settings, "MODEL_PRELOAD", preload)
+        return cpu_executor()._mp_context.get_start_method()
+
+    yield configure
+    shutdown_executors()
+
+
+def test_preload_never_forks_the_threaded_process(cpu_pool_settings):
+    assert cpu_pool_settings("fork", preload=True) == "forkserver"
+
+
+@pytest.mark.parametrize("method", ["spawn", "forkserver", "fork"])
+def test_start_method_is_kept_without_preload(cpu_pool_settings, method):
+    assert cpu_pool_settings(method, preload=False) == method
@@ -0,0 +1,141 @@
+import os
+import secrets
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.db.models import ExportArtifact, ExportJob, ExportToken
+from app.db.session import SessionLocal
+from app.services import export_service
+from app.services.export_service import (
+    artifact_id, artifact_refcount, create_export_token, get_export_artifact,
+    process_export_job, sweep_export_artifacts,
+)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    session.query(ExportArtifact).delete()
+    session.query(ExportToken).delete()
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    calls = []
+    render = export_service.call_cpu
+    monkeypatch.setattr(export_service, "call_cpu", lambda fn, *args: calls.append(args) or render(fn, *args))
+    return calls
+
+
+def _age(db, path, seconds):
+    db.query(ExportArtifact).filter(ExportArtifact.file_path == path).update(
+        {"last_used_at": datetime.utcnow() - timedelta(seconds=seconds)}
+    )
+    db.commit()
+
+
+def _token(db, path, minutes):
+    db.add(ExportToken(token=secrets.token_urlsafe(8), user_id="u", file_path=path,
+                       expires_at=datetime.utcnow() + timedelta(minutes=minutes)))
+    db.commit()
+
+
+def test_repeat_exports_reuse_the_file(db, stored_result, renders):
+    first = get_export_artifact(db, stored_result, "csv")
+    second = get_export_artifact(db, stored_result, "CSV")
+    assert first == second and len(renders) == 1
+    assert os.path.basename(first) == f"{artifact_id(stored_result, 'csv')}.csv"
+
+
+def test_missing_file_is_rendered_again(db, stored_result, renders):
+    path = get_export_artifact(db, stored_result, "csv")
+    os.unlink(path)
+    assert get_export_artifact(db, stored_result, "csv") == path
+    assert os.path.exists(path) and len(renders) == 2
+
+
+def test_pdf_id_includes_the_detail_row_cap(monkeypatch):
+    before = {fmt: artifact_id("flagged/x.bin", fmt) for fmt in ("csv", "pdf")}
+    monkeypatch.setattr(settings, "PDF_MAX_DETAIL_ROWS", 500)
+    assert artifact_id("flagged/x.bin", "pdf") != before["pdf"]
+    assert artifact_id("flagged/x.bin", "csv") == before["csv"]
+
+
+def test_refcount_counts_unexpired_tokens(db, stored_result):
+    path = get_export_artifact(db, stored_result, "csv")
+    assert artifact_refcount(db, path) == 0
+    _token(db, path, 5)
+    _token(db, path, 5)
+    _token(db, path, -5)
+    assert artifact_refcount(db, path) == 2
+
+
+def test_sweep_keeps_recent_and_referenced_artifacts(db, stored_result, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_ARTIFACT_GRACE_SECONDS", 60)
+    recent = get_export_artifact(db, stored_result, "csv")
+    referenced = get_export_artifact(db, None, "csv")
+    _age(db, referenced, 120)
+    _token(db, referenced, 5)
+
+    assert sweep_export_artifacts(db) == 0
+    assert os.path.exists(recent) and os.path.exists(referenced)
+
+
+def test_sweep_removes_unreferenced_artifacts_after_the_grace(db, stored_result, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_ARTIFACT_GRACE_SECONDS", 60)
+    path = get_export_artifact(db, stored_result, "csv")
+    _token(db, path, -1)  # expired tokens don't count
+    _age(db, path, 120)
+
+    assert sweep_export_artifacts(db) == 1
+    assert not os.path.exists(path)
+    assert db.query(ExportArtifact).count() == 0
+
+
+def test_sweep_rechecks_an_artifact_reused_after_its_query(db, stored_result, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_ARTIFACT_GRACE_SECONDS", 60)
+    path = get_export_artifact(db, stored_result, "csv")
+    _age(db, path, 120)
+
+    # A reuse and its token land between the sweep's query and its DELETE
+    execute = db.execute
+
+    def reuse_first(statement, *args, **kwargs):
+        with SessionLocal() as other:
+            assert get_export_artifact(other, stored_result, "csv", commit=False) == path
+            create_export_token(other, "u", path)
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db, "execute", reuse_first)
+    assert sweep_export_artifacts(db) == 0
+    assert os.path.exists(path)
+
+
+def test_reuse_after_a_sweep_renders_again(db, stored_result, renders, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_ARTIFACT_GRACE_SECONDS", 60)
+    path = get_export_artifact(db, stored_result, "csv")
+    _age(db, path, 120)
+    sweep_export_artifacts(db)
+
+    assert get_export_artifact(db, stored_result, "csv") == path
+    assert os.path.exists(path) and len(renders) == 2
+
+
+def test_job_records_file_and_token_together(db, stored_result, monkeypatch):
+    monkeypatch.setattr(export_service, "send_export_email", lambda *args: None)
+    job = ExportJob(user_id="u", format="csv", source_key=stored_result, status="running")
+    db.add(job)
+    db.commit()
+
+    process_export_job(db, job)
+    db.expire_all()
+    job = db.get(ExportJob, job.id)
+    assert job.file_path and job.token
+    assert artifact_refcount(db, job.file_path) == 1
+    db.delete(job)
+    db.commit()
@@ -0,0 +1,194 @@
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.db.models import ExportJob
+from app.db.session import SessionLocal
+from app.services import export_queue
+from app.services.export_queue import ExportWorkerPool
+from app.services import export_service
+from app.services.export_service import enqueue_export, get_export_artifact
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    session.query(ExportJob).delete()
+    session.commit()
+    yield session
+    session.close()
+
+
+def _job(db, **values) -> str:
+    job = ExportJob(user_id=f"user-{uuid.uuid4()}", format="csv", status="queued", **values)
+    db.add(job)
+    db.commit()
+    return job.id
+
+
+def _reload(db, job_id) -> ExportJob:
+    db.expire_all()
+    return db.get(ExportJob, job_id)
+
+
+def test_duplicate_requests_are_coalesced(db):
+    first, coalesced = enqueue_export(db, "user-a", None, "csv")
+    assert not coalesced
+    second, coalesced = enqueue_export(db, "user-a", None, "csv")
+    assert coalesced and second.id == first.id
+    other, coalesced = enqueue_export(db, "user-a", None, "pdf")
+    assert not coalesced and other.id != first.id
+
+
+def test_racing_insert_returns_the_existing_job(db, monkeypatch):
+    # Both requests miss the lookup; the unique index rejects the second insert
+    first, _ = enqueue_export(db, "user-b", None, "csv")
+    lookup = export_service._active_export_job
+    misses = iter([None])
+    monkeypatch.setattr(export_service, "_active_export_job", lambda *args: next(misses, None) or lookup(*args))
+
+    second, coalesced = enqueue_export(db, "user-b", None, "csv")
+    assert coalesced and second.id == first.id
+    assert db.query(ExportJob).filter(ExportJob.user_id == "user-b").count() == 1
+
+
+def test_concurrent_requests_create_one_job(db):
+    results = []
+    barrier = threading.Barrier(8)
+
+    def request():
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            job, coalesced = enqueue_export(session, "user-c", None, "pdf")
+            results.append((job.id, coalesced))
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({job_id for job_id, _ in results}) == 1
+    assert sum(not coalesced for _, coalesced in results) == 1
+
+
+def test_finished_jobs_do_not_block_a_new_one(db):
+    first, _ = enqueue_export(db, "user-d", None, "csv")
+    first.status = "done"
+    db.commit()
+    second, coalesced = enqueue_export(db, "user-d", None, "csv")
+    assert not coalesced and second.id != first.id
+
+
+def test_artifact_is_rendered_through_the_cpu_pool(db, monkeypatch):
+    calls = []
+    monkeypatch.setattr(export_service, "call_cpu", lambda fn, *args: calls.append(fn) or fn(*args))
+    path = get_export_artifact(db, None, "csv")
+    assert calls == [export_service.render_export_file]
+    assert os.path.exists(path)
+
+
+def test_claim_takes_a_lease(db):
+    job_id = _job(db)
+    pool = ExportWorkerPool(workers=1, poll_seconds=0.01)
+
+    assert pool._claim_next() == job_id
+    job = _reload(db, job_id)
+    assert job.status == "running"
+    assert job.attempts == 1
+    assert job.lease_expires_at > datetime.utcnow()
+
+    # Leased: nobody else gets it
+    assert pool._claim_next() is None
+
+
+def test_expired_lease_is_reclaimed(db):
+    job_id = _job(db)
+    pool = ExportWorkerPool(workers=1, poll_seconds=0.01)
+    assert pool._claim_next() == job_id
+
+    # The worker holding it died
+    job = _reload(db, job_id)
+    job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+    assert pool._claim_next() == job_id
+    assert _reload(db, job_id).attempts == 2
+
+
+def test_job_not_due_yet_is_not_claimed(db):
+    _job(db, next_attempt_at=datetime.utcnow() + timedelta(minutes=5))
+    assert ExportWorkerPool(workers=1, poll_seconds=0.01)._claim_next() is None
+
+
+def test_concurrent_claims_never_share_a_job(db):
+    job_ids = {_job(db) for _ in range(20)}
+    pools = [ExportWorkerPool(workers=2, poll_seconds=0.01) for _ in range(4)]
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(pool):
+        while True:
+            job_id = pool._claim_next()
+            if job_id is None:
+                return
+            with lock:
+                claimed.append(job_id)
+
+    threads = [threading.Thread(target=worker, args=(pool,)) for pool in pools for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(job_ids)
+
+
+def test_failed_attempts_back_off_then_fail(db, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "EXPORT_RETRY_BASE_SECONDS", 5)
+
+    def broken(db, job):
+        raise RuntimeError("SES unavailable")
+
+    monkeypatch.setattr(export_queue, "process_export_job", broken)
+    job_id = _job(db)
+    pool = ExportWorkerPool(workers=1, poll_seconds=0.01)
+
+    for attempt, delay in [(1, 5), (2, 10)]:
+        assert pool._claim_next() == job_id
+        before = datetime.utcnow()
+        pool._execute(job_id)
+        job = _reload(db, job_id)
+        assert job.status == "queued"
+        assert job.attempts == attempt
+        assert job.last_error == "SES unavailable"
+        assert job.lease_expires_at is None
+        assert before + timedelta(seconds=delay - 1) <= job.next_attempt_at <= before + timedelta(seconds=delay + 1)
+        # Make the retry due now
+        job.next_attempt_at = datetime.utcnow()
+        db.commit()
+
+    assert pool._claim_next() == job_id
+    pool._execute(job_id)
+    job = _reload(db, job_id)
+    assert job.status == "failed"
+    assert job.attempts == 3
+
+
+def test_successful_job_is_done(db, monkeypatch):
+    monkeypatch.setattr(export_queue, "process_export_job", lambda db, job: None)
+    job_id = _job(db)
+    pool = ExportWorkerPool(workers=1, poll_seconds=0.01)
+    assert pool._claim_next() == job_id
+    pool._execute(job_id)
+    job = _reload(db, job_id)
+    assert job.status == "done"
+    assert job.lease_expires_at is None
@@ -0,0 +1,115 @@
+import io
+import os
+
+import pytest
+from cryptography.fernet import Fernet
+
+from app.core import envelope
+from app.core.envelope import KmsKeyEncryptor
+from app.core.local_storage import load_decrypted
+from app.core.storage_backend import get_backend
+
+DATA = b"timestamp,amount\n" + b"2024-01-01 00:00:00,12.5\n" * 1000
+
+
+class FakeKms:
+    """KMS stand-in: 'wraps' a data key by prefixing a random id."""
+
+    def __init__(self):
+        self.encrypts = 0
+        self.decrypts = 0
+        self._keys = {}
+
+    def encrypt(self, KeyId, Plaintext):
+        self.encrypts += 1
+        blob = os.urandom(8)
+        self._keys[blob] = Plaintext
+        return {"CiphertextBlob": blob}
+
+    def decrypt(self, CiphertextBlob):
+        self.decrypts += 1
+        return {"Plaintext": self._keys[CiphertextBlob]}
+
+
+@pytest.fixture
+def kms(monkeypatch):
+    fake = FakeKms()
+    monkeypatch.setattr(KmsKeyEncryptor, "_kms", lambda self: fake)
+    return fake
+
+
+def _use_kms(monkeypatch, **options) -> KmsKeyEncryptor:
+    encryptor = KmsKeyEncryptor("alias/test", **options)
+    monkeypatch.setitem(envelope._encryptors, "kms", encryptor)
+    monkeypatch.setattr(envelope.settings, "KEY_ENCRYPTION_BACKEND", "kms")
+    return encryptor
+
+
+def _seal(data: bytes = DATA) -> bytes:
+    return b"".join(envelope.seal_stream([data]))
+
+
+def _open(blob: bytes) -> bytes:
+    return b"".join(envelope.open_stream(io.BytesIO(blob)))
+
+
+def test_legacy_two_object_layout_is_read():
+    key = f"legacy/{os.urandom(8).hex()}.bin"
+    fernet_key = Fernet.generate_key()
+    get_backend().put(key, io.BytesIO(Fernet(fernet_key).encrypt(DATA)))
+    get_backend().put(f"{key}.key", io.BytesIO(fernet_key))
+    assert load_decrypted(key) == DATA
+
+
+def test_fernet_envelope_is_read():
+    key = f"legacy/{os.urandom(8).hex()}.bin"
+    get_backend().put(key, io.BytesIO(envelope.seal(DATA)))
+    assert load_decrypted(key) == DATA
+    assert envelope.open_envelope(envelope.seal(DATA)) == DATA
+
+
+def test_unwrapped_keys_are_cached(kms, monkeypatch):
+    encryptor = _use_kms(monkeypatch, cache_seconds=60, cache_size=2)
+    blobs = [_seal() for _ in range(3)]
+    assert kms.encrypts == 3
+
+    # Keys wrapped in this process are already cached
+    assert _open(blobs[2]) == DATA and kms.decrypts == 0
+    # The oldest was evicted (cache_size=2): one Decrypt, then cached
+    assert _open(blobs[0]) == DATA and _open(blobs[0]) == DATA
+    assert kms.decrypts == 1
+
+    encryptor._cache.clear()
+    monkeypatch.setattr(encryptor, "cache_seconds", 0)
+    for _ in range(2):
+        _open(blobs[1])
+    assert kms.decrypts == 3
+
+
+def test_write_key_is_reused_up_to_max_uses(kms, monkeypatch):
+    _use_kms(monkeypatch, reuse_seconds=60, max_uses=3)
+    blobs = [_seal() for _ in range(7)]
+    assert kms.encrypts == 3
+    assert len({envelope.unpack(blob)[0]["wrapped_key"] for blob in blobs}) == 3
+    # Objects sharing a key still get their own nonces
+    assert len({envelope.unpack(blob)[0]["nonce_prefix"] for blob in blobs}) == 7
+    assert all(_open(blob) == DATA for blob in blobs)
+
+
+def test_write_key_expires(kms, monkeypatch):
+    _use_kms(monkeypatch, reuse_seconds=60, max_uses=100)
+    now = [1000.0]
+    monkeypatch.setattr(envelope.time, "monotonic", lambda: now[0])
+    for _ in range(2):
+        _seal()
+    assert kms.encrypts == 1
+    now[0] += 61
+    _seal()
+    assert kms.encrypts == 2
+
+
+def test_write_key_reuse_can_be_disabled(kms, monkeypatch):
+    _use_kms(monkeypatch, reuse_seconds=0, max_uses=100)
+    for _ in range(2):
+        _seal()
+    assert kms.encrypts == 2
@@ -0,0 +1,81 @@
+import base64
+import re
+import time
+import zlib
+
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.services.pdf_service import render_flagged_pdf
+from app.services.report_service import convert_frame_to_pdf
+
+REASON = "High amount; New merchant (confidence=0.9)"
+
+
+def _frame(rows: int, flagged_every: int = 2) -> pd.DataFrame:
+    return pd.DataFrame({
+        "timestamp": [f"2024-01-{1 + i // 1440:02d} {i // 60 % 24:02d}:{i % 60:02d}:00" for i in range(rows)],
+        "amount": [10.0 + i for i in range(rows)],
+        "reasoning": [REASON if i % flagged_every == 0 else "" for i in range(rows)],
+    })
+
+
+def _text(pdf: bytes) -> str:
+    """Text drawn on the pages (content streams are ASCII85 + Flate encoded)."""
+    streams = re.findall(rb"stream\r?\n(.*?)~>\s*endstream", pdf, re.S)
+    content = b"\n".join(zlib.decompress(base64.a85decode(s.replace(b"\n", b""))) for s in streams)
+    return "\n".join(m.decode("latin-1") for m in re.findall(rb"\((.*?)\) Tj", content))
+
+
+def _listed_rows(text: str) -> int:
+    return len(re.findall(r"^2024-01-\d\d \d\d:\d\d:00$", text, re.M))
+
+
+def test_only_flagged_rows_are_listed():
+    text = _text(render_flagged_pdf(_frame(300)))
+    assert _listed_rows(text) == 150
+    assert "Truncated" not in text
+    assert "Flagged rows" in text and "150" in text
+
+
+def test_detail_is_capped_with_a_note():
+    text = _text(render_flagged_pdf(_frame(300), max_rows=20))
+    assert _listed_rows(text) == 20
+    assert "Detail is limited to the 20 highest-priority flagged rows." in text
+    assert "130 more are not listed" in text
+    assert "20 \\(truncated\\)" in text
+
+
+def test_export_setting_caps_the_detail(monkeypatch):
+    monkeypatch.setattr(settings, "PDF_MAX_DETAIL_ROWS", 5)
+    assert _listed_rows(_text(convert_frame_to_pdf(_frame(100)))) == 5
+
+
+def test_column_iterators_render_like_a_frame():
+    df = _frame(120)
+    columns = {col: iter(df[col].tolist()) for col in df.columns}
+    assert _text(render_flagged_pdf(columns)) == _text(render_flagged_pdf(df))
+
+
+def test_no_flagged_rows():
+    text = _text(render_flagged_pdf(_frame(10, flagged_every=10**6).iloc[1:]))
+    assert "No flagged results found" in text and _listed_rows(text) == 0
+
+
+def test_unbreakable_reasoning_is_wrapped():
+    df = _frame(3, flagged_every=1).assign(reasoning="x" * 2000)
+    assert render_flagged_pdf(df).startswith(b"%PDF")
+
+
+def test_missing_columns_are_rejected():
+    with pytest.raises(ValueError, match="Required columns"):
+        render_flagged_pdf(pd.DataFrame({"timestamp": ["2024-01-01"]}))
+
+
+def test_renders_are_byte_identical():
+    # Artifacts are served with a strong ETag derived from their id, so a
+    # re-render (on another host, or a concurrent one) must not change a byte
+    first = render_flagged_pdf(_frame(100))
+    time.sleep(1.1)
+    assert render_flagged_pdf(_frame(100)) == first
@@ -0,0 +1,44 @@
+import uuid
+from datetime import datetime, timedelta
+
+from app.core.local_storage import delete_key, write_encrypted_output
+from app.core.result_catalog import latest_result_for_user, list_results, record_result
+from app.db.models import ResultCatalog
+from app.db.session import SessionLocal
+
+
+def _record(user_id: str, minutes_ago: int) -> str:
+    key = f"flagged/{uuid.uuid4().hex}.bin"
+    record_result(key, user_id=user_id, bank_name="RBC", row_count=10)
+    with SessionLocal() as db:
+        db.get(ResultCatalog, key).created_at = datetime.utcnow() - timedelta(minutes=minutes_ago)
+        db.commit()
+    return key
+
+
+def test_latest_and_listing_are_per_user():
+    user, other = f"user-{uuid.uuid4()}", f"user-{uuid.uuid4()}"
+    old = _record(user, 30)
+    new = _record(user, 5)
+    _record(other, 1)
+
+    with SessionLocal() as db:
+        assert latest_result_for_user(db, user).key == new
+        assert [row.key for row in list_results(db, user)] == [new, old]
+        assert [row.key for row in list_results(db, user, limit=1, offset=1)] == [old]
+        assert latest_result_for_user(db, f"user-{uuid.uuid4()}") is None
+
+
+def test_stored_results_are_catalogued_and_removed():
+    user = f"user-{uuid.uuid4()}"
+    key = write_encrypted_output(b"PAR1 not really parquet", catalog={
+        "user_id": user, "bank_name": "TD", "row_count": 3, "flagged_count": 1,
+        "anomaly_count": 2, "model_version": "abc",
+    })
+    with SessionLocal() as db:
+        row = latest_result_for_user(db, user)
+        assert row.key == key and row.flagged_count == 1 and row.model_version == "abc"
+
+    delete_key(key)
+    with SessionLocal() as db:
+        assert latest_result_for_user(db, user) is None
@@ -0,0 +1,48 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.services.frame_service import (
+    RESULT_ROW_GROUP_SIZE, decode_result, encode_result, result_to_csv,
+)
+
+
+def test_round_trip_keeps_rows_and_dtypes(scored_frame):
+    df = decode_result(encode_result(scored_frame))
+    expected = scored_frame.sort_values("review_priority", ascending=False).reset_index(drop=True)
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_rows_are_grouped_by_priority(scored_frame):
+    pf = pq.ParquetFile(pa.BufferReader(encode_result(scored_frame)))
+    assert pf.num_row_groups == -(-len(scored_frame) // RESULT_ROW_GROUP_SIZE)
+    priorities = pf.read(columns=["review_priority"]).column(0).to_pylist()
+    assert priorities == sorted(priorities, reverse=True)
+
+
+def test_columns_are_projected(scored_frame):
+    df = decode_result(encode_result(scored_frame), columns=["merchant", "amount", "missing"])
+    assert list(df.columns) == ["merchant", "amount"]
+    assert len(df) == len(scored_frame)
+
+
+def test_top_n_spans_row_groups(scored_frame):
+    top_n = RESULT_ROW_GROUP_SIZE + 10
+    df = decode_result(encode_result(scored_frame), columns=["review_priority"], top_n=top_n)
+    expected = scored_frame["review_priority"].sort_values(ascending=False).head(top_n)
+    assert df["review_priority"].tolist() == expected.tolist()
+
+
+def test_top_n_without_the_footer_index(scored_frame):
+    # Parquet results written without an index fall back to the row group metadata
+    sink = pa.BufferOutputStream()
+    pq.write_table(pa.Table.from_pandas(scored_frame.head(30), preserve_index=False), sink, row_group_size=8)
+    df = decode_result(sink.getvalue().to_pybytes(), top_n=10)
+    pd.testing.assert_frame_equal(df, scored_frame.head(10))
+
+
+def test_legacy_csv_results_are_read(scored_frame):
+    legacy = result_to_csv(scored_frame)
+    df = decode_result(legacy, columns=["merchant", "amount"], top_n=5)
+    assert list(df.columns) == ["merchant", "amount"]
+    assert df["merchant"].tolist() == scored_frame["merchant"].head(5).tolist()
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from app.services.result_query_service import query_result_rows
+
+
+def _page_through(key, limit=97, **query) -> tuple[list[dict], int]:
+    rows, cursor, total = [], None, None
+    while True:
+        page = query_result_rows(key, limit=limit, cursor=cursor, **query)
+        assert total is None or page["total"] == total
+        total = page["total"]
+        rows.extend(page["rows"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return rows, total
+
+
+def _keys(rows) -> list[tuple]:
+    return [(row["timestamp"], row["merchant"], row["amount"]) for row in rows]
+
+
+@pytest.mark.parametrize("sort", ["-review_priority", "review_priority", "-amount", "amount"])
+def test_pages_cover_every_row_once(stored_result, scored_frame, sort):
+    rows, total = _page_through(stored_result, sort=sort)
+    assert total == len(scored_frame) == len(rows)
+    assert len(set(_keys(rows))) == len(rows)
+
+    column = sort.lstrip("-")
+    values = [row[column] for row in rows]
+    assert values == sorted(values, reverse=sort.startswith("-"))
+
+
+def test_filters_apply_across_pages(stored_result, scored_frame):
+    start, end = datetime(2024, 1, 3), datetime(2024, 1, 10)
+    rows, total = _page_through(
+        stored_result, limit=10, is_fraud=True, merchant="amazon", start=start, end=end,
+    )
+
+    timestamps = pd.to_datetime(scored_frame["timestamp"])
+    expected = scored_frame[
+        (scored_frame["is_fraud"] == 1)
+        & scored_frame["merchant"].str.lower().str.contains("amazon")
+        & (timestamps >= start) & (timestamps < end)
+    ]
+    assert 0 < total == len(expected)
+    assert sorted(_keys(rows)) == sorted(_keys(expected.to_dict("records")))
+
+
+def test_columns_are_projected(stored_result):
+    page = query_result_rows(stored_result, limit=5, columns=["merchant", "amount"])
+    assert all(set(row) == {"merchant", "amount"} for row in page["rows"])
+    with pytest.raises(ValueError, match="Unknown columns"):
+        query_result_rows(stored_result, columns=["nope"])
+
+
+def test_bad_cursors_are_rejected(stored_result):
+    cursor = query_result_rows(stored_result, limit=5)["next_cursor"]
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        query_result_rows(stored_result, cursor="not-a-cursor")
+    # A cursor only continues the query it was issued for
+    with pytest.raises(ValueError, match="does not match"):
+        query_result_rows(stored_result, cursor=cursor, is_fraud=True)
+    with pytest.raises(ValueError, match="does not match"):
+        query_result_rows(stored_result, cursor=cursor, sort="amount")
+
+
+def test_invalid_sort_is_rejected(stored_result):
+    with pytest.raises(ValueError, match="sort must be one of"):
+        query_result_rows(stored_result, sort="merchant")
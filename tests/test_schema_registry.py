@@ -0,0 +1,124 @@
+import json
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.db.models import BankSchemaRecord, SchemaRevision
+from app.db.session import SessionLocal
+from app.services.schema_service import DbSchemaRegistry, FileSchemaRegistry
+
+SEED = Path("schema_mapping.json")
+RBC = json.loads(SEED.read_text())["RBC"]["mapping"]
+
+
+def _mapping(**changes) -> dict:
+    return dict(RBC, **changes)
+
+
+@pytest.fixture
+def db_registries():
+    with SessionLocal() as db:
+        db.query(BankSchemaRecord).delete()
+        db.query(SchemaRevision).delete()
+        db.commit()
+    # Two replicas sharing the database, checking it on every lookup
+    return DbSchemaRegistry(SEED, refresh_seconds=0), DbSchemaRegistry(SEED, refresh_seconds=0)
+
+
+def test_db_registry_seeds_from_file(db_registries):
+    a, _ = db_registries
+    assert set(a.schemas()) == {"RBC", "Scotiabank"}
+    assert a.schemas()["RBC"].mapping == RBC
+
+
+def test_db_save_is_seen_by_other_replica(db_registries):
+    a, b = db_registries
+    assert b.schemas()["Scotiabank"].mapping["amount"] == "amount"
+
+    # Leaves RBC at version 2 and Scotiabank at version 1...
+    a.save("RBC", _mapping(amount="amt"))
+    assert b.schemas()["RBC"].mapping["amount"] == "amt"
+
+    # ...so this save doesn't change max(version) or the row count
+    scotia = dict(b.schemas()["Scotiabank"].mapping, amount="value")
+    a.save("Scotiabank", scotia)
+    assert b.schemas()["Scotiabank"].mapping["amount"] == "value"
+
+
+def test_db_new_bank_is_seen_by_other_replica(db_registries):
+    a, b = db_registries
+    b.schemas()
+    a.save("TD", _mapping(amount="debit"))
+    assert b.schemas()["TD"].mapping["amount"] == "debit"
+
+
+def test_db_concurrent_saves_bump_revision_once_each(db_registries):
+    a, b = db_registries
+    a.schemas()
+    with SessionLocal() as db:
+        start = a._db_version(db)[0]
+
+    threads = [
+        threading.Thread(target=(a if i % 2 else b).save, args=(f"Bank{i}", _mapping(amount=f"a{i}")))
+        for i in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with SessionLocal() as db:
+        assert a._db_version(db)[0] == start + 6
+    assert {f"Bank{i}" for i in range(6)} <= set(b.schemas())
+
+
+def test_db_refresh_interval_is_respected(db_registries):
+    a, _ = db_registries
+    cached = DbSchemaRegistry(SEED, refresh_seconds=3600)
+    cached.schemas()
+    a.save("RBC", _mapping(amount="amt"))
+    assert cached.schemas()["RBC"].mapping["amount"] == "money"
+    cached._checked_at = 0.0
+    assert cached.schemas()["RBC"].mapping["amount"] == "amt"
+
+
+@pytest.fixture
+def schema_file(tmp_path):
+    path = tmp_path / "schema_mapping.json"
+    shutil.copy(SEED, path)
+    return path
+
+
+def test_file_save_is_seen_by_other_registry(schema_file):
+    a, b = FileSchemaRegistry(schema_file), FileSchemaRegistry(schema_file)
+    assert b.schemas()["RBC"].mapping == RBC
+    a.save("RBC", _mapping(amount="amt"))
+    assert b.schemas()["RBC"].mapping["amount"] == "amt"
+
+
+def test_file_concurrent_saves_keep_every_bank(schema_file):
+    registries = [FileSchemaRegistry(schema_file) for _ in range(3)]
+    threads = [
+        threading.Thread(target=registries[i % 3].save, args=(f"Bank{i}", _mapping(amount=f"a{i}")))
+        for i in range(12)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    schemas = FileSchemaRegistry(schema_file).schemas()
+    assert {f"Bank{i}" for i in range(12)} | {"RBC", "Scotiabank"} == set(schemas)
+    assert all(schemas[f"Bank{i}"].mapping["amount"] == f"a{i}" for i in range(12))
+
+
+def test_validated_mapping_is_a_copy(monkeypatch, schema_file):
+    from app.services import schema_service
+    from app.services.upload_service import validate_schema_header
+
+    monkeypatch.setattr(schema_service, "_registry", FileSchemaRegistry(schema_file))
+    mapping = validate_schema_header(list(RBC.values()), "RBC")
+    mapping["amount"] = "changed"
+    assert schema_service.get_bank_schema("RBC").mapping["amount"] == "money"
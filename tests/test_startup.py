@@ -0,0 +1,88 @@
+import asyncio
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import startup
+from app.core.config import settings
+from app.core.startup import startup_state
+from app.main import app
+
+SECRET = "AccessDenied for arn:aws:kms:ca-central-1:123456789012:key/secret"
+
+
+@pytest.fixture
+def flaky_warm_up(monkeypatch):
+    """Make the warm-up fail `failures` times, then succeed."""
+    monkeypatch.setattr(settings, "STARTUP_WARMUP_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "STARTUP_WARMUP_RETRY_SECONDS", 0.01)
+    calls = []
+
+    def install(failures: int):
+        async def warm_up_once():
+            calls.append(1)
+            if len(calls) <= failures:
+                raise PermissionError(SECRET)
+        monkeypatch.setattr(startup, "_warm_up_once", warm_up_once)
+        return calls
+
+    startup_state.reset()
+    yield install
+    startup_state.reset()
+
+
+def test_warm_up_retries_until_it_succeeds(flaky_warm_up):
+    calls = flaky_warm_up(failures=2)
+    asyncio.run(startup.warm_up())
+    assert len(calls) == 3
+    assert startup_state.ready
+    assert startup_state.status()["error"] is None
+
+
+def test_failed_warm_up_does_not_leak_details(flaky_warm_up):
+    calls = flaky_warm_up(failures=10)
+    asyncio.run(startup.warm_up())
+    assert len(calls) == 3
+    assert not startup_state.ready
+
+    response = TestClient(app).get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["error"] == "warm-up failed (PermissionError)"
+    assert "arn:aws" not in response.text
+
+
+@pytest.fixture
+def bare_logging(monkeypatch):
+    """
+    Logging as uvicorn leaves it: no root handlers, app logger unset.
+    (Call it in the test body: pytest adds its capture handler after setup.)
+    """
+    def install():
+        monkeypatch.setattr(logging.getLogger(), "handlers", [])
+        monkeypatch.setattr(app_logger, "handlers", [])
+        monkeypatch.setattr(app_logger, "level", logging.NOTSET)
+        return app_logger
+
+    app_logger = logging.getLogger("app")
+    return install
+
+
+def test_configure_logging_emits_app_info(bare_logging, capsys):
+    app_logger = bare_logging()
+    startup.configure_logging()
+    startup.configure_logging()
+
+    assert len(app_logger.handlers) == 1
+    with startup_state.phase("example"):
+        pass
+    assert "Startup phase example took" in capsys.readouterr().err
+
+
+def test_configure_logging_defers_to_configured_root(bare_logging, monkeypatch):
+    app_logger = bare_logging()
+    monkeypatch.setattr(logging.getLogger(), "handlers", [logging.NullHandler()])
+    startup.configure_logging()
+
+    assert app_logger.handlers == []
+    assert logging.getLogger("app.core.startup").isEnabledFor(logging.INFO)
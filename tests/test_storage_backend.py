@@ -0,0 +1,69 @@
+import hashlib
+import io
+import mmap
+
+import pytest
+
+from app.core import storage_backend
+from app.core.storage_backend import LocalBackend, S3Backend, get_backend
+
+
+class _Failing(io.RawIOBase):
+    """Yields some data, then fails as an interrupted upload would."""
+
+    def __init__(self):
+        self._sent = False
+
+    def readable(self):
+        return True
+
+    def read(self, n=-1):
+        if self._sent:
+            raise ConnectionError("client went away")
+        self._sent = True
+        return b"partial"
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return LocalBackend(str(tmp_path))
+
+
+def test_objects_are_sharded_by_key_hash(backend, tmp_path):
+    backend.put("flagged/x.bin", io.BytesIO(b"data"))
+    digest = hashlib.sha256(b"flagged/x.bin").hexdigest()
+    assert (tmp_path / digest[:2] / digest[2:4] / "flagged%2Fx.bin").read_bytes() == b"data"
+
+
+def test_reads_are_memory_mapped(backend):
+    backend.put("k", io.BytesIO(b"abc" * 1000))
+    fh = backend.open("k")
+    try:
+        assert isinstance(fh, mmap.mmap)
+        assert fh.read(3) == b"abc"
+    finally:
+        fh.close()
+
+
+def test_failed_write_keeps_the_previous_object(backend):
+    backend.put("k", io.BytesIO(b"old"))
+    with pytest.raises(ConnectionError):
+        backend.put("k", _Failing())
+    assert backend.get("k") == b"old"
+    # No temp files left behind, and none are listed
+    assert [obj["Key"] for obj in backend.list("")] == ["k"]
+    assert not list(backend.root.glob("*/*/.tmp-*"))
+
+
+@pytest.mark.parametrize("name, cls", [("local", LocalBackend), ("s3", S3Backend)])
+def test_backend_is_picked_from_settings(monkeypatch, name, cls):
+    monkeypatch.setattr(storage_backend, "_backend", None)
+    monkeypatch.setattr(storage_backend.settings, "STORAGE_BACKEND", name)
+    assert isinstance(get_backend(), cls)
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    monkeypatch.setattr(storage_backend, "_backend", None)
+    monkeypatch.setattr(storage_backend.settings, "STORAGE_BACKEND", "ftp")
+    with pytest.raises(ValueError, match="Unknown storage backend"):
+        get_backend()
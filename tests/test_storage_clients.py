@@ -0,0 +1,56 @@
+import io
+import threading
+
+import pytest
+
+from app.core import aws_client
+from app.core.storage_backend import LocalBackend
+
+
+@pytest.fixture
+def fresh_clients(monkeypatch):
+    monkeypatch.setattr(aws_client, "_clients", {})
+    monkeypatch.setattr(aws_client, "_clients_pid", None)
+    monkeypatch.setattr(aws_client, "_metrics", {})
+
+
+def test_client_is_built_once_and_shared_by_threads(fresh_clients):
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(aws_client.get_client("s3"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in clients}) == 1
+    assert aws_client.client_metrics()["clients"]["s3"] == {"created": 1, "reused": 7}
+
+
+def test_clients_are_rebuilt_after_a_fork(fresh_clients, monkeypatch):
+    parent = aws_client.get_client("s3")
+    # As seen from a forked child: a different pid
+    monkeypatch.setattr(aws_client, "_clients_pid", -1)
+    assert aws_client.get_client("s3") is not parent
+
+
+def test_client_uses_the_configured_pool(fresh_clients):
+    client = aws_client.get_client("s3")
+    config = aws_client.transfer_config()
+    assert client.meta.config.max_pool_connections == aws_client.settings.S3_MAX_POOL_CONNECTIONS
+    assert config.max_request_concurrency == aws_client.settings.S3_MAX_CONCURRENCY
+
+
+def test_local_backend_round_trip(tmp_path):
+    backend = LocalBackend(str(tmp_path))
+    backend.put("flagged/a b.enc", io.BytesIO(b"payload"))
+    backend.put("flagged/empty", io.BytesIO(b""))
+
+    assert backend.get("flagged/a b.enc") == b"payload"
+    assert backend.get("flagged/empty") == b""
+    assert sorted(obj["Key"] for obj in backend.list("flagged/")) == ["flagged/a b.enc", "flagged/empty"]
+
+    backend.delete(["flagged/a b.enc", "flagged/missing"])
+    with pytest.raises(FileNotFoundError):
+        backend.open("flagged/a b.enc")
+    with pytest.raises(ValueError):
+        backend.put("..", io.BytesIO(b"x"))
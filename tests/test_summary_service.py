@@ -0,0 +1,36 @@
+import io
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+from app.core.artifact_cache import result_cache
+from app.core.local_storage import load_decrypted
+from app.core.storage_backend import get_backend
+from app.services.summary_service import load_summary, summary_key
+
+
+def test_missing_sidecar_is_computed_and_stored(stored_result, scored_frame):
+    with pytest.raises(FileNotFoundError):
+        load_decrypted(summary_key(stored_result))
+
+    summary = load_summary(stored_result)
+    assert summary["counts"]["rows"] == len(scored_frame)
+    assert summary["counts"]["fraud"] == int(scored_frame["is_fraud"].sum())
+
+    # Stored as a sidecar: a cold cache reads it back instead of recomputing
+    result_cache.invalidate(stored_result)
+    assert load_decrypted(summary_key(stored_result))
+    assert load_summary(stored_result) == summary
+
+
+def test_unreadable_sidecar_is_not_treated_as_missing(stored_result):
+    load_summary(stored_result)
+    key = summary_key(stored_result)
+    backend = get_backend()
+    blob = bytearray(backend.get(key))
+    blob[-20] ^= 0x01
+    backend.put(key, io.BytesIO(bytes(blob)))
+    result_cache.invalidate(stored_result)
+
+    with pytest.raises((InvalidTag, ValueError)):
+        load_summary(stored_result)
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from app.services import reader_service
+from app.services.reader_service import parse_timestamps
+
+
+@pytest.fixture(autouse=True)
+def clean_format_cache(monkeypatch):
+    monkeypatch.setattr(reader_service, "_timestamp_formats", {})
+
+
+def test_format_is_guessed_once_and_cached():
+    values = pd.Series(["2024-01-02 03:04:05", "2024-02-03 04:05:06", None])
+    parsed = parse_timestamps(values, cache_key="RBC")
+    assert parsed.tolist()[:2] == [pd.Timestamp("2024-01-02 03:04:05"), pd.Timestamp("2024-02-03 04:05:06")]
+    assert pd.isna(parsed.iloc[2])
+    assert reader_service._timestamp_formats == {"RBC": "%Y-%m-%d %H:%M:%S"}
+
+
+def test_cached_format_is_reused(monkeypatch):
+    parse_timestamps(pd.Series(["03/01/2024 10:00"]), cache_key="TD")
+    guesses = []
+    monkeypatch.setattr(reader_service, "guess_datetime_format", lambda value: guesses.append(value))
+    parsed = parse_timestamps(pd.Series(["04/01/2024 11:00", "05/01/2024 12:00"]), cache_key="TD")
+    assert guesses == []
+    assert parsed.notna().all()
+
+
+def test_values_the_cached_format_misses_are_inferred():
+    parse_timestamps(pd.Series(["2024-01-02 03:04:05"]), cache_key="RBC")
+    values = pd.Series(["2024-01-05 10:00:00", "2024-01-06 11:00:00", "2024-01-07T12:00:00"])
+    parsed = parse_timestamps(values, cache_key="RBC")
+    assert parsed.iloc[2] == pd.Timestamp("2024-01-07 12:00:00")
+    assert reader_service._timestamp_formats["RBC"] == "%Y-%m-%d %H:%M:%S"
+
+
+def test_stale_cached_format_is_replaced():
+    parse_timestamps(pd.Series(["2024-01-02 03:04:05"]), cache_key="RBC")
+    # The bank switched formats: the cached one matches nothing now
+    parsed = parse_timestamps(pd.Series(["Jan 05 2024", "Feb 06 2024"]), cache_key="RBC")
+    assert parsed.tolist() == [pd.Timestamp("2024-01-05"), pd.Timestamp("2024-02-06")]
+    assert reader_service._timestamp_formats["RBC"] != "%Y-%m-%d %H:%M:%S"
+
+
+def test_format_that_fits_few_values_is_not_cached():
+    # The first value's format matches only one of four values
+    values = pd.Series(["2024-01-02", "03/04/2024 10:00", "04/05/2024 11:00", "05/06/2024 12:00"])
+    parsed = parse_timestamps(values, cache_key="RBC")
+    assert parsed.notna().all()
+    assert "RBC" not in reader_service._timestamp_formats
+
+
+def test_invalid_values_become_nat():
+    parsed = parse_timestamps(pd.Series(["2024-01-02 03:04:05", "not a date"]), cache_key="RBC")
+    assert pd.isna(parsed.iloc[1])
+
@@ -0,0 +1,32 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services.upload_service import parse_and_clean_upload, preview_upload, resolve_upload_bank
+
+
+def _detail(fn, *args, **kwargs) -> str:
+    with pytest.raises(HTTPException) as info:
+        fn(*args, **kwargs)
+    assert info.value.status_code == 400
+    return info.value.detail
+
+
+@pytest.mark.parametrize("filename", ["a.csv", "a.xlsx", "a.xls"])
+def test_empty_upload(filename):
+    assert _detail(resolve_upload_bank, filename, b"") == "Uploaded file is empty."
+    assert _detail(parse_and_clean_upload, filename, b"", "RBC") == "Uploaded file is empty."
+
+
+def test_unreadable_excel_is_reported_as_excel():
+    assert _detail(resolve_upload_bank, "a.xlsx", b"not a workbook") == "Unable to parse Excel file."
+    assert _detail(parse_and_clean_upload, "a.xlsx", b"not a workbook", "RBC") == "Unable to parse Excel file."
+    assert _detail(preview_upload, b"not a workbook", None, excel=True) == "Unable to parse Excel file."
+
+
+def test_unreadable_csv_is_reported_as_csv():
+    assert _detail(resolve_upload_bank, "a.csv", b"\x00\xff\xfe") == "Unable to parse CSV file."
+
+
+def test_legacy_excel_is_rejected_before_parsing():
+    detail = _detail(resolve_upload_bank, "a.xls", b"\xd0\xcf\x11\xe0 legacy")
+    assert detail.startswith("Legacy .xls workbooks are not supported")
@@ -0,0 +1,58 @@
+import io
+
+from openpyxl import Workbook
+
+from app.services import reader_service
+from app.services.upload_service import preview_upload
+
+HEADER = "time,vendor,money,mc,province,countries,source"
+ROW = "2024-01-01 10:00:00,Amazon,$12.50,5411,Toronto,CA,ONLINE"
+
+
+def _csv(rows: int, header: str = HEADER) -> bytes:
+    return (header + "\n" + "\n".join([ROW] * rows) + "\n").encode()
+
+
+def test_preview_reports_types_from_a_sample():
+    report = preview_upload(_csv(100), "RBC", truncated=False)
+    assert report["valid"] and report["missing_columns"] == [] and report["extra_columns"] == []
+    assert report["sample_rows"] == 20
+    amount = report["columns"]["amount"]
+    assert amount["source_column"] == "money"
+    assert amount["expected_dtype"] == "float64" and amount["non_numeric"] == 20
+    timestamp = report["columns"]["timestamp"]
+    assert timestamp["expected_dtype"] == "datetime" and timestamp["unparseable"] == 0
+
+
+def test_missing_and_extra_columns_are_reported():
+    header = HEADER.replace("province", "region") + ",memo"
+    report = preview_upload(_csv(5, header), "RBC", truncated=False)
+    assert not report["valid"]
+    assert report["missing_columns"] == ["province"]
+    assert report["extra_columns"] == ["region", "memo"]
+    assert "city" not in report["columns"]
+
+
+def test_a_truncated_prefix_drops_the_partial_line():
+    head = _csv(10)[:-20]
+    report = preview_upload(head, "RBC", truncated=True)
+    assert report["sample_rows"] == 9
+
+
+def test_excel_preview_reads_only_the_first_rows():
+    wb = Workbook()
+    ws = wb.active
+    ws.append(HEADER.split(","))
+    for _ in range(500):
+        ws.append(ROW.split(","))
+    buf = io.BytesIO()
+    wb.save(buf)
+
+    report = preview_upload(buf, "RBC", sample_rows=5, excel=True)
+    assert report["valid"] and report["sample_rows"] == 5
+
+
+def test_preview_does_not_seed_the_timestamp_format_cache(monkeypatch):
+    monkeypatch.setattr(reader_service, "_timestamp_formats", {})
+    preview_upload(_csv(5), "RBC", truncated=False)
+    assert reader_service._timestamp_formats == {}